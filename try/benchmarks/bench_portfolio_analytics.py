@@ -0,0 +1,116 @@
+"""Time /portfolio/analytics work for a large book against a local bar store.
+
+Builds a temporary store holding a year of daily bars for every ticker,
+then times reading the series (cold from disk, then warm with up to
+BAR_STORE_MAX_LOADED series in memory), aligning the return matrix and
+computing the risk metrics. The refreshing read shows
+what the path would cost if every stale tail went back upstream.
+
+Run from the project root:  python -m benchmarks.bench_portfolio_analytics --holdings 1000
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from typing import Dict, List, Optional
+import numpy as np
+
+from services.bar_store import BarSeries, BarStore
+from portfolio.analytics import ReturnMatrix, risk_metrics
+from config import settings
+
+DAY = 86400
+PERIOD = "1y"
+
+
+def ticker_names(count: int) -> List[str]:
+    return [f"T{i:04d}" for i in range(count)]
+
+
+class SyntheticFetcher:
+    """Deterministic weekday bars per ticker, counting calls like an upstream would"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, ticker: str, interval: str, start_ts: int, end_ts: int) -> Optional[Dict[str, np.ndarray]]:
+        self.calls += 1
+        days = np.arange(start_ts // DAY, end_ts // DAY + 1)
+        days = days[(days + 3) % 7 < 5]
+        rng = np.random.default_rng(int(ticker[1:]))
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(days))))
+        return {
+            "t": days.astype(np.int64) * DAY,
+            "o": close,
+            "h": close * 1.01,
+            "l": close * 0.99,
+            "c": close,
+            "v": np.full(len(days), 1_000_000, dtype=np.int64)
+        }
+
+
+async def read_all(store: BarStore, tickers: List[str], refresh: bool) -> Dict[str, BarSeries]:
+    results = await asyncio.gather(*(store.get_bars(ticker, PERIOD, refresh=refresh) for ticker in tickers))
+    return dict(zip(tickers, results))
+
+
+def compute(series: Dict[str, BarSeries], benchmark: str):
+    held = [ticker for ticker in series if ticker != benchmark]
+    values = np.array([100.0 * float(series[ticker]["c"][-1]) for ticker in held])
+    matrix = ReturnMatrix.from_bars(series)
+    return risk_metrics(matrix, values / values.sum(), float(values.sum()), benchmark=benchmark)
+
+
+def timed(label: str, started: float, extra: str = ""):
+    print(f"  {label:<28} {(time.perf_counter() - started) * 1000:9.1f} ms  {extra}")
+
+
+async def run(holdings: int):
+    tickers = ticker_names(holdings + 1)
+    benchmark = tickers[-1]
+    fetcher = SyntheticFetcher()
+
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        await read_all(BarStore(fetcher, directory), tickers, refresh=True)
+        timed("populate store", started, f"{fetcher.calls} fetches")
+
+        store = BarStore(fetcher, directory)
+        fetcher.calls = 0
+        started = time.perf_counter()
+        series = await read_all(store, tickers, refresh=False)
+        timed("read stored (disk)", started, f"{fetcher.calls} fetches")
+
+        started = time.perf_counter()
+        series = await read_all(store, tickers, refresh=False)
+        timed("read stored (warm)", started, f"{fetcher.calls} fetches")
+
+        started = time.perf_counter()
+        matrix = ReturnMatrix.from_bars(series)
+        timed("align return matrix", started, f"{len(matrix)} days x {len(tickers)} series")
+
+        started = time.perf_counter()
+        compute(series, benchmark)
+        timed("matrix + risk metrics", started)
+
+        # Every tail is stale: each series would go back upstream through the limiter
+        ttl, settings.BAR_REFRESH_TTL = settings.BAR_REFRESH_TTL, -1
+        try:
+            started = time.perf_counter()
+            await read_all(store, tickers, refresh=True)
+        finally:
+            settings.BAR_REFRESH_TTL = ttl
+        rate = settings.RATE_LIMITS["yahoo"]["rate"]
+        timed("read refreshing (no limiter)", started, f"{fetcher.calls} fetches, ~{fetcher.calls / rate:.0f} s at {rate:g}/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--holdings", type=int, default=1000)
+    args = parser.parse_args()
+    print(f"analytics over {args.holdings} holdings, period {PERIOD}")
+    asyncio.run(run(args.holdings))
+
+
+if __name__ == "__main__":
+    main()
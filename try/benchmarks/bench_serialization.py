@@ -0,0 +1,80 @@
+"""Compare per-bar model serialization with the columnar orjson path for chart payloads.
+
+Run from the project root:  python -m benchmarks.bench_serialization
+"""
+import json
+import time
+from datetime import datetime
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+from core.responses import FastJSONResponse
+from models.stock_models import ChartData
+from services.bar_store import BarSeries
+from services.yahoo_finance_service import YahooFinanceService
+
+SCENARIOS = {
+    "5y_daily": (1260, 86400),
+    "intraday_5m": (20000, 300)
+}
+ROUNDS = 20
+
+
+def make_bars(count: int, step: int) -> BarSeries:
+    rng = np.random.default_rng(42)
+    close = 100 + np.cumsum(rng.normal(0, 1, count))
+    return BarSeries({
+        "t": 1_600_000_000 + np.arange(count, dtype=np.int64) * step,
+        "o": close + rng.normal(0, 0.5, count),
+        "h": close + 1.0,
+        "l": close - 1.0,
+        "c": close,
+        "v": rng.integers(1_000, 1_000_000, count)
+    })
+
+
+def legacy_payload(bars: BarSeries) -> bytes:
+    """The previous path: a ChartData model per bar, jsonable_encoder, stdlib json"""
+    rows = [
+        ChartData(
+            date=datetime.fromtimestamp(int(bars["t"][i])).strftime("%Y-%m-%d"),
+            open=float(bars["o"][i]),
+            high=float(bars["h"][i]),
+            low=float(bars["l"][i]),
+            close=float(bars["c"][i]),
+            volume=int(bars["v"][i])
+        )
+        for i in range(len(bars))
+    ]
+    return json.dumps(jsonable_encoder({"data": rows})).encode("utf-8")
+
+
+def rows_payload(bars: BarSeries) -> bytes:
+    return FastJSONResponse({"data": YahooFinanceService.chart_rows_from_bars(bars)}).body
+
+
+def columnar_payload(bars: BarSeries) -> bytes:
+    return FastJSONResponse(YahooFinanceService.chart_columns_from_bars(bars)).body
+
+
+def measure(func, bars: BarSeries):
+    size = len(func(bars))
+    started = time.process_time()
+    for _ in range(ROUNDS):
+        func(bars)
+    return (time.process_time() - started) / ROUNDS * 1000, size
+
+
+def main():
+    for scenario, (count, step) in SCENARIOS.items():
+        bars = make_bars(count, step)
+        print(f"{scenario} ({count} bars)")
+        baseline = None
+        for name, func in (("legacy", legacy_payload), ("rows", rows_payload), ("columnar", columnar_payload)):
+            cpu_ms, size = measure(func, bars)
+            baseline = baseline or cpu_ms
+            print(f"  {name:<9} {cpu_ms:8.2f} ms cpu  {size / 1024:8.1f} KiB  {baseline / cpu_ms:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
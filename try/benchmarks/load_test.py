@@ -0,0 +1,336 @@
+"""Load-test the API against local stub upstreams.
+
+Starts benchmarks.stub_upstream and, per scenario, a fresh uvicorn process
+running main:app with UPSTREAM_OVERRIDE_URL pointing at the stub and its
+data directories in a temporary folder. Each scenario drives a closed loop
+of concurrent clients for a fixed time and reports latency percentiles,
+throughput, upstream calls per host and the app's peak RSS. Results are
+written as JSON (app output goes to a .log file beside it); pass --compare
+with an earlier file to print the change.
+
+Run from the project root:
+    python -m benchmarks.load_test                      # every scenario
+    python -m benchmarks.load_test terminals --duration 30 --compare baseline.json
+
+The yfinance fallback paths are not redirected, so scenarios avoid them.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TextIO, Tuple
+
+import httpx
+import numpy as np
+
+from benchmarks.stub_upstream import universe
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (label, path) for the next request of one client
+NextRequest = Callable[[int, int], Tuple[str, str]]
+
+
+class Scenario:
+    def __init__(
+        self,
+        description: str,
+        next_request: NextRequest,
+        concurrency: int,
+        think_time: float = 0.0,
+        upstream: Optional[Dict[str, Dict[str, float]]] = None,
+        env: Optional[Dict[str, str]] = None,
+        setup: Optional[Callable[[httpx.AsyncClient], Awaitable[None]]] = None
+    ):
+        self.description = description
+        self.next_request = next_request
+        self.concurrency = concurrency
+        self.think_time = think_time
+        self.upstream = upstream or {}
+        self.env = env or {}
+        self.setup = setup
+
+
+TICKERS = universe()
+# Polygon's free tier allows 5 requests a minute; scenarios that call it assume a paid plan
+PAID_POLYGON = json.dumps({
+    "yahoo": {"hosts": ["query1.finance.yahoo.com", "query2.finance.yahoo.com"], "rate": 10.0, "burst": 20},
+    "polygon": {"hosts": ["api.polygon.io"], "rate": 100.0, "burst": 100},
+    "sec": {"hosts": ["www.sec.gov", "data.sec.gov"], "rate": 10.0, "burst": 10}
+})
+
+
+def terminal_requests(watchlist_size: int = 10, chart_every: int = 5) -> NextRequest:
+    """Each terminal polls quotes round-robin over its own watchlist and refreshes a chart now and then"""
+    watchlists: Dict[int, List[str]] = {}
+
+    def next_request(client: int, i: int) -> Tuple[str, str]:
+        watchlist = watchlists.get(client)
+        if watchlist is None:
+            watchlist = watchlists[client] = random.Random(client).sample(TICKERS[:200], watchlist_size)
+        ticker = watchlist[i % watchlist_size]
+        if i % chart_every == chart_every - 1:
+            return "chart", f"/stocks/{ticker}/chart?period=1y&format=columnar"
+        return "quote", f"/stocks/{ticker}/quote"
+    return next_request
+
+
+def summary_requests(client: int, i: int) -> Tuple[str, str]:
+    return "summary", "/portfolio/summary"
+
+
+def info_requests(client: int, i: int) -> Tuple[str, str]:
+    # Clients walk the same 100 tickers, so early requests are cold and later ones hit caches
+    return "info", f"/stocks/{TICKERS[(client * 7 + i) % 100]}/info"
+
+
+async def import_large_book(client: httpx.AsyncClient, lots: int = 10_000, tickers: int = 1_000):
+    rng = random.Random(7)
+    rows = ["ticker,shares,price,purchased_at"]
+    for _ in range(lots):
+        rows.append(f"{rng.choice(TICKERS[:tickers])},{rng.randint(1, 500)},{rng.uniform(10, 400):.2f},2023-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}")
+    response = await client.post(
+        "/portfolio/import?format=csv", content="\n".join(rows).encode(), headers={"content-type": "text/csv"}, timeout=300
+    )
+    response.raise_for_status()
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "terminals": Scenario(
+        "50 terminals polling watchlist quotes with a chart refresh every 5th poll",
+        terminal_requests(), concurrency=50, think_time=0.1
+    ),
+    "brownout": Scenario(
+        "terminals while Yahoo is slow, failing 10% and throttling 5% of requests",
+        terminal_requests(), concurrency=50, think_time=0.1,
+        upstream={"yahoo": {"latency": 0.5, "jitter": 0.3, "error_rate": 0.1, "throttle_rate": 0.05, "retry_after": 1.0}},
+        env={"RATE_LIMITS": PAID_POLYGON}
+    ),
+    "portfolio_summary": Scenario(
+        "portfolio summary for a 10,000-lot book over 1,000 tickers",
+        summary_requests, concurrency=20, setup=import_large_book
+    ),
+    "stock_info": Scenario(
+        "/stocks/{ticker}/info fan-out (quote, fundamentals, Polygon details, SEC filings, chart)",
+        info_requests, concurrency=20, env={"RATE_LIMITS": PAID_POLYGON}
+    )
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def peak_rss_mb(pid: int) -> Optional[float]:
+    """Peak resident set size of a running process (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+async def wait_ready(url: str, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{url} exited with code {process.returncode}")
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+
+def stop(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    if not latencies:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99), "max_ms": max(latencies) * 1000}
+
+
+async def drive(client: httpx.AsyncClient, scenario: Scenario, concurrency: int, duration: float) -> Dict[str, Any]:
+    """Closed-loop clients issuing the scenario's requests until the duration is up"""
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    deadline = time.monotonic() + duration
+
+    async def run_client(index: int):
+        i = 0
+        while time.monotonic() < deadline:
+            label, path = scenario.next_request(index, i)
+            i += 1
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.setdefault(label, []).append(time.perf_counter() - started)
+            if failed:
+                errors[label] = errors.get(label, 0) + 1
+            if scenario.think_time:
+                await asyncio.sleep(scenario.think_time)
+
+    started = time.monotonic()
+    await asyncio.gather(*[run_client(i) for i in range(concurrency)])
+    elapsed = time.monotonic() - started
+
+    everything = [latency for values in latencies.values() for latency in values]
+    return {
+        "requests": len(everything),
+        "errors": sum(errors.values()),
+        "elapsed_s": elapsed,
+        "throughput_rps": len(everything) / elapsed if elapsed else 0.0,
+        "latency": percentiles(everything),
+        "routes": {
+            label: {"requests": len(values), "errors": errors.get(label, 0), **percentiles(values)}
+            for label, values in latencies.items()
+        }
+    }
+
+
+async def run_scenario(name: str, scenario: Scenario, stub_url: str, concurrency: int, duration: float, log: TextIO) -> Dict[str, Any]:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    async with httpx.AsyncClient(base_url=stub_url) as stub:
+        await stub.post("/_stub/reset")
+        await stub.post("/_stub/config", json=scenario.upstream)
+
+    with tempfile.TemporaryDirectory(prefix=f"bench-{name}-") as data_dir:
+        env = {
+            **os.environ,
+            "UPSTREAM_OVERRIDE_URL": stub_url,
+            "PREFETCH_ENABLED": "false",
+            "BAR_STORE_DIR": os.path.join(data_dir, "bars"),
+            "POLYGON_BAR_STORE_DIR": os.path.join(data_dir, "bars_polygon"),
+            "FUNDAMENTALS_DIR": os.path.join(data_dir, "fundamentals"),
+            "PORTFOLIO_DB_PATH": os.path.join(data_dir, "portfolio.db"),
+            "SEC_TICKER_INDEX_PATH": os.path.join(data_dir, "sec_company_tickers.json"),
+            "SEC_FILINGS_DIR": os.path.join(data_dir, "sec_filings"),
+            **scenario.env
+        }
+        app = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning", "--no-access-log"],
+            cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+        try:
+            await wait_ready(f"{base_url}/metrics", app)
+            limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+                if scenario.setup:
+                    await scenario.setup(client)
+                # Only count upstream calls made while the scenario runs
+                async with httpx.AsyncClient(base_url=stub_url) as stub:
+                    await stub.post("/_stub/reset")
+                    await stub.post("/_stub/config", json=scenario.upstream)
+                result = await drive(client, scenario, concurrency, duration)
+            async with httpx.AsyncClient(base_url=stub_url) as stub:
+                calls = (await stub.get("/_stub/stats")).json()["calls"]
+            result["peak_rss_mb"] = peak_rss_mb(app.pid)
+        finally:
+            stop(app)
+
+    result["upstream_calls"] = {host: sum(statuses.values()) for host, statuses in calls.items()}
+    result["upstream_statuses"] = calls
+    return {"description": scenario.description, "concurrency": concurrency, **result}
+
+
+def print_result(name: str, result: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    latency = result["latency"]
+    rss = result["peak_rss_mb"]
+    print(f"{name}: {result['description']}")
+    print(
+        f"  {result['requests']} requests, {result['errors']} errors, {result['throughput_rps']:.1f} req/s, "
+        f"p50 {latency['p50_ms']:.1f} ms, p95 {latency['p95_ms']:.1f} ms, p99 {latency['p99_ms']:.1f} ms, "
+        f"peak RSS {f'{rss:.0f} MiB' if rss is not None else 'n/a'}"
+    )
+    for label, route in result["routes"].items():
+        print(f"    {label:<10} {route['requests']:>7} req  p50 {route['p50_ms']:8.1f}  p95 {route['p95_ms']:8.1f}  p99 {route['p99_ms']:8.1f} ms")
+    print(f"  upstream calls: {result['upstream_calls']}")
+
+    if baseline:
+        def change(new: float, old: float) -> str:
+            return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        old = baseline["latency"]
+        print(
+            f"  vs baseline: throughput {change(result['throughput_rps'], baseline['throughput_rps'])}, "
+            f"p50 {change(latency['p50_ms'], old['p50_ms'])}, p95 {change(latency['p95_ms'], old['p95_ms'])}, "
+            f"p99 {change(latency['p99_ms'], old['p99_ms'])}, "
+            f"upstream calls {change(sum(result['upstream_calls'].values()), sum(baseline['upstream_calls'].values()))}"
+        )
+
+
+async def run(args: argparse.Namespace):
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["scenarios"]
+
+    stub_port = free_port()
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    stub = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stub_upstream", "--port", str(stub_port), "--seed", str(args.seed)], cwd=ROOT
+    )
+    results = {}
+    log_path = os.path.splitext(args.output)[0] + ".log"
+    try:
+        await wait_ready(f"{stub_url}/_stub/stats", stub)
+        with open(log_path, "w") as log:
+            for name in args.scenarios or list(SCENARIOS):
+                scenario = SCENARIOS[name]
+                log.write(f"=== {name}\n")
+                log.flush()
+                results[name] = await run_scenario(
+                    name, scenario, stub_url, args.concurrency or scenario.concurrency, args.duration, log
+                )
+                print_result(name, results[name], baseline.get(name))
+    finally:
+        stop(stub)
+
+    report = {"created_at": datetime.now().isoformat(), "duration_s": args.duration, "scenarios": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}, app output to {log_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the API against local stub upstreams")
+    parser.add_argument("scenarios", nargs="*", help=f"Scenarios to run: {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load per scenario")
+    parser.add_argument("--concurrency", type=int, default=None, help="Override every scenario's client count")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for stub latency and failure injection")
+    parser.add_argument("--output", default=f"load_test_{datetime.now():%Y%m%d_%H%M%S}.json", help="JSON results file")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
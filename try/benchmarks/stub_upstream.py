@@ -0,0 +1,270 @@
+"""Local stand-in for the Yahoo, Polygon and SEC endpoints the services call.
+
+Requests are routed by path and counted per real host (the app keeps the
+original Host header, see UPSTREAM_OVERRIDE_URL). Each provider has its own
+latency, jitter, error rate and 429 behaviour, changed at runtime through
+POST /_stub/config. Data is synthetic but deterministic per ticker and day,
+so incremental bar fetches stitch together like real history.
+
+Run standalone:  python -m benchmarks.stub_upstream --port 8900
+"""
+import argparse
+import asyncio
+import math
+import random
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+import uvicorn
+
+PROVIDERS = {
+    "query1.finance.yahoo.com": "yahoo",
+    "query2.finance.yahoo.com": "yahoo",
+    "api.polygon.io": "polygon",
+    "www.sec.gov": "sec",
+    "data.sec.gov": "sec"
+}
+DEFAULT_BEHAVIOUR = {"latency": 0.05, "jitter": 0.02, "error_rate": 0.0, "throttle_rate": 0.0, "retry_after": 1.0}
+UNIVERSE_SIZE = 2000
+TICKERS_ETAG = '"stub-tickers-1"'
+DAY = 86400
+
+
+def symbol(index: int) -> str:
+    """Three-letter ticker for a universe index (AAA, AAB, ...)"""
+    letters = []
+    for _ in range(3):
+        index, rest = divmod(index, 26)
+        letters.append(chr(ord("A") + rest))
+    return "".join(reversed(letters))
+
+
+def universe(size: int = UNIVERSE_SIZE) -> List[str]:
+    return [symbol(i) for i in range(size)]
+
+
+def _seed(ticker: str) -> int:
+    return zlib.crc32(ticker.upper().encode())
+
+
+def close_on(ticker: str, day: int) -> float:
+    """Deterministic close for a ticker on an epoch day"""
+    seed = _seed(ticker)
+    base = 20 + seed % 480
+    return round(base * (1 + 0.15 * math.sin(day / 23 + seed % 97) + 0.03 * math.sin(day / 3.1 + seed % 13)), 2)
+
+
+def _bar(ticker: str, ts: int) -> Tuple[float, float, float, float, int]:
+    close = close_on(ticker, ts // DAY)
+    open_ = close_on(ticker, ts // DAY - 1)
+    return open_, max(open_, close) * 1.01, min(open_, close) * 0.99, close, 1_000_000 + _seed(ticker) % 9_000_000
+
+
+def _trading_days(start_ts: int, end_ts: int) -> List[int]:
+    first = start_ts // DAY
+    last = end_ts // DAY
+    # Epoch day 0 was a Thursday; skip weekends
+    return [day * DAY for day in range(first, last + 1) if (day + 3) % 7 < 5]
+
+
+def _today() -> int:
+    return int(datetime.now(timezone.utc).timestamp()) // DAY
+
+
+class Stub:
+    """ASGI app serving the stub endpoints and recording upstream call counts"""
+
+    def __init__(self, seed: int = 1):
+        self.random = random.Random(seed)
+        self.behaviour: Dict[str, Dict[str, float]] = {provider: dict(DEFAULT_BEHAVIOUR) for provider in set(PROVIDERS.values())}
+        self.calls: Dict[str, Dict[str, int]] = {}
+        self.tickers = universe()
+
+    def configure(self, config: Dict[str, Dict[str, float]]):
+        for provider, values in config.items():
+            self.behaviour.setdefault(provider, dict(DEFAULT_BEHAVIOUR)).update(values)
+
+    def reset(self):
+        self.calls = {}
+        self.behaviour = {provider: dict(DEFAULT_BEHAVIOUR) for provider in set(PROVIDERS.values())}
+
+    def _count(self, host: str, status: int):
+        counts = self.calls.setdefault(host, {})
+        counts[str(status)] = counts.get(str(status), 0) + 1
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while (await receive())["type"] != "lifespan.shutdown":
+                await send({"type": "lifespan.startup.complete"})
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+        path = scope["path"]
+        headers = {key.decode().lower(): value.decode() for key, value in scope["headers"]}
+        query = dict(part.split("=", 1) for part in scope["query_string"].decode().split("&") if "=" in part)
+
+        if path.startswith("/_stub/"):
+            status, body, extra = await self._control(path, receive)
+            await self._send(send, status, body, extra)
+            return
+
+        host = headers.get("host", "").split(":")[0]
+        behaviour = self.behaviour.get(PROVIDERS.get(host, ""), DEFAULT_BEHAVIOUR)
+        delay = behaviour["latency"] + self.random.uniform(-behaviour["jitter"], behaviour["jitter"])
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        roll = self.random.random()
+        if roll < behaviour["throttle_rate"]:
+            status, body, extra = 429, {"error": "Too Many Requests"}, {"retry-after": str(behaviour["retry_after"])}
+        elif roll < behaviour["throttle_rate"] + behaviour["error_rate"]:
+            status, body, extra = 500, {"error": "stub failure"}, {}
+        else:
+            status, body, extra = self._route(path, query, headers)
+        self._count(host or "unknown", status)
+        await self._send(send, status, body, extra)
+
+    @staticmethod
+    async def _send(send, status: int, body: Optional[Any], headers: Dict[str, str]):
+        content = b"" if body is None else orjson.dumps(body)
+        raw_headers = [(b"content-type", b"application/json"), (b"content-length", str(len(content)).encode())]
+        raw_headers += [(key.encode(), value.encode()) for key, value in headers.items()]
+        await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+        await send({"type": "http.response.body", "body": content})
+
+    async def _control(self, path: str, receive) -> Tuple[int, Any, Dict[str, str]]:
+        if path == "/_stub/stats":
+            return 200, {"calls": self.calls, "behaviour": self.behaviour}, {}
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        if path == "/_stub/reset":
+            self.reset()
+            return 200, {"ok": True}, {}
+        if path == "/_stub/config":
+            self.configure(orjson.loads(body or b"{}"))
+            return 200, {"behaviour": self.behaviour}, {}
+        return 404, {"error": "unknown control endpoint"}, {}
+
+    def _route(self, path: str, query: Dict[str, str], headers: Dict[str, str]) -> Tuple[int, Any, Dict[str, str]]:
+        parts = path.strip("/").split("/")
+
+        if path.startswith("/v8/finance/chart/"):
+            return 200, self._chart(parts[3], query), {}
+        if path == "/v7/finance/quote":
+            symbols = [s for s in query.get("symbols", "").replace("%2C", ",").split(",") if s]
+            return 200, {"quoteResponse": {"result": [self._quote_item(s) for s in symbols]}}, {}
+        if path.startswith("/v10/finance/quoteSummary/"):
+            return 200, self._summary(parts[3]), {}
+        if path.startswith("/v2/aggs/ticker/"):
+            return 200, self._aggregates(parts[3], parts[7], parts[8]), {}
+        if path.startswith("/v2/last/trade/"):
+            ticker = parts[3]
+            return 200, {"status": "OK", "results": {"T": ticker, "p": close_on(ticker, _today()), "s": 100}}, {}
+        if path.startswith("/v3/reference/tickers/"):
+            ticker = parts[3]
+            return 200, {"status": "OK", "results": {"ticker": ticker, "name": f"{ticker} Corp", "market": "stocks"}}, {}
+        if path == "/files/company_tickers.json":
+            if headers.get("if-none-match") == TICKERS_ETAG:
+                return 304, None, {"etag": TICKERS_ETAG}
+            companies = {str(i): {"cik_str": 100000 + i, "ticker": t, "title": f"{t} Corp"} for i, t in enumerate(self.tickers)}
+            return 200, companies, {"etag": TICKERS_ETAG}
+        if path.startswith("/submissions/CIK"):
+            return 200, self._submissions(parts[1][3:13]), {}
+        return 404, {"error": f"no stub for {path}"}, {}
+
+    def _quote_item(self, ticker: str) -> Dict[str, Any]:
+        today = _today()
+        return {
+            "symbol": ticker.upper(),
+            "regularMarketPrice": close_on(ticker, today),
+            "regularMarketPreviousClose": close_on(ticker, today - 1),
+            "regularMarketVolume": 1_000_000 + _seed(ticker) % 9_000_000
+        }
+
+    def _chart(self, ticker: str, query: Dict[str, str]) -> Dict[str, Any]:
+        item = self._quote_item(ticker)
+        meta = {
+            "symbol": item["symbol"],
+            "regularMarketPrice": item["regularMarketPrice"],
+            "previousClose": item["regularMarketPreviousClose"],
+            "regularMarketVolume": item["regularMarketVolume"]
+        }
+        if "period1" not in query:
+            return {"chart": {"result": [{"meta": meta}], "error": None}}
+
+        days = _trading_days(int(query["period1"]), int(query.get("period2", _today() * DAY)))
+        bars = [_bar(ticker, ts) for ts in days]
+        return {"chart": {"result": [{
+            "meta": meta,
+            "timestamp": days,
+            "indicators": {"quote": [{
+                "open": [bar[0] for bar in bars],
+                "high": [bar[1] for bar in bars],
+                "low": [bar[2] for bar in bars],
+                "close": [bar[3] for bar in bars],
+                "volume": [bar[4] for bar in bars]
+            }]}
+        }], "error": None}}
+
+    def _summary(self, ticker: str) -> Dict[str, Any]:
+        seed = _seed(ticker)
+        price = close_on(ticker, _today())
+        return {"quoteSummary": {"result": [{
+            "price": {"longName": f"{ticker.upper()} Corp"},
+            "summaryDetail": {
+                "marketCap": {"raw": price * (10_000_000 + seed % 1_000_000_000)},
+                "trailingPE": {"raw": 5 + seed % 40},
+                "fiftyTwoWeekHigh": {"raw": price * 1.2},
+                "fiftyTwoWeekLow": {"raw": price * 0.8},
+                "dividendYield": {"raw": (seed % 50) / 1000}
+            },
+            "defaultKeyStatistics": {"trailingEps": {"raw": round(price / (5 + seed % 40), 2)}, "beta": {"raw": 0.5 + (seed % 150) / 100}},
+            "assetProfile": {"sector": "Technology", "industry": "Software"}
+        }], "error": None}}
+
+    def _aggregates(self, ticker: str, start: str, end: str) -> Dict[str, Any]:
+        start_ts = int(datetime.strptime(start, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+        end_ts = int(datetime.strptime(end, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+        results = []
+        for ts in _trading_days(start_ts, end_ts):
+            o, h, l, c, v = _bar(ticker, ts)
+            results.append({"t": ts * 1000, "o": o, "h": h, "l": l, "c": c, "v": v})
+        return {"status": "OK", "ticker": ticker, "resultsCount": len(results), "results": results}
+
+    def _submissions(self, cik: str) -> Dict[str, Any]:
+        seed = int(cik)
+        forms, filed, reports, accessions, documents = [], [], [], [], []
+        year = datetime.now(timezone.utc).year
+        for quarter in range(40):
+            filing_year, q = year - quarter // 4 - 1, 4 - quarter % 4
+            forms.append("10-K" if q == 4 else "10-Q")
+            filed.append(f"{filing_year + (q == 4)}-{(q * 3) % 12 + 1:02d}-15")
+            reports.append(f"{filing_year}-{q * 3:02d}-28")
+            accessions.append(f"{seed:010d}-{filing_year % 100:02d}-{q:06d}")
+            documents.append(f"doc{filing_year}q{q}.htm")
+        return {"cik": cik, "filings": {"recent": {
+            "accessionNumber": accessions,
+            "filingDate": filed,
+            "reportDate": reports,
+            "form": forms,
+            "primaryDocument": documents
+        }, "files": []}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    uvicorn.run(Stub(args.seed), host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+from typing import Any, Dict, List
 from pydantic_settings import BaseSettings
 
 
@@ -12,9 +13,146 @@ class Settings(BaseSettings):
     DEFAULT_RETRY_DELAY: int = 1
     MAX_RETRIES: int = 3
     REQUEST_TIMEOUT: int = 10
+    # Send every upstream request to this origin instead (e.g. the benchmark stub server)
+    UPSTREAM_OVERRIDE_URL: str = ""
+    
+    # Connection Pool Settings
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_HOST_LIMITS: Dict[str, int] = {
+        "query1.finance.yahoo.com": 50,
+        "query2.finance.yahoo.com": 20,
+        "api.polygon.io": 10,
+        "www.sec.gov": 5,
+        "data.sec.gov": 10
+    }
+    HTTP2_ENABLED: bool = True
+    HTTP2_HOSTS: List[str] = [
+        "query1.finance.yahoo.com",
+        "query2.finance.yahoo.com",
+        "api.polygon.io"
+    ]
+    
+    # Rate Limit Settings (rate in requests/second, shared by all hosts of a provider)
+    RATE_LIMITS: Dict[str, Dict[str, Any]] = {
+        "yahoo": {"hosts": ["query1.finance.yahoo.com", "query2.finance.yahoo.com"], "rate": 10.0, "burst": 20},
+        "polygon": {"hosts": ["api.polygon.io"], "rate": 5 / 60, "burst": 5},
+        "sec": {"hosts": ["www.sec.gov", "data.sec.gov"], "rate": 10.0, "burst": 10}
+    }
+    RATE_LIMIT_MAX_WAIT: float = 30.0
+    RATE_LIMIT_MIN_FRACTION: float = 0.1
+    RATE_LIMIT_RECOVERY: float = 0.05
+
+    # Circuit breakers (per upstream host)
+    CIRCUIT_WINDOW: float = 60.0
+    CIRCUIT_MIN_REQUESTS: int = 10
+    CIRCUIT_ERROR_THRESHOLD: float = 0.5
+    CIRCUIT_OPEN_SECONDS: float = 30.0
+    CIRCUIT_HALF_OPEN_PROBES: int = 3
+    CIRCUIT_TRANSITION_HISTORY: int = 20
+    
+    # Cache Settings
+    QUOTE_CACHE_TTL: float = 2.0
+    QUOTE_CACHE_MAX_SIZE: int = 2048
+    YAHOO_BATCH_QUOTE_SIZE: int = 50
+    BATCH_QUOTE_MAX_TICKERS: int = 1000
+
+    # Quote provider hedging
+    QUOTE_RESOLVE_TIMEOUT: float = 10.0
+    QUOTE_HEDGE_DEFAULT_DELAY: float = 0.5
+    QUOTE_HEDGE_MIN_DELAY: float = 0.05
+    QUOTE_HEDGE_MAX_DELAY: float = 2.0
+    QUOTE_HEALTH_WINDOW: float = 300.0
+    QUOTE_HEALTH_MAX_SAMPLES: int = 200
+    QUOTE_HEALTH_MIN_SAMPLES: int = 20
+    QUOTE_ERROR_PENALTY: float = 5.0
+    QUOTE_ROUTING_HISTORY: int = 50
+    
+    # Bar Store Settings
+    BAR_STORE_DIR: str = os.path.join("data", "bars")
+    BAR_REFRESH_TTL: int = 60
+    BAR_FETCH_RETRY_INTERVAL: int = 300
+    BAR_STORE_MAX_LOADED: int = 512
+    POLYGON_BAR_STORE_DIR: str = os.path.join("data", "bars_polygon")
+    # Polygon only serves daily history here and allows 5 requests/minute
+    POLYGON_BAR_REFRESH_TTL: int = 6 * 60 * 60
+    CHART_PAYLOAD_CACHE_TTL: float = 24 * 60 * 60
+    CHART_PAYLOAD_CACHE_MAX_SIZE: int = 512
+
+    # Fundamentals (stale-while-revalidate, persisted per symbol)
+    FUNDAMENTALS_DIR: str = os.path.join("data", "fundamentals")
+    FUNDAMENTALS_TTL: float = 6 * 60 * 60
+    FUNDAMENTALS_TTL_JITTER: float = 0.1
+    FUNDAMENTALS_RETRY_INTERVAL: float = 60.0
+    FUNDAMENTALS_MAX_LOADED: int = 2048
+
+    # Blocking work (yfinance/pandas/plotly) and event loop health
+    BLOCKING_EXECUTOR_WORKERS: int = 8
+    BLOCKING_EXECUTOR_MAX_QUEUE: int = 64
+    BLOCKING_EXECUTOR_TIMEOUT: float = 30.0
+    YF_BATCH_WINDOW: float = 0.05
+    YF_BATCH_MAX_TICKERS: int = 50
+    LOOP_WATCHDOG_ENABLED: bool = True
+    LOOP_BLOCK_THRESHOLD: float = 0.1
+
+    # Prometheus request metrics (the /metrics endpoint is always served)
+    METRICS_ENABLED: bool = True
+
+    # Profiling and the trace endpoints are disabled until this is set; requests then need X-Admin-Token
+    ADMIN_TOKEN: str = ""
+
+    # Per-request profiling and slow-request capture
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_SLOW_THRESHOLD: float = 1.0
+    PROFILE_SLOW_BUFFER: int = 100
+    PROFILE_RECENT_BUFFER: int = 50
+    PROFILE_MAX_SPANS: int = 500
+
+    # Technical indicators
+    INDICATOR_MAX_WINDOW: int = 500
+    INDICATOR_INCREMENTAL_MAX_BARS: int = 256
+    INDICATOR_BATCH_MAX_TICKERS: int = 100
+
+    # Portfolio analytics
+    PORTFOLIO_BENCHMARK: str = "SPY"
+
+    # Portfolio store
+    PORTFOLIO_DB_PATH: str = os.path.join("data", "portfolio.db")
+    DEFAULT_PORTFOLIO: str = "default"
+    PORTFOLIO_WRITE_BATCH_DELAY: float = 0.005
+    PORTFOLIO_WRITE_BATCH_SIZE: int = 500
+    PORTFOLIO_PRICE_REFRESH_INTERVAL: float = 2.0
+    PORTFOLIO_PRICE_IDLE_TIMEOUT: float = 60.0
+    PORTFOLIO_IMPORT_CHUNK_SIZE: int = 5000
+    PORTFOLIO_IMPORT_MAX_ERRORS: int = 1000
+    PORTFOLIO_EXPORT_PAGE_SIZE: int = 5000
+    PORTFOLIO_HISTORY_CACHE_TTL: float = 60 * 60
+    PORTFOLIO_HISTORY_CACHE_MAX_SIZE: int = 64
+    
+    # Background prefetch (watchlist and held tickers)
+    PREFETCH_ENABLED: bool = True
+    PREFETCH_WATCHLIST: List[str] = ["SPY", "QQQ", "DIA", "AAPL", "MSFT", "NVDA", "AMZN", "GOOGL", "META", "TSLA"]
+    PREFETCH_BAR_PERIOD: str = "1y"
+    PREFETCH_WARM_INTERVAL: float = 6 * 60 * 60
+    PREFETCH_QUOTE_INTERVAL_REGULAR: float = 5.0
+    PREFETCH_QUOTE_INTERVAL_EXTENDED: float = 120.0
+    PREFETCH_QUOTE_INTERVAL_CLOSED: float = 0.0
+    PREFETCH_SESSION_CHECK_INTERVAL: float = 300.0
+    PREFETCH_RATE_FRACTION: float = 0.25
+    
+    # Streaming Settings
+    STREAM_REFRESH_INTERVAL: float = 2.0
+    STREAM_MAX_TICKERS_PER_CLIENT: int = 50
     
     # SEC Settings
     SEC_USER_AGENT: str = "StockTerminal/1.0 (contact@example.com)"
+    SEC_TICKER_INDEX_PATH: str = os.path.join("data", "sec_company_tickers.json")
+    SEC_TICKER_INDEX_REFRESH: int = 6 * 60 * 60
+    SEC_TICKER_INDEX_RETRY_INTERVAL: float = 60.0
+    SEC_FILINGS_DIR: str = os.path.join("data", "sec_filings")
+    SEC_FILINGS_TTL: int = 15 * 60
+    SEC_FILINGS_MAX_LOADED: int = 256
     
     class Config:
         env_file = ".env"
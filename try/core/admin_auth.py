@@ -0,0 +1,15 @@
+import hmac
+from typing import Optional
+from config import settings
+
+
+def admin_enabled() -> bool:
+    """Request profiling and its trace endpoints exist only once ADMIN_TOKEN is configured"""
+    return bool(settings.ADMIN_TOKEN)
+
+
+def admin_token_valid(token: Optional[str]) -> bool:
+    """Whether a request carries the admin token; always False while ADMIN_TOKEN is unset"""
+    if not admin_enabled():
+        return False
+    return token is not None and hmac.compare_digest(token, settings.ADMIN_TOKEN)
@@ -0,0 +1,131 @@
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Tuple
+from config import settings
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpen(Exception):
+    """Raised instead of sending a request to a host whose breaker is open"""
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker over a rolling window of request outcomes.
+
+    The breaker opens once at least CIRCUIT_MIN_REQUESTS requests in the
+    last CIRCUIT_WINDOW seconds have an error rate of CIRCUIT_ERROR_THRESHOLD
+    or more. After CIRCUIT_OPEN_SECONDS it lets CIRCUIT_HALF_OPEN_PROBES
+    trial requests through: all of them succeeding closes it again, any
+    failure reopens it.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._failures = 0
+        self.probes_in_flight = 0
+        self.probe_successes = 0
+        self.transitions: Deque[Dict[str, Any]] = deque(maxlen=settings.CIRCUIT_TRANSITION_HISTORY)
+        self.opened = 0
+        self.rejected = 0
+
+    def _prune(self, now: float):
+        cutoff = now - settings.CIRCUIT_WINDOW
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            if not self._outcomes.popleft()[1]:
+                self._failures -= 1
+
+    def error_rate(self) -> float:
+        self._prune(time.monotonic())
+        return self._failures / len(self._outcomes) if self._outcomes else 0.0
+
+    def _transition(self, state: str, reason: str):
+        print(f"Circuit breaker {self.name}: {self.state} -> {state} ({reason})")
+        self.transitions.append({"at": time.time(), "from": self.state, "to": state, "reason": reason})
+        self.state = state
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+            self.opened += 1
+        elif state == HALF_OPEN:
+            self.probes_in_flight = 0
+            self.probe_successes = 0
+        else:
+            self._outcomes.clear()
+            self._failures = 0
+
+    def before_request(self) -> bool:
+        """Raise CircuitOpen unless a request may be sent; returns True for a half-open probe"""
+        if self.state == OPEN:
+            remaining = self.opened_at + settings.CIRCUIT_OPEN_SECONDS - time.monotonic()
+            if remaining > 0:
+                self.rejected += 1
+                raise CircuitOpen(f"Circuit for {self.name} is open for another {remaining:.1f}s")
+            self._transition(HALF_OPEN, "open period elapsed")
+
+        if self.state == HALF_OPEN:
+            if self.probes_in_flight >= settings.CIRCUIT_HALF_OPEN_PROBES:
+                self.rejected += 1
+                raise CircuitOpen(f"Circuit for {self.name} is half-open and its trial requests are in flight")
+            self.probes_in_flight += 1
+            return True
+        return False
+
+    def on_result(self, success: bool, probe: bool):
+        if probe:
+            self.probes_in_flight -= 1
+            if self.state != HALF_OPEN:
+                return
+            if not success:
+                self._transition(OPEN, "trial request failed")
+            else:
+                self.probe_successes += 1
+                if self.probe_successes >= settings.CIRCUIT_HALF_OPEN_PROBES:
+                    self._transition(CLOSED, f"{self.probe_successes} trial requests succeeded")
+            return
+
+        now = time.monotonic()
+        self._outcomes.append((now, success))
+        if not success:
+            self._failures += 1
+        self._prune(now)
+
+        requests = len(self._outcomes)
+        if self.state == CLOSED and requests >= settings.CIRCUIT_MIN_REQUESTS:
+            error_rate = self._failures / requests
+            if error_rate >= settings.CIRCUIT_ERROR_THRESHOLD:
+                self._transition(OPEN, f"error rate {error_rate:.0%} over {requests} requests")
+
+    def on_abandoned(self, probe: bool):
+        """A request ended without an outcome (e.g. cancelled); free its probe slot"""
+        if probe:
+            self.probes_in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "error_rate": self.error_rate(),
+            "window_requests": len(self._outcomes),
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "retry_in": max(self.opened_at + settings.CIRCUIT_OPEN_SECONDS - time.monotonic(), 0.0) if self.state == OPEN else 0.0,
+            "transitions": list(self.transitions)
+        }
+
+
+class CircuitBreakers:
+    """One breaker per upstream host, created on first use"""
+
+    def __init__(self):
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def for_host(self, host: str) -> CircuitBreaker:
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            breaker = self.breakers[host] = CircuitBreaker(host)
+        return breaker
+
+    def stats(self) -> Dict[str, Any]:
+        return {host: breaker.stats() for host, breaker in self.breakers.items()}
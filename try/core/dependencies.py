@@ -0,0 +1,63 @@
+from fastapi import HTTPException
+from starlette.requests import HTTPConnection
+
+from core.http_client import HttpClient
+from core.executor import BoundedExecutor
+from core.loop_watchdog import LoopWatchdog
+from core.metrics import RequestMetrics
+from core.profiler import Profiler
+from core.admin_auth import admin_enabled, admin_token_valid
+from core.quote_hub import QuoteHub
+from core.quote_resolver import QuoteResolver
+from services.yahoo_finance_service import YahooFinanceService
+from services.polygon_service import PolygonService
+from services.sec_service import SECService
+from services.prefetch_scheduler import PrefetchScheduler
+from portfolio.portfolio_manager import PortfolioManager
+
+# Shared instances are created once in the app lifespan (see main.py) and
+# stored on app.state; routes receive them through these dependencies.
+# HTTPConnection lets the same providers serve HTTP and WebSocket routes.
+
+def get_http_client(connection: HTTPConnection) -> HttpClient:
+    return connection.app.state.http_client
+
+def get_executor(connection: HTTPConnection) -> BoundedExecutor:
+    return connection.app.state.executor
+
+def get_loop_watchdog(connection: HTTPConnection) -> LoopWatchdog:
+    return connection.app.state.loop_watchdog
+
+def get_request_metrics(connection: HTTPConnection) -> RequestMetrics:
+    return connection.app.state.request_metrics
+
+def get_profiler(connection: HTTPConnection) -> Profiler:
+    return connection.app.state.profiler
+
+def require_admin(connection: HTTPConnection):
+    """Hide profiling endpoints while ADMIN_TOKEN is unset and reject requests without a valid X-Admin-Token"""
+    if not admin_enabled():
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not admin_token_valid(connection.headers.get("x-admin-token")):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+def get_yahoo_service(connection: HTTPConnection) -> YahooFinanceService:
+    return connection.app.state.yahoo_service
+
+def get_polygon_service(connection: HTTPConnection) -> PolygonService:
+    return connection.app.state.polygon_service
+
+def get_sec_service(connection: HTTPConnection) -> SECService:
+    return connection.app.state.sec_service
+
+def get_portfolio_manager(connection: HTTPConnection) -> PortfolioManager:
+    return connection.app.state.portfolio_manager
+
+def get_quote_resolver(connection: HTTPConnection) -> QuoteResolver:
+    return connection.app.state.quote_resolver
+
+def get_quote_hub(connection: HTTPConnection) -> QuoteHub:
+    return connection.app.state.quote_hub
+
+def get_prefetch_scheduler(connection: HTTPConnection) -> PrefetchScheduler:
+    return connection.app.state.prefetch_scheduler
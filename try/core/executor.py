@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from core import profiler
+from config import settings
+
+
+class ExecutorBusy(Exception):
+    """Raised when the executor queue is full, instead of queueing more blocking work"""
+
+
+class BoundedExecutor:
+    """Shared thread pool for blocking library work (yfinance, pandas, plotly).
+
+    At most `max_workers` calls run at once and at most `max_queue` more may
+    wait; beyond that run() raises ExecutorBusy. A call that exceeds its
+    timeout raises asyncio.TimeoutError for the caller, though the worker
+    thread can only be reclaimed once the call returns.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = settings.BLOCKING_EXECUTOR_WORKERS,
+        max_queue: int = settings.BLOCKING_EXECUTOR_MAX_QUEUE,
+        timeout: float = settings.BLOCKING_EXECUTOR_TIMEOUT,
+        name: str = "blocking"
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.total_queue_wait = 0.0
+        self.total_run_time = 0.0
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        if self.pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise ExecutorBusy(f"{self.pending} blocking calls already pending")
+
+        submitted = time.perf_counter()
+        started = None
+
+        def call():
+            nonlocal started
+            started = time.perf_counter()
+            with self._lock:
+                self.running += 1
+                self.total_queue_wait += started - submitted
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    self.total_run_time += time.perf_counter() - started
+
+        self.pending += 1
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self._pool, call)
+            return await asyncio.wait_for(future, self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.pending -= 1
+            if started is not None:
+                profiler.record(
+                    "executor", getattr(func, "__name__", "call"), submitted, time.perf_counter() - submitted,
+                    queue_wait_ms=(started - submitted) * 1000
+                )
+
+    @property
+    def queue_depth(self) -> int:
+        return max(self.pending - self.running, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "avg_queue_wait_ms": self.total_queue_wait / self.completed * 1000 if self.completed else 0.0,
+            "avg_run_ms": self.total_run_time / self.completed * 1000 if self.completed else 0.0
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
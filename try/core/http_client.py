@@ -1,12 +1,196 @@
 import httpx
 import asyncio
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, Tuple
+from core.rate_limiter import RateLimiter, RateLimitExceeded, parse_retry_after
+from core.circuit_breaker import CircuitBreakers, CircuitOpen
+from core.metrics import Counter, Histogram
+from core import profiler
 from config import settings
 
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# First trace event that shows a request got a connection from the pool
+_ACQUIRED_EVENTS = {
+    "connection.connect_tcp.started",
+    "http11.send_request_headers.started",
+    "http2.send_request_headers.started"
+}
+
+class PoolWaitStats:
+    """Time spent waiting for a free pooled connection for one host"""
+
+    def __init__(self):
+        self.requests = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float):
+        self.requests += 1
+        self.total_wait += wait
+        if wait > self.max_wait:
+            self.max_wait = wait
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "avg_wait_ms": self.total_wait / self.requests * 1000 if self.requests else 0.0,
+            "max_wait_ms": self.max_wait * 1000
+        }
+
+class RedirectTransport(httpx.AsyncBaseTransport):
+    """Sends every request to one origin, keeping the original Host header and path.
+
+    Used to point the real upstream hosts at a local stub server (see
+    benchmarks/) while per-host pools, rate limits and breakers stay keyed
+    by the real host names.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, origin: str):
+        self.transport = transport
+        self.origin = httpx.URL(origin)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.url = request.url.copy_with(scheme=self.origin.scheme, host=self.origin.host, port=self.origin.port)
+        return await self.transport.handle_async_request(request)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
 class HttpClient:
+    """Process-wide HTTP client with a tuned connection pool per upstream host"""
+
     def __init__(self):
-        self.client = httpx.AsyncClient(timeout=settings.REQUEST_TIMEOUT)
         self.retry_delay = settings.DEFAULT_RETRY_DELAY
+        self.http2_enabled = settings.HTTP2_ENABLED and HTTP2_AVAILABLE
+        if settings.HTTP2_ENABLED and not HTTP2_AVAILABLE:
+            print("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+
+        self.transports: Dict[str, httpx.AsyncHTTPTransport] = {}
+        for host, max_connections in settings.HTTP_HOST_LIMITS.items():
+            self.transports[host] = httpx.AsyncHTTPTransport(
+                limits=self._limits(max_connections),
+                http2=self.http2_enabled and host in settings.HTTP2_HOSTS
+            )
+        self.default_transport = httpx.AsyncHTTPTransport(limits=self._limits(settings.HTTP_MAX_CONNECTIONS))
+
+        route = lambda transport: transport
+        if settings.UPSTREAM_OVERRIDE_URL:
+            print(f"Sending all upstream requests to {settings.UPSTREAM_OVERRIDE_URL}")
+            route = lambda transport: RedirectTransport(transport, settings.UPSTREAM_OVERRIDE_URL)
+
+        self.client = httpx.AsyncClient(
+            timeout=settings.REQUEST_TIMEOUT,
+            transport=route(self.default_transport),
+            mounts={f"all://{host}": route(transport) for host, transport in self.transports.items()}
+        )
+        self.wait_stats: Dict[str, PoolWaitStats] = {}
+        self.rate_limiter = RateLimiter()
+        self.circuit_breakers = CircuitBreakers()
+
+        self.upstream_latency = Histogram(
+            "upstream_request_duration_seconds",
+            "Upstream request latency by host and status, including rate limit waits",
+            ("host", "status")
+        )
+        self.upstream_retries = Counter("upstream_retries_total", "Retried upstream requests by host", ("host",))
+        self.upstream_throttled = Counter("upstream_throttled_total", "429 responses from upstream by host", ("host",))
+        self.upstream_failures = Counter(
+            "upstream_failures_total", "Upstream requests that failed after all retries by host", ("host",)
+        )
+
+    @staticmethod
+    def _limits(max_connections: int) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=min(max_connections, settings.HTTP_MAX_KEEPALIVE_CONNECTIONS),
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        )
+
+    async def _get(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None
+    ) -> httpx.Response:
+        """GET through the host's circuit breaker, rate limit bucket and connection pool.
+
+        Raises CircuitOpen without touching the network while the host's
+        breaker is open. Records how long the request waited for a pooled
+        connection and feeds 429s and successes back into the bucket's
+        adaptive rate; transport errors and 5xx responses count against the
+        breaker.
+        """
+        host = httpx.URL(url).host
+        breaker = self.circuit_breakers.for_host(host)
+        probe = breaker.before_request()
+        started = time.perf_counter()
+        try:
+            response = await self._send(host, url, headers, params)
+        except httpx.RequestError as e:
+            breaker.on_result(False, probe)
+            elapsed = time.perf_counter() - started
+            self.upstream_latency.observe(elapsed, (host, "error"))
+            profiler.record("upstream", host, started, elapsed, path=httpx.URL(url).path, error=type(e).__name__)
+            raise
+        except BaseException:
+            breaker.on_abandoned(probe)
+            raise
+        breaker.on_result(response.status_code < 500, probe)
+        elapsed = time.perf_counter() - started
+        self.upstream_latency.observe(elapsed, (host, str(response.status_code)))
+        profiler.record("upstream", host, started, elapsed, path=response.request.url.path, status=response.status_code)
+        return response
+
+    async def _send(
+        self,
+        host: str,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        params: Optional[Dict[str, Any]]
+    ) -> httpx.Response:
+        bucket = self.rate_limiter.for_host(host)
+        if bucket:
+            queued = time.perf_counter()
+            await bucket.acquire(max_wait=settings.RATE_LIMIT_MAX_WAIT)
+            waited = time.perf_counter() - queued
+            if waited > 0.001:
+                profiler.record("rate_limit_wait", host, queued, waited)
+
+        started = time.perf_counter()
+        acquired = False
+
+        async def trace(event_name: str, info: Dict[str, Any]):
+            nonlocal acquired
+            if not acquired and event_name in _ACQUIRED_EVENTS:
+                acquired = True
+                stats = self.wait_stats.get(host)
+                if stats is None:
+                    stats = self.wait_stats[host] = PoolWaitStats()
+                wait = time.perf_counter() - started
+                stats.record(wait)
+                if wait > 0.001:
+                    profiler.record("pool_wait", host, started, wait)
+
+        response = await self.client.get(url, headers=headers, params=params, extensions={"trace": trace})
+        if response.status_code == 429:
+            self.upstream_throttled.inc((host,))
+        if bucket:
+            if response.status_code == 429:
+                bucket.on_throttled(parse_retry_after(response.headers.get("Retry-After")))
+            elif response.status_code < 400:
+                bucket.on_success()
+        return response
+
+    @staticmethod
+    async def _retry_sleep(host: str, delay: float):
+        started = time.perf_counter()
+        await asyncio.sleep(delay)
+        profiler.record("retry_sleep", host, started, time.perf_counter() - started)
 
     async def make_request(
         self, 
@@ -17,32 +201,107 @@ class HttpClient:
     ) -> Optional[Dict[str, Any]]:
         """Make HTTP request with retry logic and exponential backoff"""
         last_exception = None
+        # The request URL may be rewritten to UPSTREAM_OVERRIDE_URL; key everything on the real host
+        host = httpx.URL(url).host
         
         for attempt in range(retries):
             try:
-                response = await self.client.get(url, headers=headers, params=params)
+                response = await self._get(url, headers=headers, params=params)
                 response.raise_for_status()
                 return response.json()
                 
             except httpx.HTTPStatusError as e:
                 if e.response.status_code == 429 and attempt < retries - 1:
-                    # Rate limited - exponential backoff
-                    await asyncio.sleep(self.retry_delay * (2 ** attempt))
+                    self.upstream_retries.inc((host,))
+                    # Rate limited hosts with a bucket wait in its queue on the next
+                    # attempt; others honour Retry-After or back off exponentially
+                    if not self.rate_limiter.for_host(host):
+                        retry_after = parse_retry_after(e.response.headers.get("Retry-After"))
+                        await self._retry_sleep(host, retry_after or self.retry_delay * (2 ** attempt))
                     continue
                 last_exception = e
                 break
+
+            except (RateLimitExceeded, CircuitOpen) as e:
+                last_exception = e
+                break
                 
             except httpx.RequestError as e:
                 last_exception = e
                 if attempt < retries - 1:
-                    await asyncio.sleep(self.retry_delay * (attempt + 1))
+                    self.upstream_retries.inc((host,))
+                    await self._retry_sleep(host, self.retry_delay * (attempt + 1))
                     continue
                 break
 
         if last_exception:
+            self.upstream_failures.inc((host,))
+        # Open circuits are logged once per state change by the breaker, not per request
+        if last_exception and not isinstance(last_exception, CircuitOpen):
             print(f"Failed to fetch {url} after {retries} attempts: {last_exception}")
             
         return None
 
+    async def make_conditional_request(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> Tuple[int, Optional[Dict[str, Any]], Dict[str, str]]:
+        """Make a conditional GET using ETag/Last-Modified validators.
+
+        Returns (status_code, json_body, validators). The body is None for a
+        304 Not Modified and the status code is 0 when the request failed.
+        """
+        request_headers = dict(headers or {})
+        if etag:
+            request_headers["If-None-Match"] = etag
+        if last_modified:
+            request_headers["If-Modified-Since"] = last_modified
+
+        try:
+            response = await self._get(url, headers=request_headers)
+            validators = {
+                key: response.headers[header]
+                for key, header in (("etag", "ETag"), ("last_modified", "Last-Modified"))
+                if header in response.headers
+            }
+            if response.status_code == 304:
+                return 304, None, validators
+
+            response.raise_for_status()
+            return response.status_code, response.json(), validators
+        except CircuitOpen:
+            return 0, None, {}
+        except (httpx.HTTPError, ValueError, RateLimitExceeded) as e:
+            print(f"Failed conditional fetch of {url}: {e}")
+            return 0, None, {}
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Active/idle connections, queued requests and acquire wait time per host"""
+        pools = dict(self.transports)
+        pools["default"] = self.default_transport
+
+        stats = {}
+        for host, transport in pools.items():
+            pool = getattr(transport, "_pool", None)
+            connections = getattr(pool, "connections", [])
+            pending = getattr(pool, "_requests", [])
+            stats[host] = {
+                "connections": len(connections),
+                "active": sum(1 for c in connections if not c.is_idle() and not c.is_closed()),
+                "idle": sum(1 for c in connections if c.is_idle()),
+                "http2": sum(1 for c in connections if c.info().startswith("HTTP/2")) if self.http2_enabled else 0,
+                "queued_requests": sum(1 for r in pending if r.is_queued()),
+                "wait": self.wait_stats.get(host, PoolWaitStats()).to_dict()
+            }
+
+        # Hosts without a dedicated pool share the default transport
+        for host, wait in self.wait_stats.items():
+            if host not in self.transports:
+                stats["default"].setdefault("hosts", {})[host] = wait.to_dict()
+        return stats
+
     async def close(self):
         await self.client.aclose()
@@ -0,0 +1,85 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, Optional
+from config import settings
+
+
+class LoopWatchdog:
+    """Reports callbacks that hold the event loop longer than a threshold.
+
+    A heartbeat task on the loop records when it last ran and how late it
+    woke up (loop lag). A monitor thread checks the heartbeat; when it is
+    older than the threshold the loop is blocked, and the loop thread's
+    current stack is logged once per stall so the offending callback can
+    be found.
+    """
+
+    def __init__(self, threshold: float = settings.LOOP_BLOCK_THRESHOLD):
+        self.threshold = threshold
+        self.interval = threshold / 2
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.stalls = 0
+        self.longest_stall = 0.0
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._monitor, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def close(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.lag = max(now - expected, 0.0)
+            if self.lag > self.max_lag:
+                self.max_lag = self.lag
+            self._last_beat = now
+
+    def _monitor(self):
+        stalled_since: Optional[float] = None
+        while not self._stop.wait(self.interval):
+            beat = self._last_beat
+            blocked = time.monotonic() - beat
+            if blocked <= self.threshold + self.interval:
+                if stalled_since is not None:
+                    # The stall ended; record how long the loop was held
+                    self.longest_stall = max(self.longest_stall, beat - stalled_since)
+                    stalled_since = None
+                continue
+            if stalled_since is None:
+                stalled_since = beat
+                self.stalls += 1
+                frame = sys._current_frames().get(self._loop_thread_id)
+                stack = "".join(traceback.format_stack(frame, limit=8)) if frame else "  (no stack)\n"
+                print(f"Event loop blocked for more than {blocked * 1000:.0f}ms in:\n{stack}", end="")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "lag_ms": self.lag * 1000,
+            "max_lag_ms": self.max_lag * 1000,
+            "stalls": self.stalls,
+            "longest_stall_ms": self.longest_stall * 1000
+        }
@@ -0,0 +1,214 @@
+import itertools
+import random
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional
+from core.admin_auth import admin_token_valid
+from config import settings
+
+_current: ContextVar[Optional["RequestTrace"]] = ContextVar("request_trace", default=None)
+_ids = itertools.count(1)
+
+
+class RequestTrace:
+    """Timeline of one request: awaited upstream calls, executor jobs, retry sleeps and CPU sections"""
+
+    __slots__ = ("id", "method", "path", "route", "reason", "status", "started", "started_at", "duration", "spans", "dropped", "closed")
+
+    def __init__(self, method: str, path: str, reason: str):
+        self.id = f"{int(time.time()):x}-{next(_ids)}"
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.reason = reason
+        self.status: Optional[int] = None
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.duration: Optional[float] = None
+        self.spans: List[tuple] = []
+        self.dropped = 0
+        self.closed = False
+
+    def add(self, kind: str, name: str, started: float, duration: float, detail: Optional[Dict[str, Any]]):
+        # Background tasks started during the request inherit its context; ignore them once it ends
+        if self.closed:
+            return
+        if len(self.spans) >= settings.PROFILE_MAX_SPANS:
+            self.dropped += 1
+            return
+        self.spans.append((kind, name, started - self.started, duration, detail))
+
+    def summary(self) -> Dict[str, float]:
+        """Total milliseconds per span kind (spans of one kind may overlap when run concurrently)"""
+        totals: Dict[str, float] = {}
+        for kind, _, _, duration, _ in self.spans:
+            totals[kind] = totals.get(kind, 0.0) + duration * 1000
+        return totals
+
+    def server_timing(self) -> str:
+        """Server-Timing header value with the per-kind totals so far"""
+        elapsed = (time.perf_counter() - self.started) * 1000
+        parts = [f"{kind};dur={total:.1f}" for kind, total in self.summary().items()]
+        return ", ".join(parts + [f"app;dur={elapsed:.1f}"])
+
+    def to_dict(self, spans: bool = True) -> Dict[str, Any]:
+        result = {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "reason": self.reason,
+            "started_at": self.started_at,
+            "duration_ms": self.duration * 1000 if self.duration is not None else None,
+            "summary": self.summary()
+        }
+        if spans:
+            result["spans"] = [
+                {"kind": kind, "name": name, "start_ms": start * 1000, "duration_ms": duration * 1000, **(detail or {})}
+                for kind, name, start, duration, detail in self.spans
+            ]
+            result["dropped_spans"] = self.dropped
+        return result
+
+
+def record(kind: str, name: str, started: float, duration: float, **detail):
+    """Add a span to the current request's trace, if it is being profiled.
+
+    `started` is a time.perf_counter() value. Costs one context variable
+    lookup when the request is not profiled.
+    """
+    trace = _current.get()
+    if trace is not None:
+        trace.add(kind, name, started, duration, detail or None)
+
+
+class section:
+    """Context manager timing a CPU-bound section of the current request's work"""
+
+    __slots__ = ("name", "trace", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.trace = _current.get()
+        if self.trace is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.trace is not None:
+            self.trace.add("cpu", self.name, self.started, time.perf_counter() - self.started, None)
+        return False
+
+
+class Profiler:
+    """Decides which requests to trace and keeps slow and explicitly profiled traces.
+
+    Requests are traced when an admin asks with ?profile=1 or when picked by
+    PROFILE_SAMPLE_RATE. Any request slower than PROFILE_SLOW_THRESHOLD goes
+    into a bounded ring buffer; untraced slow requests are kept without spans
+    so they still show up.
+    """
+
+    def __init__(self):
+        self.slow: Deque[RequestTrace] = deque(maxlen=settings.PROFILE_SLOW_BUFFER)
+        self.recent: "OrderedDict[str, RequestTrace]" = OrderedDict()
+        self.explicit = 0
+        self.sampled = 0
+        self.slow_requests = 0
+
+    def start(self, method: str, path: str, explicit: bool) -> Optional[RequestTrace]:
+        if explicit:
+            self.explicit += 1
+            return RequestTrace(method, path, "explicit")
+        if settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE:
+            self.sampled += 1
+            return RequestTrace(method, path, "sampled")
+        return None
+
+    def finish(self, trace: RequestTrace):
+        trace.closed = True
+        if trace.reason == "explicit":
+            self.recent[trace.id] = trace
+            while len(self.recent) > settings.PROFILE_RECENT_BUFFER:
+                self.recent.popitem(last=False)
+        if trace.duration >= settings.PROFILE_SLOW_THRESHOLD:
+            self.slow_requests += 1
+            self.slow.append(trace)
+
+    def get(self, trace_id: str) -> Optional[RequestTrace]:
+        trace = self.recent.get(trace_id)
+        if trace is None:
+            trace = next((trace for trace in self.slow if trace.id == trace_id), None)
+        return trace
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sample_rate": settings.PROFILE_SAMPLE_RATE,
+            "slow_threshold_ms": settings.PROFILE_SLOW_THRESHOLD * 1000,
+            "explicit": self.explicit,
+            "sampled": self.sampled,
+            "slow_requests": self.slow_requests,
+            "slow_buffered": len(self.slow),
+            "recent_profiles": len(self.recent)
+        }
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware that traces selected requests and captures slow ones.
+
+    ?profile=1 is honoured only with a valid X-Admin-Token header; profiled responses carry X-Trace-Id and a
+    Server-Timing header summarising the timeline.
+    """
+
+    def __init__(self, app, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    @staticmethod
+    def _wants_profile(scope) -> bool:
+        query = scope["query_string"]
+        if b"profile=1" not in query or b"profile=1" not in query.split(b"&"):
+            return False
+        token = next((value.decode() for key, value in scope["headers"] if key == b"x-admin-token"), None)
+        return admin_token_valid(token)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = self.profiler.start(scope["method"], scope["path"], self._wants_profile(scope))
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if trace is not None:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-trace-id", trace.id.encode()))
+                    headers.append((b"server-timing", trace.server_timing().encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        token = _current.set(trace) if trace is not None else None
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if token is not None:
+                _current.reset(token)
+            duration = time.perf_counter() - started
+            if trace is None and duration >= settings.PROFILE_SLOW_THRESHOLD:
+                trace = RequestTrace(scope["method"], scope["path"], "untraced")
+                trace.started_at -= duration
+            if trace is not None:
+                route = scope.get("route")
+                trace.route = route.path if route is not None else None
+                trace.status = status
+                trace.duration = duration
+                self.profiler.finish(trace)
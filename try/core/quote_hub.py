@@ -0,0 +1,126 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from models.stock_models import StockQuote
+
+
+class QuoteSubscriber:
+    """A single streaming client; receives updates for all of its symbols on one queue"""
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.symbols: Set[str] = set()
+        self.dropped = 0
+
+    def push(self, message: Dict[str, Any]):
+        # Slow consumers lose their oldest pending update rather than blocking the hub
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+
+class QuoteHub:
+    """Runs one refresh loop per subscribed symbol and fans quotes out to subscribers.
+
+    Loops are reference counted by subscriber: the first subscription to a
+    symbol starts its loop and the last unsubscription cancels it. Updates
+    are only published when the price changes.
+    """
+
+    def __init__(
+        self,
+        fetch_quote: Callable[[str], Awaitable[Optional[StockQuote]]],
+        interval: float,
+        queue_size: int = 32
+    ):
+        self.fetch_quote = fetch_quote
+        self.interval = interval
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[QuoteSubscriber]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._last_quotes: Dict[str, StockQuote] = {}
+        self.published = 0
+        self.upstream_polls = 0
+
+    def connect(self) -> QuoteSubscriber:
+        return QuoteSubscriber(self.queue_size)
+
+    def disconnect(self, subscriber: QuoteSubscriber):
+        for symbol in list(subscriber.symbols):
+            self.unsubscribe(subscriber, symbol)
+
+    def subscribe(self, subscriber: QuoteSubscriber, symbol: str):
+        symbol = symbol.upper()
+        if symbol in subscriber.symbols:
+            return
+
+        subscriber.symbols.add(symbol)
+        self._subscribers.setdefault(symbol, set()).add(subscriber)
+
+        # Late joiners get the last known price straight away
+        last_quote = self._last_quotes.get(symbol)
+        if last_quote:
+            subscriber.push(self._message(last_quote))
+
+        if symbol not in self._tasks:
+            self._tasks[symbol] = asyncio.create_task(self._poll(symbol))
+
+    def unsubscribe(self, subscriber: QuoteSubscriber, symbol: str):
+        symbol = symbol.upper()
+        subscriber.symbols.discard(symbol)
+
+        subscribers = self._subscribers.get(symbol)
+        if subscribers is None:
+            return
+
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self._subscribers[symbol]
+            self._last_quotes.pop(symbol, None)
+            task = self._tasks.pop(symbol, None)
+            if task:
+                task.cancel()
+
+    async def _poll(self, symbol: str):
+        while True:
+            try:
+                self.upstream_polls += 1
+                quote = await self.fetch_quote(symbol)
+                if quote:
+                    last_quote = self._last_quotes.get(symbol)
+                    if last_quote is None or last_quote.price != quote.price:
+                        self._last_quotes[symbol] = quote
+                        self._publish(symbol, quote)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Quote stream refresh error for {symbol}: {e}")
+
+            await asyncio.sleep(self.interval)
+
+    def _publish(self, symbol: str, quote: StockQuote):
+        message = self._message(quote)
+        for subscriber in self._subscribers.get(symbol, ()):
+            subscriber.push(message)
+            self.published += 1
+
+    @staticmethod
+    def _message(quote: StockQuote) -> Dict[str, Any]:
+        return {"type": "quote", "data": quote.model_dump()}
+
+    async def close(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._subscribers.clear()
+        self._last_quotes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "symbols": len(self._tasks),
+            "subscriptions": sum(len(s) for s in self._subscribers.values()),
+            "published": self.published,
+            "upstream_polls": self.upstream_polls
+        }
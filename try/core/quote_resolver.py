@@ -0,0 +1,223 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+import numpy as np
+from core.cache import TTLCache
+from models.stock_models import StockQuote
+from config import settings
+
+QuoteFetcher = Callable[[str], Awaitable[Optional[StockQuote]]]
+
+OK, ERROR, CANCELLED = "ok", "error", "cancelled"
+
+
+class ProviderHealth:
+    """Rolling latency and outcome samples for one quote provider.
+
+    Samples expire after `window` seconds so a provider that recovers is
+    tried again. Cancelled (lost hedge) calls count as latency samples of at
+    least their elapsed time, but not as errors.
+    """
+
+    def __init__(self, name: str, window: float, max_samples: int):
+        self.name = name
+        self.window = window
+        self._samples: Deque[Tuple[float, float, str]] = deque(maxlen=max_samples)
+        self.calls = 0
+        self.errors = 0
+        self.primary = 0
+        self.hedges = 0
+        self.fallbacks = 0
+        self.wins = 0
+        self.cancelled = 0
+
+    def record(self, latency: float, outcome: str):
+        self._samples.append((time.monotonic(), latency, outcome))
+        self.calls += 1
+        if outcome == ERROR:
+            self.errors += 1
+        elif outcome == CANCELLED:
+            self.cancelled += 1
+
+    def _recent(self) -> List[Tuple[float, float, str]]:
+        cutoff = time.monotonic() - self.window
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        return list(self._samples)
+
+    def latency(self, percentile: float) -> Optional[float]:
+        latencies = [latency for _, latency, outcome in self._recent() if outcome != ERROR]
+        if len(latencies) < settings.QUOTE_HEALTH_MIN_SAMPLES:
+            return None
+        return float(np.percentile(latencies, percentile))
+
+    def error_rate(self) -> Optional[float]:
+        outcomes = [outcome for _, _, outcome in self._recent() if outcome != CANCELLED]
+        if len(outcomes) < settings.QUOTE_HEALTH_MIN_SAMPLES:
+            return None
+        return outcomes.count(ERROR) / len(outcomes)
+
+    def score(self) -> float:
+        """Expected seconds to a good answer, lower is better.
+
+        Until there are enough samples the default hedge delay stands in for
+        the p95, so a healthy provider stays ahead of an unknown one and a
+        slow or failing one drops behind it.
+        """
+        p95 = self.latency(95)
+        error_rate = self.error_rate()
+        return (settings.QUOTE_HEDGE_DEFAULT_DELAY if p95 is None else p95) + (error_rate or 0.0) * settings.QUOTE_ERROR_PENALTY
+
+    def hedge_delay(self) -> float:
+        """How long to wait on this provider before asking the next one"""
+        p95 = self.latency(95)
+        if p95 is None:
+            return settings.QUOTE_HEDGE_DEFAULT_DELAY
+        return min(max(p95, settings.QUOTE_HEDGE_MIN_DELAY), settings.QUOTE_HEDGE_MAX_DELAY)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "score": self.score(),
+            "samples": len(self._recent()),
+            "p50": self.latency(50),
+            "p95": self.latency(95),
+            "error_rate": self.error_rate(),
+            "hedge_delay": self.hedge_delay(),
+            "calls": self.calls,
+            "errors": self.errors,
+            "primary": self.primary,
+            "hedges": self.hedges,
+            "fallbacks": self.fallbacks,
+            "wins": self.wins,
+            "cancelled": self.cancelled
+        }
+
+
+class QuoteResolver:
+    """Resolves a quote from several providers with hedged requests.
+
+    Providers are tried in order of health score (configured order breaks
+    ties). If the primary has not answered within its own p95 latency, the
+    next provider is asked as well and the first good answer wins; the
+    other call is cancelled. A provider that fails outright hands over to
+    the next one immediately.
+
+    Fallbacks (incomplete quotes or a small request budget) are never
+    hedged to; they are asked in configured order only once every provider
+    has failed, so they cannot beat a slower full quote. Results go into the
+    shared quote cache that batch lookups and prefetching also fill.
+    """
+
+    def __init__(self, providers: Dict[str, QuoteFetcher], cache: TTLCache, fallbacks: Optional[Dict[str, QuoteFetcher]] = None):
+        self.providers = providers
+        self.fallback_providers = fallbacks or {}
+        self.health = {
+            name: ProviderHealth(name, settings.QUOTE_HEALTH_WINDOW, settings.QUOTE_HEALTH_MAX_SAMPLES)
+            for name in [*providers, *self.fallback_providers]
+        }
+        self.cache = cache
+        self.decisions: Deque[Dict[str, Any]] = deque(maxlen=settings.QUOTE_ROUTING_HISTORY)
+        self.resolved = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.fallbacks = 0
+        self.not_found = 0
+        self.timeouts = 0
+
+    async def get_quote(self, ticker: str) -> Optional[StockQuote]:
+        """Get a quote, served from cache when fresh; concurrent misses share one resolution"""
+        symbol = ticker.upper()
+        return await self.cache.get_or_load(symbol, lambda: self._resolve(symbol))
+
+    def ranked(self) -> List[str]:
+        order = list(self.providers)
+        return sorted(order, key=lambda name: (self.health[name].score(), order.index(name)))
+
+    async def _call(self, name: str, symbol: str) -> Optional[StockQuote]:
+        fetch = self.providers.get(name) or self.fallback_providers[name]
+        started = time.monotonic()
+        try:
+            quote = await fetch(symbol)
+        except asyncio.CancelledError:
+            self.health[name].record(time.monotonic() - started, CANCELLED)
+            raise
+        except Exception as e:
+            print(f"Quote provider {name} error for {symbol}: {e}")
+            quote = None
+        self.health[name].record(time.monotonic() - started, OK if quote is not None else ERROR)
+        return quote
+
+    async def _resolve(self, symbol: str) -> Optional[StockQuote]:
+        order = self.ranked() + list(self.fallback_providers)
+        hedgeable = len(self.providers)
+        started = time.monotonic()
+        deadline = started + settings.QUOTE_RESOLVE_TIMEOUT
+        pending: Dict[asyncio.Task, str] = {}
+        launched: List[str] = []
+        decision = {"symbol": symbol, "order": order, "hedged": False, "winner": None}
+
+        def launch():
+            name = order[len(launched)]
+            launched.append(name)
+            pending[asyncio.create_task(self._call(name, symbol))] = name
+            return name
+
+        self.health[launch()].primary += 1
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    return None
+
+                # Wait for the newest provider's hedge delay if there is anyone left to hedge to
+                wait = remaining
+                if len(launched) < hedgeable:
+                    wait = min(wait, self.health[launched[-1]].hedge_delay())
+                done, _ = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    if len(launched) < hedgeable:
+                        self.health[launch()].hedges += 1
+                        self.hedged += 1
+                        decision["hedged"] = True
+                    continue
+
+                for task in done:
+                    name = pending.pop(task)
+                    quote = task.result()
+                    if quote is not None:
+                        self.health[name].wins += 1
+                        self.resolved += 1
+                        if decision["hedged"] and name != order[0]:
+                            self.hedge_wins += 1
+                        decision["winner"] = name
+                        return quote
+
+                # Everything asked so far failed; move on without waiting for a hedge delay
+                if not pending and len(launched) < len(order):
+                    self.health[launch()].fallbacks += 1
+                    self.fallbacks += 1
+
+            self.not_found += 1
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+            decision["latency"] = time.monotonic() - started
+            self.decisions.append(decision)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "order": self.ranked(),
+            "fallback_providers": list(self.fallback_providers),
+            "providers": {name: health.stats() for name, health in self.health.items()},
+            "resolved": self.resolved,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "fallbacks": self.fallbacks,
+            "not_found": self.not_found,
+            "timeouts": self.timeouts,
+            "recent": list(self.decisions)
+        }
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from config import settings
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request would have to queue longer than RATE_LIMIT_MAX_WAIT"""
+
+
+class TokenBucket:
+    """Token bucket with a FIFO wait queue and AIMD rate adaptation.
+
+    Requests wait in arrival order (asyncio.Lock is fair) for a token. A 429
+    halves the effective rate and blocks the bucket for any Retry-After
+    period; each success then recovers a fraction of the configured rate.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float):
+        self.name = name
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+        self.waiting = 0
+        self.acquired = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def estimated_wait(self) -> float:
+        now = time.monotonic()
+        self._refill(now)
+        deficit = self.waiting + 1 - self.tokens
+        return max(self.blocked_until - now, 0.0) + max(deficit, 0.0) / self.rate
+
+    async def acquire(self, max_wait: Optional[float] = None):
+        if max_wait is not None and self.estimated_wait() > max_wait:
+            self.rejected += 1
+            raise RateLimitExceeded(f"Rate limit queue for {self.name} exceeds {max_wait}s")
+
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    delay = self.blocked_until - now
+                    if delay <= 0:
+                        if self.tokens >= 1:
+                            self.tokens -= 1
+                            break
+                        delay = (1 - self.tokens) / self.rate
+                    await asyncio.sleep(delay)
+        finally:
+            self.waiting -= 1
+
+        wait = time.monotonic() - started
+        self.acquired += 1
+        self.total_wait += wait
+        if wait > self.max_wait:
+            self.max_wait = wait
+
+    def on_success(self):
+        if self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * settings.RATE_LIMIT_RECOVERY)
+
+    def on_throttled(self, retry_after: Optional[float] = None):
+        self.throttled += 1
+        now = time.monotonic()
+        self._refill(now)
+        self.rate = max(self.base_rate * settings.RATE_LIMIT_MIN_FRACTION, self.rate * 0.5)
+        self.tokens = 0
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "base_rate": self.base_rate,
+            "rate": self.rate,
+            "tokens": self.tokens,
+            "queue_depth": self.waiting,
+            "acquired": self.acquired,
+            "rejected": self.rejected,
+            "throttled": self.throttled,
+            "avg_wait_ms": self.total_wait / self.acquired * 1000 if self.acquired else 0.0,
+            "max_wait_ms": self.max_wait * 1000,
+            "blocked_for": max(self.blocked_until - time.monotonic(), 0.0)
+        }
+
+
+class RateLimiter:
+    """Maps upstream hosts to the token bucket of the provider they belong to"""
+
+    def __init__(self, limits: Dict[str, Dict[str, Any]] = settings.RATE_LIMITS):
+        self.buckets: Dict[str, TokenBucket] = {}
+        self._by_host: Dict[str, TokenBucket] = {}
+        for name, limit in limits.items():
+            bucket = TokenBucket(name, float(limit["rate"]), float(limit["burst"]))
+            self.buckets[name] = bucket
+            for host in limit["hosts"]:
+                self._by_host[host] = bucket
+
+    def for_host(self, host: str) -> Optional[TokenBucket]:
+        return self._by_host.get(host)
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: bucket.stats() for name, bucket in self.buckets.items()}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
@@ -1,18 +1,90 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
-from routers import stock_router, portfolio_router
+from routers import stock_router, portfolio_router, admin_router, metrics_router
 from core.http_client import HttpClient
+from core.executor import BoundedExecutor
+from core.loop_watchdog import LoopWatchdog
+from core.metrics import RequestMetrics, MetricsMiddleware
+from core.profiler import Profiler, ProfilingMiddleware
+from core.admin_auth import admin_enabled
+from core.quote_hub import QuoteHub
+from core.quote_resolver import QuoteResolver
+from core.dependencies import get_portfolio_manager
 from services.yahoo_finance_service import YahooFinanceService
 from services.polygon_service import PolygonService
 from services.sec_service import SECService
+from services.prefetch_scheduler import PrefetchScheduler
 from portfolio.portfolio_manager import PortfolioManager
 from config import settings
 
-app = FastAPI(title="Stock Terminal API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print("Stock Terminal API starting up...")
+
+    # One HTTP client, service set and portfolio for the whole process
+    http_client = HttpClient()
+    executor = BoundedExecutor()
+    loop_watchdog = LoopWatchdog()
+    yahoo_service = YahooFinanceService(http_client, executor)
+    polygon_service = PolygonService(http_client)
+    sec_service = SECService(http_client)
+    portfolio_manager = PortfolioManager(yahoo_service, polygon_service)
+
+    # Single-quote lookups share Yahoo's quote cache; Polygon quotes lack change and
+    # previous close and its budget feeds NAV history, so it is only a last resort
+    quote_resolver = QuoteResolver(
+        {"yahoo": yahoo_service.fetch_stock_quote},
+        cache=yahoo_service.quote_cache,
+        fallbacks={"polygon": polygon_service.get_stock_quote}
+    )
+    quote_hub = QuoteHub(quote_resolver.get_quote, interval=settings.STREAM_REFRESH_INTERVAL)
+    prefetch_scheduler = PrefetchScheduler(http_client, yahoo_service, portfolio_manager)
+
+    app.state.http_client = http_client
+    app.state.executor = executor
+    app.state.loop_watchdog = loop_watchdog
+    app.state.yahoo_service = yahoo_service
+    app.state.polygon_service = polygon_service
+    app.state.sec_service = sec_service
+    app.state.portfolio_manager = portfolio_manager
+    app.state.quote_resolver = quote_resolver
+    app.state.quote_hub = quote_hub
+    app.state.prefetch_scheduler = prefetch_scheduler
+
+    if settings.LOOP_WATCHDOG_ENABLED:
+        loop_watchdog.start()
+    await portfolio_manager.open()
+    sec_service.ticker_index.start_background_refresh()
+    if settings.PREFETCH_ENABLED:
+        # Started after the portfolio store opens so held tickers are known
+        prefetch_scheduler.start()
+
+    yield
+
+    await prefetch_scheduler.close()
+    await quote_hub.close()
+    await portfolio_manager.close()
+    await sec_service.ticker_index.close()
+    await http_client.close()
+    await loop_watchdog.close()
+    executor.shutdown()
+    print("Stock Terminal API shutting down...")
+
+app = FastAPI(title="Stock Terminal API", version="1.0.0", lifespan=lifespan)
+
+# Request metrics and the profiler exist before the lifespan runs because middleware is built with the app
+app.state.request_metrics = RequestMetrics()
+app.state.profiler = Profiler()
+# Traces can only be read through the admin endpoints, so only profile when those are enabled
+if admin_enabled():
+    app.add_middleware(ProfilingMiddleware, profiler=app.state.profiler)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, metrics=app.state.request_metrics)
 
 # CORS middleware
 app.add_middleware(
@@ -23,16 +95,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services
-http_client = HttpClient()
-yahoo_service = YahooFinanceService(http_client)
-polygon_service = PolygonService(http_client)
-sec_service = SECService(http_client)
-portfolio_manager = PortfolioManager(yahoo_service, polygon_service)
-
 # Include routers
 app.include_router(stock_router.router)
 app.include_router(portfolio_router.router)
+app.include_router(admin_router.router)
+app.include_router(metrics_router.router)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -41,33 +108,20 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 async def read_root():
     return FileResponse("static/index.html")
 
-# Keep legacy endpoints for backward compatibility
-@app.get("/api/quote/{ticker}")
-async def get_quote(ticker: str):
-    """Legacy endpoint - redirects to new router"""
-    from routers.stock_router import get_stock_quote
-    return await get_stock_quote(ticker)
-
-@app.get("/api/stock/{ticker}")
-async def get_stock_info(ticker: str):
-    """Legacy endpoint - redirects to new router"""
-    from routers.stock_router import get_stock_info
-    return await get_stock_info(ticker)
-
-@app.get("/api/chart/{ticker}")
-async def get_chart_data(ticker: str, period: str = "1mo"):
-    """Legacy endpoint - redirects to new router"""
-    from routers.stock_router import get_chart_data
-    return await get_chart_data(ticker, period)
-
-@app.get("/api/portfolio")
-async def get_portfolio():
-    """Legacy endpoint - redirects to new router"""
-    from routers.portfolio_router import get_portfolio_summary
-    return await get_portfolio_summary()
+# Keep legacy endpoints for backward compatibility. They reuse the router
+# handlers directly so they share the same injected services.
+app.add_api_route("/api/quote/{ticker}", stock_router.get_stock_quote, methods=["GET"])
+app.add_api_route("/api/stock/{ticker}", stock_router.get_stock_info, methods=["GET"])
+app.add_api_route("/api/chart/{ticker}", stock_router.get_chart_data, methods=["GET"])
+app.add_api_route("/api/portfolio", portfolio_router.get_portfolio_summary, methods=["GET"])
 
 @app.post("/api/portfolio")
-async def add_to_portfolio(symbol: str, shares: int, price: float):
+async def add_to_portfolio(
+    symbol: str,
+    shares: int,
+    price: float,
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager)
+):
     """Legacy endpoint - redirects to new router"""
     from routers.portfolio_router import add_stock_to_portfolio
     from models.portfolio_models import StockPurchaseInfo
@@ -79,7 +133,7 @@ async def add_to_portfolio(symbol: str, shares: int, price: float):
         purchase_price=price,
         purchase_date=datetime.now()
     )
-    return await add_stock_to_portfolio(stock_info)
+    return await add_stock_to_portfolio(stock_info, portfolio_manager, settings.DEFAULT_PORTFOLIO)
 
 @app.get("/api/news")
 async def get_market_news():
@@ -129,14 +183,5 @@ async def get_market_news():
     ]
     return {"articles": news}
 
-@app.on_event("startup")
-async def startup_event():
-    print("Stock Terminal API starting up...")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    await http_client.close()
-    print("Stock Terminal API shutting down...")
-
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime
 
 class StockPurchaseInfo(BaseModel):
     ticker: str
@@ -12,7 +12,7 @@ class PortfolioStock(BaseModel):
     ticker: str
     shares: int
     purchase_price: float
-    purchase_date: datetime
+    purchase_date: date  # first lot's purchase day, serialized as YYYY-MM-DD
     current_price: Optional[float] = None
     current_value: Optional[float] = None
     change_percent: Optional[float] = None
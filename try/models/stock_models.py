@@ -10,6 +10,10 @@ class StockQuote(BaseModel):
     volume: int
     previousClose: float
 
+class BatchQuoteResponse(BaseModel):
+    quotes: Dict[str, StockQuote]
+    missing: List[str] = []
+
 class StockDetails(BaseModel):
     ticker: str
     company_name: Optional[str] = None
@@ -32,6 +36,7 @@ class StockInfoResponse(BaseModel):
     market_data: Optional[Dict[str, Any]] = None
     financial_metrics: Optional[Dict[str, Any]] = None
     recent_sec_filings: Optional[List[SECFiling]] = []
+    chart: Optional[Dict[str, Any]] = None
     chart_json: Optional[Dict[str, Any]] = None
 
 class StockInfo(StockQuote):
@@ -48,6 +53,7 @@ class StockInfo(StockQuote):
 
 class ChartData(BaseModel):
     date: str
+    timestamp: Optional[int] = None
     open: float
     high: float
     low: float
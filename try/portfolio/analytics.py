@@ -0,0 +1,142 @@
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from services.bar_store import BarSeries
+
+TRADING_DAYS = 252
+DAY = 86400
+
+
+def align_closes(series: Dict[str, BarSeries]) -> Tuple[np.ndarray, np.ndarray]:
+    """Place closes on the union of trading days (epoch day numbers) and forward-fill gaps.
+
+    Returns (days, prices) with one price column per series, in order;
+    rows before a series' first close stay NaN.
+    """
+    day_columns = [np.asarray(bars["t"]) // DAY for bars in series.values()]
+    days = np.unique(np.concatenate(day_columns)) if day_columns else np.empty(0, dtype=np.int64)
+
+    prices = np.full((len(days), len(day_columns)), np.nan)
+    for column, (bars, symbol_days) in enumerate(zip(series.values(), day_columns)):
+        prices[np.searchsorted(days, symbol_days), column] = bars["c"]
+
+    # Forward-fill each column from its last observed row
+    rows = np.where(np.isnan(prices), 0, np.arange(len(days))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return days, prices[rows, np.arange(len(day_columns))]
+
+
+class ReturnMatrix:
+    """Daily simple returns for many tickers aligned on one date axis.
+
+    Prices are placed on the union of all trading days and forward-filled
+    across days a ticker did not trade, so `returns` is a (days - 1) x tickers
+    matrix. Days before a ticker's first price are NaN and marked invalid.
+    """
+
+    def __init__(self, days: np.ndarray, symbols: List[str], returns: np.ndarray):
+        self.days = days
+        self.symbols = symbols
+        self.returns = returns
+        self.valid = ~np.isnan(returns)
+        self.filled = np.where(self.valid, returns, 0.0)
+
+    @classmethod
+    def from_bars(cls, series: Dict[str, BarSeries]) -> "ReturnMatrix":
+        days, prices = align_closes(series)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = prices[1:] / prices[:-1] - 1.0
+        return cls(days[1:], list(series), returns)
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+
+def _max_drawdown(returns: np.ndarray) -> np.ndarray:
+    """Largest peak-to-trough decline of cumulative returns, per column"""
+    wealth = np.cumprod(1.0 + returns, axis=0)
+    peaks = np.maximum.accumulate(np.maximum(wealth, 1.0), axis=0)
+    return -np.min(wealth / peaks - 1.0, axis=0, initial=0.0)
+
+
+def risk_metrics(
+    matrix: ReturnMatrix,
+    weights: np.ndarray,
+    portfolio_value: float,
+    benchmark: Optional[str] = None,
+    confidence_levels: tuple = (0.95, 0.99),
+    include_correlation: bool = True
+) -> Dict[str, Any]:
+    """Volatility, beta, VaR, drawdown and correlation from one pass over the return matrix.
+
+    `weights` are current position weights for the first len(weights)
+    columns of the matrix; any remaining column is the benchmark. The
+    portfolio is treated as held at constant weights over the window.
+    """
+    holdings = len(weights)
+    valid, filled = matrix.valid, matrix.filled
+
+    counts = valid.sum(axis=0)
+    means = filled.sum(axis=0) / np.maximum(counts, 1)
+    centered = np.where(valid, filled - means, 0.0)
+    sum_squares = np.einsum("ij,ij->j", centered, centered)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variances = sum_squares / (counts - 1)
+    volatility = np.sqrt(variances * TRADING_DAYS)
+    drawdowns = _max_drawdown(filled)
+
+    portfolio_returns = filled[:, :holdings] @ weights
+    portfolio_std = float(portfolio_returns.std(ddof=1)) if len(portfolio_returns) > 1 else 0.0
+    portfolio_mean = float(portfolio_returns.mean()) if len(portfolio_returns) else 0.0
+
+    betas = np.full(holdings, np.nan)
+    portfolio_beta = None
+    if benchmark is not None and benchmark in matrix.symbols:
+        column = matrix.symbols.index(benchmark)
+        benchmark_centered = centered[:, column]
+        if sum_squares[column] > 0:
+            covariance = benchmark_centered @ centered[:, :holdings]
+            betas = covariance / sum_squares[column]
+            portfolio_beta = float(((portfolio_returns - portfolio_mean) @ benchmark_centered) / sum_squares[column])
+
+    value_at_risk = {}
+    for level in confidence_levels:
+        historical = -float(np.percentile(portfolio_returns, (1 - level) * 100)) if len(portfolio_returns) else 0.0
+        parametric = -(portfolio_mean - NormalDist().inv_cdf(level) * portfolio_std)
+        value_at_risk[f"{int(level * 100)}"] = {
+            "historical": historical * portfolio_value,
+            "parametric": parametric * portfolio_value,
+            "historical_percent": historical * 100,
+            "parametric_percent": parametric * 100
+        }
+
+    result = {
+        "observations": len(matrix),
+        "start": str(np.datetime64(int(matrix.days[0]), "D")) if len(matrix) else None,
+        "end": str(np.datetime64(int(matrix.days[-1]), "D")) if len(matrix) else None,
+        "portfolio": {
+            "value": portfolio_value,
+            "volatility": portfolio_std * float(np.sqrt(TRADING_DAYS)),
+            "beta": portfolio_beta,
+            "max_drawdown": float(_max_drawdown(portfolio_returns[:, None])[0]) if len(portfolio_returns) else 0.0,
+            "value_at_risk": value_at_risk
+        },
+        "holdings": [
+            {
+                "symbol": symbol,
+                "weight": float(weights[i]),
+                "volatility": float(volatility[i]),
+                "beta": float(betas[i]),
+                "max_drawdown": float(drawdowns[i])
+            }
+            for i, symbol in enumerate(matrix.symbols[:holdings])
+        ]
+    }
+
+    if include_correlation:
+        scale = np.sqrt(sum_squares[:holdings])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            correlation = (centered[:, :holdings].T @ centered[:, :holdings]) / np.outer(scale, scale)
+        result["correlation"] = {"symbols": matrix.symbols[:holdings], "matrix": correlation}
+
+    return result
@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from services.bar_store import BarSeries
+from portfolio.analytics import DAY, align_closes
+
+# (ticker, purchased_at YYYY-MM-DD, shares, cost) aggregated per ticker and purchase day
+Flow = Tuple[str, str, int, float]
+
+
+def epoch_day(date: str) -> int:
+    return int(datetime.strptime(date[:10], "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()) // DAY
+
+
+def replay_nav(series: Dict[str, BarSeries], flows: List[Flow], start_day: int, end_day: int) -> Dict[str, Any]:
+    """Daily NAV of a book of lots over [start_day, end_day], from an aligned close matrix.
+
+    Each lot adds its shares from the first trading day on or after its
+    purchase (lots bought before the window are held from its first day),
+    so holdings are a cumulative sum of purchase deltas and NAV is the row
+    sum of holdings x closes. Cost is the money put in, and daily returns
+    exclude those inflows, so cumulative_return is time-weighted from the
+    window's first day.
+    """
+    days, prices = align_closes(series)
+    # Closes are forward-filled, so the window's first row already carries earlier prices
+    lo, hi = np.searchsorted(days, start_day, side="left"), np.searchsorted(days, end_day, side="right")
+    days, prices = days[lo:hi], prices[lo:hi]
+
+    columns = {symbol: i for i, symbol in enumerate(series)}
+    flows = [flow for flow in flows if flow[0] in columns and epoch_day(flow[1]) <= (days[-1] if len(days) else -1)]
+    if not len(days) or not flows:
+        return {"dates": [], "value": [], "cost": [], "pnl": [], "daily_pnl": [], "cumulative_return": []}
+
+    # Closes before a ticker's first bar in the window take its first close
+    valid = ~np.isnan(prices)
+    first = prices[valid.argmax(axis=0), np.arange(prices.shape[1])]
+    prices = np.where(valid, prices, np.nan_to_num(first))
+
+    rows = np.searchsorted(days, np.array([epoch_day(flow[1]) for flow in flows]), side="left")
+    shares = np.zeros(prices.shape)
+    np.add.at(shares, (rows, np.array([columns[flow[0]] for flow in flows])), np.array([flow[2] for flow in flows], dtype=np.float64))
+    inflows = np.zeros(len(days))
+    np.add.at(inflows, rows, np.array([flow[3] for flow in flows]))
+
+    value = np.einsum("ij,ij->i", np.cumsum(shares, axis=0), prices)
+    cost = np.cumsum(inflows)
+    pnl = value - cost
+
+    previous = np.concatenate([[0.0], value[:-1]])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.where(previous > 0, (value - previous - inflows) / previous, 0.0)
+    returns[0] = 0.0
+
+    return {
+        "dates": days.astype("datetime64[D]").astype(str),
+        "value": value,
+        "cost": cost,
+        "pnl": pnl,
+        "daily_pnl": np.diff(pnl, prepend=pnl[:1]),
+        "cumulative_return": np.cumprod(1.0 + returns) - 1.0
+    }
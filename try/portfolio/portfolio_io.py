@@ -0,0 +1,136 @@
+import csv
+import io
+import json
+import math
+import re
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from portfolio.portfolio_store import Lot, PortfolioStore
+
+LOT_FIELDS = ("ticker", "shares", "price", "purchased_at")
+FIELD_ALIASES = {
+    "symbol": "ticker",
+    "purchase_price": "price",
+    "avg_cost": "price",
+    "date": "purchased_at",
+    "purchase_date": "purchased_at"
+}
+TICKER_PATTERN = re.compile(r"^[A-Z0-9][A-Z0-9.\-^=]{0,14}$")
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def resolve_format(requested: Optional[str], content_type: Optional[str]) -> str:
+    """Pick csv or ndjson from an explicit format or the request content type"""
+    if requested:
+        if requested not in FORMATS:
+            raise ValueError(f"Unsupported format: {requested}")
+        return requested
+    return "ndjson" if content_type and "json" in content_type else "csv"
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into decoded lines without buffering more than one partial line.
+
+    Invalid UTF-8 becomes U+FFFD so iter_records can reject just that row.
+    """
+    remainder = b""
+    first = True
+    async for chunk in chunks:
+        lines = (remainder + chunk).split(b"\n")
+        remainder = lines.pop()
+        for line in lines:
+            text = line.decode("utf-8", errors="replace").rstrip("\r")
+            if first:
+                text, first = text.lstrip("\ufeff"), False
+            yield text
+    if remainder:
+        yield remainder.decode("utf-8", errors="replace").rstrip("\r").lstrip("\ufeff" if first else "")
+
+
+async def iter_records(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """Yield (line number, record, error) for each non-blank line; CSV needs a header row"""
+    header: Optional[List[str]] = None
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        if "\ufffd" in line:
+            if fmt == "csv" and header is None:
+                raise ValueError("CSV header is not valid UTF-8")
+            yield line_number, None, "Invalid UTF-8 text"
+            continue
+
+        if fmt == "ndjson":
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, None, "Expected a JSON object"
+                continue
+            yield line_number, record, None
+            continue
+
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [FIELD_ALIASES.get(name.strip().lower(), name.strip().lower()) for name in values]
+            missing = [field for field in LOT_FIELDS[:3] if field not in header]
+            if missing:
+                raise ValueError(f"CSV header is missing columns: {', '.join(missing)}")
+            continue
+        if len(values) != len(header):
+            yield line_number, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield line_number, dict(zip(header, values)), None
+
+
+def parse_lot(record: Dict[str, Any], today: str) -> Lot:
+    """Validate one imported record; raises ValueError with a readable message"""
+    fields = {FIELD_ALIASES.get(str(key).strip().lower(), str(key).strip().lower()): value for key, value in record.items()}
+
+    ticker = str(fields.get("ticker") or "").strip().upper()
+    if not TICKER_PATTERN.match(ticker):
+        raise ValueError(f"Invalid ticker: {ticker!r}")
+
+    try:
+        shares_value = float(fields.get("shares"))
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid shares: {fields.get('shares')!r}")
+    if not shares_value.is_integer() or shares_value <= 0:
+        raise ValueError(f"Shares must be a positive whole number: {fields.get('shares')!r}")
+
+    try:
+        price = float(fields.get("price"))
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid price: {fields.get('price')!r}")
+    if not math.isfinite(price) or price < 0:
+        raise ValueError(f"Price must be a non-negative number: {fields.get('price')!r}")
+
+    purchased_at = str(fields.get("purchased_at") or "").strip()
+    if purchased_at:
+        try:
+            purchased_at = datetime.strptime(purchased_at[:10], "%Y-%m-%d").strftime("%Y-%m-%d")
+        except ValueError:
+            raise ValueError(f"Invalid date (expected YYYY-MM-DD): {purchased_at!r}")
+    else:
+        purchased_at = today
+
+    return Lot(ticker, int(shares_value), price, purchased_at)
+
+
+async def export_lots(store: PortfolioStore, portfolio: str, fmt: str, page_size: int) -> AsyncIterator[bytes]:
+    """Render a portfolio's lots page by page, holding at most one page in memory"""
+    if fmt == "csv":
+        yield (",".join(LOT_FIELDS) + "\n").encode("utf-8")
+
+    async for page in store.iter_lot_pages(portfolio, page_size):
+        if fmt == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer, lineterminator="\n").writerows(page)
+            yield buffer.getvalue().encode("utf-8")
+        else:
+            yield "".join(
+                json.dumps(dict(zip(LOT_FIELDS, row)), separators=(",", ":")) + "\n" for row in page
+            ).encode("utf-8")
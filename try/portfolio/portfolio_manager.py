@@ -1,90 +1,330 @@
-from typing import Dict, Any, List
-from datetime import datetime
 import asyncio
-from models.stock_models import PortfolioSummary, PortfolioHolding
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from core.cache import TTLCache
+from core.profiler import section
 from services.yahoo_finance_service import YahooFinanceService
 from services.polygon_service import PolygonService
+from services.bar_store import BarSeries, period_start
+from portfolio.analytics import DAY, ReturnMatrix, risk_metrics
+from portfolio.nav import epoch_day, replay_nav
+from portfolio.portfolio_store import Lot, PortfolioBook, PortfolioStore
+from portfolio.portfolio_io import export_lots, iter_lines, iter_records, parse_lot
+from config import settings
 
 class PortfolioManager:
-    def __init__(self, yahoo_service: YahooFinanceService, polygon_service: PolygonService):
+    def __init__(self, yahoo_service: YahooFinanceService, polygon_service: PolygonService, store: Optional[PortfolioStore] = None):
         self.yahoo_service = yahoo_service
         self.polygon_service = polygon_service
-        self.stocks: Dict[str, Dict[str, Any]] = {
-            "AAPL": {"shares": 10, "avgCost": 150.0, "dateAdded": "2024-01-01"},
-            "GOOGL": {"shares": 5, "avgCost": 2800.0, "dateAdded": "2024-01-15"},
-            "MSFT": {"shares": 8, "avgCost": 380.0, "dateAdded": "2024-02-01"}
-        }
-
-    async def add_stock(self, symbol: str, shares: int, avg_cost: float):
-        """Add stock to portfolio"""
+        self.store = store or PortfolioStore()
+        self._payloads: Dict[tuple, tuple] = {}
+        self._priced = asyncio.Event()
+        self._price_task: Optional[asyncio.Task] = None
+        self._last_read = 0.0
+        self.history_cache = TTLCache(
+            ttl=settings.PORTFOLIO_HISTORY_CACHE_TTL,
+            max_size=settings.PORTFOLIO_HISTORY_CACHE_MAX_SIZE,
+            name="portfolio_history"
+        )
+
+    async def open(self):
+        await self.store.open()
+
+    async def close(self):
+        if self._price_task:
+            self._price_task.cancel()
+        await self.store.close()
+
+    def list_portfolios(self) -> List[str]:
+        return list(self.store.portfolios.keys())
+
+    async def add_stock(
+        self,
+        symbol: str,
+        shares: int,
+        avg_cost: float,
+        purchase_date: Optional[datetime] = None,
+        portfolio: str = settings.DEFAULT_PORTFOLIO
+    ):
+        """Add a lot to a portfolio"""
+        if shares <= 0:
+            raise ValueError("Shares must be positive")
+        if avg_cost < 0:
+            raise ValueError("Price cannot be negative")
+
         symbol = symbol.upper()
-        
-        if symbol in self.stocks:
-            # Calculate new average cost
-            existing = self.stocks[symbol]
-            total_shares = existing["shares"] + shares
-            total_cost = existing["shares"] * existing["avgCost"] + shares * avg_cost
-            new_avg_cost = total_cost / total_shares
-            
-            self.stocks[symbol]["shares"] = total_shares
-            self.stocks[symbol]["avgCost"] = new_avg_cost
-        else:
-            self.stocks[symbol] = {
-                "shares": shares,
-                "avgCost": avg_cost,
-                "dateAdded": datetime.now().strftime("%Y-%m-%d")
-            }
-
-    async def get_portfolio_summary(self) -> PortfolioSummary:
+        purchased_at = (purchase_date or datetime.now()).strftime("%Y-%m-%d")
+        await self.store.add_lots(portfolio, [Lot(symbol, shares, avg_cost, purchased_at)])
+        if symbol not in self.store.prices:
+            # Value a newly held ticker now rather than on the next refresh
+            await self.refresh_prices([symbol])
+
+    async def remove_stock(self, symbol: str, portfolio: str = settings.DEFAULT_PORTFOLIO) -> int:
+        """Remove every lot of a ticker from a portfolio, returning how many were removed"""
+        return await self.store.remove_position(portfolio, symbol.upper())
+
+    async def remove_lot(self, lot_id: int, portfolio: str = settings.DEFAULT_PORTFOLIO) -> bool:
+        return await self.store.remove_lot(portfolio, lot_id)
+
+    async def get_lots(self, symbol: Optional[str] = None, portfolio: str = settings.DEFAULT_PORTFOLIO) -> List[Dict[str, Any]]:
+        return await self.store.get_lots(portfolio, symbol.upper() if symbol else None)
+
+    async def import_lots(self, chunks: AsyncIterator[bytes], fmt: str, portfolio: str = settings.DEFAULT_PORTFOLIO) -> Dict[str, Any]:
+        """Stream-import lots, committing each chunk while the next one is parsed.
+
+        Invalid rows are skipped and reported; a malformed CSV header raises
+        ValueError before anything is written.
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        imported = rejected = batches = 0
+        errors: List[Dict[str, Any]] = []
+        tickers = set()
+        batch: List[Lot] = []
+        pending: Optional[asyncio.Task] = None
+
+        async def wait_pending():
+            nonlocal pending, imported, batches
+            if pending is not None:
+                task, pending = pending, None
+                imported += await task
+                batches += 1
+
+        async def flush():
+            # Wait for the previous chunk to commit, then start committing this one
+            nonlocal pending, batch
+            await wait_pending()
+            if batch:
+                pending = asyncio.create_task(self.store.add_lots(portfolio, batch))
+                batch = []
+
+        try:
+            async for line_number, record, error in iter_records(iter_lines(chunks), fmt):
+                if error is None:
+                    try:
+                        lot = parse_lot(record, today)
+                    except ValueError as e:
+                        error = str(e)
+                if error is not None:
+                    rejected += 1
+                    if len(errors) < settings.PORTFOLIO_IMPORT_MAX_ERRORS:
+                        errors.append({"line": line_number, "error": error})
+                    continue
+
+                batch.append(lot)
+                tickers.add(lot.ticker)
+                if len(batch) >= settings.PORTFOLIO_IMPORT_CHUNK_SIZE:
+                    await flush()
+            await flush()
+            await wait_pending()
+        finally:
+            if pending is not None and not pending.done():
+                await asyncio.wait([pending])
+
+        unpriced = [ticker for ticker in tickers if ticker not in self.store.prices]
+        if unpriced:
+            await self.refresh_prices(unpriced)
+
+        return {"imported": imported, "rejected": rejected, "batches": batches, "errors": errors}
+
+    def export_lots(self, fmt: str, portfolio: str = settings.DEFAULT_PORTFOLIO) -> AsyncIterator[bytes]:
+        return export_lots(self.store, portfolio, fmt, settings.PORTFOLIO_EXPORT_PAGE_SIZE)
+
+    async def refresh_prices(self, symbols: Optional[List[str]] = None):
+        """Apply the latest quotes to held positions; unchanged prices cost nothing"""
+        symbols = self.store.held_tickers() if symbols is None else symbols
+        if not symbols:
+            return
+        quotes = await self.yahoo_service.get_stock_quotes(symbols)
+        for symbol, quote in quotes.items():
+            if quote:
+                self.store.set_price(symbol, quote.price)
+
+    async def _price_loop(self):
+        """Keep held positions priced while portfolios are being read"""
+        try:
+            while time.monotonic() - self._last_read < settings.PORTFOLIO_PRICE_IDLE_TIMEOUT:
+                try:
+                    await self.refresh_prices()
+                except Exception as e:
+                    print(f"Portfolio price refresh error: {e}")
+                self._priced.set()
+                await asyncio.sleep(settings.PORTFOLIO_PRICE_REFRESH_INTERVAL)
+        finally:
+            self._priced.set()
+
+    async def _current_book(self, portfolio: str) -> PortfolioBook:
+        self._last_read = time.monotonic()
+        if self._price_task is None or self._price_task.done():
+            # First read after being idle waits for one full pricing pass
+            self._priced.clear()
+            self._price_task = asyncio.create_task(self._price_loop())
+        await self._priced.wait()
+        return self.store.get_book(portfolio)
+
+    def _cached_payload(self, portfolio: str, kind: str, book: PortfolioBook, build) -> Dict[str, Any]:
+        """Payloads are rebuilt only when the book has changed since the last read"""
+        cached = self._payloads.get((portfolio, kind))
+        if cached is not None and cached[0] is book and cached[1] == book.version:
+            return cached[2]
+        with section(f"portfolio_{kind}"):
+            payload = build(book)
+        self._payloads[(portfolio, kind)] = (book, book.version, payload)
+        return payload
+
+    async def get_portfolio_summary(self, portfolio: str = settings.DEFAULT_PORTFOLIO) -> Dict[str, Any]:
         """Get portfolio summary with current prices"""
-        if not self.stocks:
-            return PortfolioSummary(
-                holdings=[],
-                totalValue=0,
-                totalCost=0,
-                totalGainLoss=0,
-                totalGainLossPercent=0
-            )
+        book = await self._current_book(portfolio)
+        return self._cached_payload(portfolio, "summary", book, lambda book: {
+            "stocks": [
+                {
+                    "ticker": position.ticker,
+                    "shares": position.shares,
+                    "purchase_price": position.avg_cost,
+                    "purchase_date": position.first_purchase,
+                    "current_price": position.price or 0.0,
+                    "current_value": position.value,
+                    "change_percent": position.gain_loss_percent,
+                    "gain_loss": position.gain_loss
+                }
+                for position in book.positions.values()
+            ],
+            "total_cost": book.cost,
+            "total_value": book.value,
+            "total_return_percent": book.gain_loss_percent,
+            "total_gain_loss": book.gain_loss
+        })
 
-        holdings = []
-        total_value = 0
-        total_cost = 0
-
-        # Fetch current prices for all holdings
-        symbols = list(self.stocks.keys())
-        price_tasks = [self.yahoo_service.get_stock_quote(symbol) for symbol in symbols]
-        quotes = await asyncio.gather(*price_tasks)
-
-        for i, symbol in enumerate(symbols):
-            stock_data = self.stocks[symbol]
-            quote = quotes[i]
-            
-            current_price = quote.price if quote else 0
-            holding_value = current_price * stock_data["shares"]
-            holding_cost = stock_data["avgCost"] * stock_data["shares"]
-            gain_loss = holding_value - holding_cost
-            gain_loss_percent = (gain_loss / holding_cost * 100) if holding_cost > 0 else 0
-
-            holdings.append(PortfolioHolding(
-                symbol=symbol,
-                shares=stock_data["shares"],
-                avgCost=stock_data["avgCost"],
-                currentPrice=current_price,
-                totalValue=holding_value,
-                gainLoss=gain_loss,
-                gainLossPercent=gain_loss_percent
-            ))
-
-            total_value += holding_value
-            total_cost += holding_cost
-
-        total_gain_loss = total_value - total_cost
-        total_gain_loss_percent = (total_gain_loss / total_cost * 100) if total_cost > 0 else 0
-
-        return PortfolioSummary(
-            holdings=holdings,
-            totalValue=total_value,
-            totalCost=total_cost,
-            totalGainLoss=total_gain_loss,
-            totalGainLossPercent=total_gain_loss_percent
+    async def get_holdings(self, portfolio: str = settings.DEFAULT_PORTFOLIO) -> Dict[str, Any]:
+        """Get holdings with current prices"""
+        book = await self._current_book(portfolio)
+        return self._cached_payload(portfolio, "holdings", book, lambda book: {
+            "holdings": [
+                {
+                    "symbol": position.ticker,
+                    "shares": position.shares,
+                    "avgCost": position.avg_cost,
+                    "currentPrice": position.price or 0.0,
+                    "totalValue": position.value,
+                    "gainLoss": position.gain_loss,
+                    "gainLossPercent": position.gain_loss_percent
+                }
+                for position in book.positions.values()
+            ],
+            "totalValue": book.value,
+            "totalCost": book.cost,
+            "totalGainLoss": book.gain_loss,
+            "totalGainLossPercent": book.gain_loss_percent
+        })
+
+    async def get_portfolio_analytics(
+        self,
+        period: str = "1y",
+        benchmark: Optional[str] = settings.PORTFOLIO_BENCHMARK,
+        include_correlation: bool = True,
+        portfolio: str = settings.DEFAULT_PORTFOLIO
+    ) -> Dict[str, Any]:
+        """Risk metrics for the current holdings from locally stored daily history"""
+        period_start(period)  # raises ValueError for unsupported periods
+        positions = self.store.get_positions(portfolio)
+        symbols = list(positions.keys())
+        benchmark = benchmark.upper() if benchmark else None
+        requested = symbols + ([benchmark] if benchmark and benchmark not in positions else [])
+
+        # Serve stored tails as they are; the prefetcher keeps held tickers fresh
+        results = await asyncio.gather(
+            *(self.yahoo_service.get_bars(symbol, period, refresh=False) for symbol in requested),
+            return_exceptions=True
         )
+        series = {}
+        for symbol, bars in zip(requested, results):
+            if isinstance(bars, Exception):
+                print(f"Analytics history error for {symbol}: {bars}")
+            elif len(bars) > 1:
+                series[symbol] = bars
+
+        held = [symbol for symbol in symbols if symbol in series]
+        ordered = {symbol: series[symbol] for symbol in held}
+        if benchmark in series and benchmark not in ordered:
+            ordered[benchmark] = series[benchmark]
+
+        # Current values from the latest stored close, so weights match the history used
+        values = np.array([positions[symbol].shares * float(series[symbol]["c"][-1]) for symbol in held])
+        total_value = float(values.sum())
+        weights = values / total_value if total_value > 0 else np.zeros(len(held))
+
+        def compute() -> Dict[str, Any]:
+            matrix = ReturnMatrix.from_bars(ordered)
+            return risk_metrics(
+                matrix,
+                weights,
+                total_value,
+                benchmark=benchmark if benchmark in series else None,
+                include_correlation=include_correlation
+            )
+
+        metrics = await self.yahoo_service.executor.run(compute)
+        metrics.update({
+            "period": period,
+            "portfolio_name": portfolio,
+            "benchmark": benchmark,
+            "missing": [symbol for symbol in symbols if symbol not in series]
+        })
+        return metrics
+
+    async def _history_bars(self, symbol: str, start_ts: int) -> BarSeries:
+        """Daily closes from Polygon's range aggregates, falling back to Yahoo"""
+        bars = await self.polygon_service.get_daily_bars(symbol, start_ts)
+        if not len(bars):
+            bars = (await self.yahoo_service.bar_store.get_series(symbol, start_ts, "1d")).since(start_ts)
+        return bars
+
+    async def get_portfolio_history(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        portfolio: str = settings.DEFAULT_PORTFOLIO
+    ) -> Dict[str, Any]:
+        """Daily value, cost and PnL of a portfolio, replaying its lots over stored closes.
+
+        Results are cached per trade count of the book and version of each
+        ticker's bars, so price ticks and repeated reads reuse one replay.
+        """
+        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        end = end or today
+        start = start or (datetime.strptime(end[:10], "%Y-%m-%d") - timedelta(days=365)).strftime("%Y-%m-%d")
+        try:
+            start_day, end_day = epoch_day(start), epoch_day(end)
+        except ValueError:
+            raise ValueError("Dates must be YYYY-MM-DD")
+        if start_day > end_day:
+            raise ValueError("start must not be after end")
+
+        book = self.store.get_book(portfolio)
+        symbols = list(book.positions.keys())
+        # A week of lead-in so the first day has a close to carry forward
+        lead_ts = (start_day - 7) * DAY
+        results = await asyncio.gather(*(self._history_bars(symbol, lead_ts) for symbol in symbols), return_exceptions=True)
+        series = {}
+        for symbol, bars in zip(symbols, results):
+            if isinstance(bars, Exception):
+                print(f"Portfolio history error for {symbol}: {bars}")
+            elif len(bars):
+                series[symbol] = bars
+
+        key = (portfolio, book.trades, start_day, end_day, tuple((symbol, bars.version()) for symbol, bars in series.items()))
+        cached = self.history_cache.lookup(key)
+        if cached is not None:
+            return cached
+
+        flows = await self.store.get_flows(portfolio)
+        history = await self.yahoo_service.executor.run(replay_nav, series, flows, start_day, end_day)
+        history.update({
+            "portfolio_name": portfolio,
+            "start": start[:10],
+            "end": end[:10],
+            "missing": [symbol for symbol in symbols if symbol not in series]
+        })
+        self.history_cache.set(key, history)
+        return history
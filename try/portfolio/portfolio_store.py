@@ -0,0 +1,450 @@
+import asyncio
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from config import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS portfolios (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lots (
+    id INTEGER PRIMARY KEY,
+    portfolio_id INTEGER NOT NULL REFERENCES portfolios(id) ON DELETE CASCADE,
+    ticker TEXT NOT NULL,
+    shares INTEGER NOT NULL CHECK (shares > 0),
+    price REAL NOT NULL CHECK (price >= 0),
+    purchased_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_lots_portfolio_ticker ON lots (portfolio_id, ticker);
+"""
+
+# Holdings the default portfolio starts with when the database is first created
+DEMO_LOTS = [
+    ("AAPL", 10, 150.0, "2024-01-01"),
+    ("GOOGL", 5, 2800.0, "2024-01-15"),
+    ("MSFT", 8, 380.0, "2024-02-01")
+]
+
+
+class Lot(NamedTuple):
+    ticker: str
+    shares: int
+    price: float
+    purchased_at: str
+
+
+class Position:
+    """Aggregate of all lots of one ticker in one portfolio, valued at the last known price"""
+
+    __slots__ = ("ticker", "shares", "cost", "lots", "first_purchase", "price", "value")
+
+    def __init__(self, ticker: str, price: Optional[float] = None):
+        self.ticker = ticker
+        self.shares = 0
+        self.cost = 0.0
+        self.lots = 0
+        self.first_purchase: Optional[str] = None
+        self.price = price
+        self.value = 0.0
+
+    @property
+    def avg_cost(self) -> float:
+        return self.cost / self.shares if self.shares else 0.0
+
+    @property
+    def gain_loss(self) -> float:
+        return self.value - self.cost
+
+    @property
+    def gain_loss_percent(self) -> float:
+        return self.gain_loss / self.cost * 100 if self.cost > 0 else 0.0
+
+    def revalue(self):
+        self.value = self.shares * self.price if self.price is not None else 0.0
+
+
+class PortfolioBook:
+    """Positions of one portfolio with running totals.
+
+    Every trade or price change adjusts the affected position and the
+    portfolio totals by their difference, so totals never need a full pass
+    over the positions. `version` increases with each change and `trades`
+    only with changes to the lots, which is what history depends on.
+    """
+
+    __slots__ = ("positions", "cost", "value", "version", "trades")
+
+    def __init__(self):
+        self.positions: Dict[str, Position] = {}
+        self.cost = 0.0
+        self.value = 0.0
+        self.version = 0
+        self.trades = 0
+
+    def _changed(self, position: Position, old_cost: float, old_value: float):
+        """Revalue a modified position and carry its difference into the totals"""
+        position.revalue()
+        self.cost += position.cost - old_cost
+        self.value += position.value - old_value
+        self.version += 1
+
+    def add_lot(self, ticker: str, shares: int, price: float, purchased_at: str, last_price: Optional[float], lots: int = 1):
+        position = self.positions.get(ticker)
+        if position is None:
+            position = self.positions[ticker] = Position(ticker, last_price)
+
+        old_cost, old_value = position.cost, position.value
+        position.shares += shares
+        position.cost += shares * price
+        position.lots += lots
+        if position.first_purchase is None or purchased_at < position.first_purchase:
+            position.first_purchase = purchased_at
+        self._changed(position, old_cost, old_value)
+        self.trades += 1
+
+    def remove_lot(self, ticker: str, shares: int, price: float):
+        position = self.positions.get(ticker)
+        if position is None:
+            return
+
+        old_cost, old_value = position.cost, position.value
+        position.shares -= shares
+        position.cost -= shares * price
+        position.lots -= 1
+        self._changed(position, old_cost, old_value)
+        self.trades += 1
+        if position.lots <= 0:
+            self.remove_position(ticker)
+
+    def remove_position(self, ticker: str):
+        position = self.positions.pop(ticker, None)
+        if position is not None:
+            self.cost -= position.cost
+            self.value -= position.value
+            self.version += 1
+            self.trades += 1
+
+    def set_price(self, ticker: str, price: float):
+        position = self.positions.get(ticker)
+        if position is not None and position.price != price:
+            old_value = position.value
+            position.price = price
+            self._changed(position, position.cost, old_value)
+
+    @property
+    def gain_loss(self) -> float:
+        return self.value - self.cost
+
+    @property
+    def gain_loss_percent(self) -> float:
+        return self.gain_loss / self.cost * 100 if self.cost > 0 else 0.0
+
+
+class PortfolioStore:
+    """SQLite (WAL) lot store with an in-memory position view.
+
+    The database is the source of truth: positions are rebuilt from it on
+    open and only updated after a write commits. Concurrent writes are
+    grouped into one transaction (each in its own savepoint, so one bad
+    write does not fail the batch) on a dedicated writer thread.
+    """
+
+    def __init__(self, path: str = settings.PORTFOLIO_DB_PATH):
+        self.path = path
+        self.portfolios: Dict[str, int] = {}
+        self.books: Dict[int, PortfolioBook] = {}
+        # Last known price per ticker and the portfolios holding it, for O(1) tick updates
+        self.prices: Dict[str, float] = {}
+        self.holders: Dict[str, Set[int]] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="portfolio-db")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pending: List[Tuple[str, tuple, asyncio.Future]] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.writes = 0
+
+    async def open(self):
+        self._wake = asyncio.Event()
+        portfolios, positions = await self._run(self._open)
+        self.portfolios = portfolios
+        for portfolio_id in portfolios.values():
+            self.books.setdefault(portfolio_id, PortfolioBook())
+        for portfolio_id, ticker, shares, cost, lots, first_purchase in positions:
+            self.books[portfolio_id].add_lot(ticker, shares, cost / shares, first_purchase, None, lots=lots)
+            self.holders.setdefault(ticker, set()).add(portfolio_id)
+        self._writer_task = asyncio.create_task(self._writer())
+
+    async def close(self):
+        if self._writer_task:
+            # Let queued writes commit, unless the writer has died and never will
+            while self._pending and not self._writer_task.done():
+                await asyncio.sleep(settings.PORTFOLIO_WRITE_BATCH_DELAY)
+            self._writer_task.cancel()
+            if self._writer_task.done() and not self._writer_task.cancelled() and self._writer_task.exception():
+                print(f"Portfolio store writer failed: {self._writer_task.exception()}")
+            for _, _, future in self._pending:
+                if not future.done():
+                    future.set_exception(RuntimeError("Portfolio store is closed"))
+            self._pending = []
+        if self._conn is not None:
+            await self._run(self._conn.close)
+        self._executor.shutdown(wait=False)
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+
+        if self._conn.execute("SELECT COUNT(*) FROM portfolios").fetchone()[0] == 0:
+            self._conn.execute("BEGIN")
+            portfolio_id = self._create_portfolio(settings.DEFAULT_PORTFOLIO)
+            self._add_lots(portfolio_id, [Lot(*lot) for lot in DEMO_LOTS])
+            self._conn.execute("COMMIT")
+
+        portfolios = {name: portfolio_id for portfolio_id, name in self._conn.execute("SELECT id, name FROM portfolios")}
+        positions = self._conn.execute(
+            "SELECT portfolio_id, ticker, SUM(shares), SUM(shares * price), COUNT(*), MIN(purchased_at) "
+            "FROM lots GROUP BY portfolio_id, ticker"
+        ).fetchall()
+        return portfolios, positions
+
+    # Writes: queued, committed in batches, then applied to memory
+
+    async def _submit(self, kind: str, *args) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((kind, args, future))
+        self._wake.set()
+        return await future
+
+    async def _writer(self):
+        while True:
+            await self._wake.wait()
+            await asyncio.sleep(settings.PORTFOLIO_WRITE_BATCH_DELAY)
+            self._wake.clear()
+            batch = self._pending[:settings.PORTFOLIO_WRITE_BATCH_SIZE]
+            self._pending = self._pending[len(batch):]
+            if self._pending:
+                self._wake.set()
+
+            try:
+                results = await self._run(self._write_batch, [(kind, args) for kind, args, _ in batch])
+            except Exception as e:
+                print(f"Portfolio store write error: {e}")
+                results = [e] * len(batch)
+
+            self.batches += 1
+            for (kind, args, future), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    if not future.done():
+                        future.set_exception(result)
+                    continue
+                self.writes += 1
+                self._apply(kind, args, result)
+                if not future.done():
+                    future.set_result(result)
+
+    def _write_batch(self, batch: List[Tuple[str, tuple]]) -> List[Any]:
+        results = []
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            for kind, args in batch:
+                self._conn.execute("SAVEPOINT write")
+                try:
+                    results.append(getattr(self, f"_{kind}")(*args))
+                    self._conn.execute("RELEASE write")
+                except (sqlite3.Error, ValueError) as e:
+                    self._conn.execute("ROLLBACK TO write")
+                    self._conn.execute("RELEASE write")
+                    results.append(e)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        return results
+
+    def _apply(self, kind: str, args: tuple, result: Any):
+        """Mirror a committed write into the in-memory books"""
+        if kind == "create_portfolio":
+            self.portfolios[args[0]] = result
+            self.books.setdefault(result, PortfolioBook())
+        elif kind == "add_lots":
+            portfolio_id, lots = args
+            book = self.books[portfolio_id]
+            for lot in lots:
+                book.add_lot(lot.ticker, lot.shares, lot.price, lot.purchased_at, self.prices.get(lot.ticker))
+                self.holders.setdefault(lot.ticker, set()).add(portfolio_id)
+        elif kind == "delete_position":
+            portfolio_id, ticker = args
+            self.books[portfolio_id].remove_position(ticker)
+            self._release(portfolio_id, ticker)
+        elif kind == "delete_lot" and result is not None:
+            portfolio_id, ticker, shares, price = result
+            self.books[portfolio_id].remove_lot(ticker, shares, price)
+            self._release(portfolio_id, ticker)
+
+    def _release(self, portfolio_id: int, ticker: str):
+        if ticker in self.books[portfolio_id].positions:
+            return
+        holders = self.holders.get(ticker)
+        if holders is not None:
+            holders.discard(portfolio_id)
+            if not holders:
+                del self.holders[ticker]
+                self.prices.pop(ticker, None)
+
+    # SQL for each write kind, run on the writer thread inside a savepoint
+
+    def _create_portfolio(self, name: str) -> int:
+        return self._conn.execute(
+            "INSERT INTO portfolios (name, created_at) VALUES (?, ?)",
+            (name, datetime.now().isoformat(timespec="seconds"))
+        ).lastrowid
+
+    def _add_lots(self, portfolio_id: int, lots: List[Lot]) -> int:
+        self._conn.executemany(
+            "INSERT INTO lots (portfolio_id, ticker, shares, price, purchased_at) VALUES (?, ?, ?, ?, ?)",
+            [(portfolio_id, *lot) for lot in lots]
+        )
+        return len(lots)
+
+    def _delete_position(self, portfolio_id: int, ticker: str) -> int:
+        return self._conn.execute(
+            "DELETE FROM lots WHERE portfolio_id = ? AND ticker = ?", (portfolio_id, ticker)
+        ).rowcount
+
+    def _delete_lot(self, portfolio_id: int, lot_id: int) -> Optional[tuple]:
+        row = self._conn.execute(
+            "SELECT portfolio_id, ticker, shares, price FROM lots WHERE id = ? AND portfolio_id = ?",
+            (lot_id, portfolio_id)
+        ).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM lots WHERE id = ?", (lot_id,))
+        return row
+
+    # Public API
+
+    async def get_portfolio_id(self, name: str, create: bool = False) -> Optional[int]:
+        portfolio_id = self.portfolios.get(name)
+        if portfolio_id is None and create:
+            try:
+                portfolio_id = await self._submit("create_portfolio", name)
+            except sqlite3.IntegrityError:
+                # Created by a concurrent request in the same batch
+                portfolio_id = self.portfolios.get(name)
+        return portfolio_id
+
+    def get_book(self, portfolio: str) -> PortfolioBook:
+        portfolio_id = self.portfolios.get(portfolio)
+        return self.books[portfolio_id] if portfolio_id is not None else PortfolioBook()
+
+    def get_positions(self, portfolio: str) -> Dict[str, Position]:
+        return self.get_book(portfolio).positions
+
+    def held_tickers(self) -> List[str]:
+        return list(self.holders.keys())
+
+    def set_price(self, ticker: str, price: float):
+        """Revalue every position in the ticker, touching only the portfolios that hold it"""
+        if self.prices.get(ticker) == price:
+            return
+        self.prices[ticker] = price
+        for portfolio_id in self.holders.get(ticker, ()):
+            self.books[portfolio_id].set_price(ticker, price)
+
+    async def add_lots(self, portfolio: str, lots: List[Lot]) -> int:
+        portfolio_id = await self.get_portfolio_id(portfolio, create=True)
+        return await self._submit("add_lots", portfolio_id, lots)
+
+    async def remove_position(self, portfolio: str, ticker: str) -> int:
+        portfolio_id = self.portfolios.get(portfolio)
+        if portfolio_id is None:
+            return 0
+        return await self._submit("delete_position", portfolio_id, ticker)
+
+    async def remove_lot(self, portfolio: str, lot_id: int) -> bool:
+        portfolio_id = self.portfolios.get(portfolio)
+        if portfolio_id is None:
+            return False
+        return await self._submit("delete_lot", portfolio_id, lot_id) is not None
+
+    async def get_lots(self, portfolio: str, ticker: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Read lots straight from the database (not part of the hot path)"""
+        portfolio_id = self.portfolios.get(portfolio)
+        if portfolio_id is None:
+            return []
+        rows = await self._run(self._select_lots, portfolio_id, ticker)
+        return [
+            {"id": lot_id, "ticker": row_ticker, "shares": shares, "price": price, "purchased_at": purchased_at}
+            for lot_id, row_ticker, shares, price, purchased_at in rows
+        ]
+
+    def _select_lots(self, portfolio_id: int, ticker: Optional[str]) -> Iterable[tuple]:
+        query = "SELECT id, ticker, shares, price, purchased_at FROM lots WHERE portfolio_id = ?"
+        params: tuple = (portfolio_id,)
+        if ticker is not None:
+            query += " AND ticker = ?"
+            params += (ticker,)
+        return self._conn.execute(query + " ORDER BY id", params).fetchall()
+
+    async def get_flows(self, portfolio: str) -> List[tuple]:
+        """(ticker, purchased_at, shares, cost) summed per ticker and purchase day"""
+        portfolio_id = self.portfolios.get(portfolio)
+        if portfolio_id is None:
+            return []
+        return await self._run(self._select_flows, portfolio_id)
+
+    def _select_flows(self, portfolio_id: int) -> List[tuple]:
+        return self._conn.execute(
+            "SELECT ticker, purchased_at, SUM(shares), SUM(shares * price) FROM lots "
+            "WHERE portfolio_id = ? GROUP BY ticker, purchased_at",
+            (portfolio_id,)
+        ).fetchall()
+
+    async def iter_lot_pages(self, portfolio: str, page_size: int) -> AsyncIterator[List[tuple]]:
+        """Yield (ticker, shares, price, purchased_at) rows page by page, ordered by ticker"""
+        portfolio_id = self.portfolios.get(portfolio)
+        if portfolio_id is None:
+            return
+        after = ("", 0)
+        while True:
+            rows = await self._run(self._select_lot_page, portfolio_id, after, page_size)
+            if not rows:
+                return
+            after = (rows[-1][0], rows[-1][1])
+            yield [row[:1] + row[2:] for row in rows]
+            if len(rows) < page_size:
+                return
+
+    def _select_lot_page(self, portfolio_id: int, after: Tuple[str, int], page_size: int) -> List[tuple]:
+        # Keyset pagination along the (portfolio_id, ticker) index
+        return self._conn.execute(
+            "SELECT ticker, id, shares, price, purchased_at FROM lots "
+            "WHERE portfolio_id = ? AND (ticker, id) > (?, ?) ORDER BY ticker, id LIMIT ?",
+            (portfolio_id, after[0], after[1], page_size)
+        ).fetchall()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "portfolios": len(self.portfolios),
+            "positions": sum(len(book.positions) for book in self.books.values()),
+            "lots": sum(p.lots for book in self.books.values() for p in book.positions.values()),
+            "priced_tickers": len(self.prices),
+            "pending_writes": len(self._pending),
+            "write_batches": self.batches,
+            "writes": self.writes
+        }
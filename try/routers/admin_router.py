@@ -0,0 +1,80 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from core.http_client import HttpClient
+from core.executor import BoundedExecutor
+from core.loop_watchdog import LoopWatchdog
+from core.quote_hub import QuoteHub
+from core.quote_resolver import QuoteResolver
+from core.profiler import Profiler
+from core.dependencies import get_http_client, get_executor, get_loop_watchdog, get_profiler, get_yahoo_service, get_sec_service, get_quote_hub, get_quote_resolver, get_portfolio_manager, get_prefetch_scheduler, require_admin
+from services.yahoo_finance_service import YahooFinanceService
+from services.sec_service import SECService
+from services.prefetch_scheduler import PrefetchScheduler
+from portfolio.portfolio_manager import PortfolioManager
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"]
+)
+
+@router.get("/stats")
+async def get_stats(
+    http_client: HttpClient = Depends(get_http_client),
+    executor: BoundedExecutor = Depends(get_executor),
+    loop_watchdog: LoopWatchdog = Depends(get_loop_watchdog),
+    profiler: Profiler = Depends(get_profiler),
+    yahoo_service: YahooFinanceService = Depends(get_yahoo_service),
+    sec_service: SECService = Depends(get_sec_service),
+    quote_hub: QuoteHub = Depends(get_quote_hub),
+    quote_resolver: QuoteResolver = Depends(get_quote_resolver),
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager),
+    prefetch_scheduler: PrefetchScheduler = Depends(get_prefetch_scheduler)
+):
+    """Get cache, streaming, connection pool and rate limit statistics"""
+    return {
+        "caches": {
+            "quotes": yahoo_service.quote_cache.stats(),
+            "chart_payloads": yahoo_service.chart_payload_cache.stats(),
+            "portfolio_history": portfolio_manager.history_cache.stats()
+        },
+        "fundamentals": yahoo_service.fundamentals.stats(),
+        "bar_store": yahoo_service.bar_store.stats(),
+        "polygon_bar_store": portfolio_manager.polygon_service.bar_store.stats(),
+        "indicators": yahoo_service.indicator_engine.stats(),
+        "quote_routing": quote_resolver.stats(),
+        "quote_stream": quote_hub.stats(),
+        "prefetch": prefetch_scheduler.stats(),
+        "executor": executor.stats(),
+        "yfinance_batches": yahoo_service.yf_batcher.stats(),
+        "event_loop": loop_watchdog.stats(),
+        "profiling": profiler.stats(),
+        "portfolio_store": portfolio_manager.store.stats(),
+        "sec_ticker_index": sec_service.ticker_index.stats(),
+        "sec_filings": sec_service.filings_store.stats(),
+        "http_pools": http_client.pool_stats(),
+        "circuit_breakers": http_client.circuit_breakers.stats(),
+        "rate_limits": http_client.rate_limiter.stats()
+    }
+
+@router.get("/slow-requests", dependencies=[Depends(require_admin)])
+async def get_slow_requests(
+    limit: int = Query(20, ge=1, le=500),
+    route: Optional[str] = Query(None, description="Only requests matching this route template, e.g. /stocks/{ticker}/info"),
+    spans: bool = Query(False, description="Include each request's full timeline"),
+    profiler: Profiler = Depends(get_profiler)
+):
+    """Newest requests that exceeded PROFILE_SLOW_THRESHOLD, with per-kind time breakdowns"""
+    traces = [trace for trace in reversed(profiler.slow) if route is None or trace.route == route]
+    return {
+        "threshold_ms": profiler.stats()["slow_threshold_ms"],
+        "requests": [trace.to_dict(spans=spans) for trace in traces[:limit]]
+    }
+
+@router.get("/traces/{trace_id}", dependencies=[Depends(require_admin)])
+async def get_trace(trace_id: str, profiler: Profiler = Depends(get_profiler)):
+    """Full timeline of a profiled (?profile=1) or slow request, by its X-Trace-Id"""
+    trace = profiler.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} is no longer buffered")
+    return trace.to_dict()
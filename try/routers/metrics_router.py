@@ -0,0 +1,84 @@
+from typing import List
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from core.http_client import HttpClient
+from core.executor import BoundedExecutor
+from core.loop_watchdog import LoopWatchdog
+from core.metrics import RequestMetrics, render_samples
+from core.dependencies import get_http_client, get_executor, get_loop_watchdog, get_request_metrics, get_yahoo_service, get_portfolio_manager
+from services.yahoo_finance_service import YahooFinanceService
+from portfolio.portfolio_manager import PortfolioManager
+
+router = APIRouter(tags=["metrics"])
+
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(
+    request_metrics: RequestMetrics = Depends(get_request_metrics),
+    http_client: HttpClient = Depends(get_http_client),
+    executor: BoundedExecutor = Depends(get_executor),
+    loop_watchdog: LoopWatchdog = Depends(get_loop_watchdog),
+    yahoo_service: YahooFinanceService = Depends(get_yahoo_service),
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager)
+):
+    """Prometheus text exposition of request, upstream, cache, executor and event loop metrics"""
+    lines: List[str] = []
+
+    lines += request_metrics.latency.render()
+    lines += render_samples("http_requests_in_flight", "gauge", "HTTP requests currently being served", [({}, request_metrics.in_flight)])
+
+    lines += http_client.upstream_latency.render()
+    lines += http_client.upstream_retries.render()
+    lines += http_client.upstream_throttled.render()
+    lines += http_client.upstream_failures.render()
+
+    breakers = http_client.circuit_breakers.breakers
+    lines += render_samples(
+        "upstream_circuit_state", "gauge", "Circuit breaker state by host (0 closed, 1 half open, 2 open)",
+        [({"host": host}, CIRCUIT_STATES.get(breaker.state)) for host, breaker in breakers.items()]
+    )
+    lines += render_samples(
+        "upstream_circuit_opened_total", "counter", "Times the circuit breaker opened by host",
+        [({"host": host}, breaker.opened) for host, breaker in breakers.items()]
+    )
+    buckets = http_client.rate_limiter.buckets
+    lines += render_samples(
+        "rate_limit_queue_depth", "gauge", "Requests waiting for a rate limit token by provider",
+        [({"provider": name}, bucket.waiting) for name, bucket in buckets.items()]
+    )
+
+    caches = {
+        "quotes": yahoo_service.quote_cache.stats(),
+        "chart_payloads": yahoo_service.chart_payload_cache.stats(),
+        "portfolio_history": portfolio_manager.history_cache.stats()
+    }
+    fundamentals = yahoo_service.fundamentals.stats()
+    # Stale answers are still served from cache, so they count as hits
+    caches["fundamentals"] = {
+        "hits": fundamentals["fresh_hits"] + fundamentals["stale_hits"],
+        "misses": fundamentals["misses"],
+        "coalesced": fundamentals["coalesced"],
+        "hit_ratio": fundamentals["hit_ratio"]
+    }
+    for field, kind, help in (
+        ("hits", "counter", "Cache lookups answered from cache"),
+        ("misses", "counter", "Cache lookups that had to load"),
+        ("coalesced", "counter", "Cache lookups that joined an in-flight load"),
+        ("hit_ratio", "gauge", "Share of cache lookups served without a new load")
+    ):
+        name = "cache_hit_ratio" if field == "hit_ratio" else f"cache_{field}_total"
+        lines += render_samples(name, kind, help, [({"cache": cache}, stats[field]) for cache, stats in caches.items()])
+
+    lines += render_samples("executor_queue_depth", "gauge", "Blocking calls waiting for a worker thread", [({}, executor.queue_depth)])
+    lines += render_samples("executor_running", "gauge", "Blocking calls running on worker threads", [({}, executor.running)])
+    lines += render_samples("executor_rejected_total", "counter", "Blocking calls rejected because the queue was full", [({}, executor.rejected)])
+    lines += render_samples("executor_timeouts_total", "counter", "Blocking calls that exceeded their timeout", [({}, executor.timeouts)])
+
+    lines += render_samples("event_loop_lag_seconds", "gauge", "Last measured event loop scheduling lag", [({}, loop_watchdog.lag)])
+    lines += render_samples("event_loop_max_lag_seconds", "gauge", "Largest event loop scheduling lag seen", [({}, loop_watchdog.max_lag)])
+    lines += render_samples("event_loop_stalls_total", "counter", "Times the event loop was blocked past the threshold", [({}, loop_watchdog.stalls)])
+
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
@@ -1,31 +1,42 @@
-from fastapi import APIRouter, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
 from models.portfolio_models import StockPurchaseInfo, PortfolioSummary
 from portfolio.portfolio_manager import PortfolioManager
-from services.yahoo_finance_service import YahooFinanceService
-from services.polygon_service import PolygonService
-from core.http_client import HttpClient
+from portfolio.portfolio_io import FORMATS, resolve_format
+from core.dependencies import get_portfolio_manager
+from core.responses import FastJSONResponse
+from config import settings
 from datetime import datetime
 
 router = APIRouter(
     prefix="/portfolio",
-    tags=["portfolio"]
+    tags=["portfolio"],
+    default_response_class=FastJSONResponse
 )
 
-# Initialize services
-http_client = HttpClient()
-yahoo_service = YahooFinanceService(http_client)
-polygon_service = PolygonService(http_client)
-portfolio_manager_instance = PortfolioManager(yahoo_service, polygon_service)
+PORTFOLIO_QUERY = Query(settings.DEFAULT_PORTFOLIO, description="Portfolio name")
+
+@router.get("/portfolios")
+async def list_portfolios(portfolio_manager: PortfolioManager = Depends(get_portfolio_manager)):
+    """List portfolio names"""
+    return {"portfolios": portfolio_manager.list_portfolios()}
 
 @router.post("/add", status_code=201)
-async def add_stock_to_portfolio(stock_info: StockPurchaseInfo = Body(...)):
-    """Add stock to portfolio"""
+async def add_stock_to_portfolio(
+    stock_info: StockPurchaseInfo = Body(...),
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager),
+    portfolio: str = PORTFOLIO_QUERY
+):
+    """Add a lot to a portfolio (created on first use)"""
     try:
         # FastAPI automatically validates stock_info against StockPurchaseInfo model
-        result = await portfolio_manager_instance.add_stock(
+        result = await portfolio_manager.add_stock(
             symbol=stock_info.ticker.upper(),
             shares=stock_info.shares,
-            avg_cost=stock_info.purchase_price
+            avg_cost=stock_info.purchase_price,
+            purchase_date=stock_info.purchase_date,
+            portfolio=portfolio
         )
         return {"message": f"Added {stock_info.shares} shares of {stock_info.ticker}", "success": True}
     except ValueError as e:
@@ -35,7 +46,13 @@ async def add_stock_to_portfolio(stock_info: StockPurchaseInfo = Body(...)):
 
 # Legacy endpoint for backward compatibility with the frontend
 @router.post("/")
-async def legacy_add_stock(symbol: str = Body(...), shares: int = Body(...), price: float = Body(...)):
+async def legacy_add_stock(
+    symbol: str = Body(...),
+    shares: int = Body(...),
+    price: float = Body(...),
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager),
+    portfolio: str = PORTFOLIO_QUERY
+):
     """Legacy endpoint for adding stock to portfolio"""
     try:
         stock_info = StockPurchaseInfo(
@@ -44,61 +61,142 @@ async def legacy_add_stock(symbol: str = Body(...), shares: int = Body(...), pri
             purchase_price=price,
             purchase_date=datetime.now()
         )
-        return await add_stock_to_portfolio(stock_info)
+        return await add_stock_to_portfolio(stock_info, portfolio_manager, portfolio)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error adding stock: {str(e)}")
 
-@router.get("/summary", response_model=PortfolioSummary)
-async def get_portfolio_summary():
+@router.get("/summary", response_model=PortfolioSummary, response_class=FastJSONResponse)
+async def get_portfolio_summary(
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager),
+    portfolio: str = PORTFOLIO_QUERY
+):
     """Get portfolio summary"""
     try:
-        summary = await portfolio_manager_instance.get_portfolio_summary()
-        
-        # Convert to the expected format
-        from models.portfolio_models import PortfolioStock
-        stocks = []
-        for holding in summary.holdings:
-            stocks.append(PortfolioStock(
-                ticker=holding.symbol,
-                shares=holding.shares,
-                purchase_price=holding.avgCost,
-                purchase_date=datetime.now(),  # You might want to store this properly
-                current_price=holding.currentPrice,
-                current_value=holding.totalValue,
-                change_percent=holding.gainLossPercent,
-                gain_loss=holding.gainLoss
-            ))
-        
-        return PortfolioSummary(
-            stocks=stocks,
-            total_cost=summary.totalCost,
-            total_value=summary.totalValue,
-            total_return_percent=summary.totalGainLossPercent,
-            total_gain_loss=summary.totalGainLoss
-        )
+        return FastJSONResponse(await portfolio_manager.get_portfolio_summary(portfolio))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An internal error occurred while fetching portfolio summary: {str(e)}")
 
+@router.get("/analytics")
+async def get_portfolio_analytics(
+    period: str = Query("1y", description="History window, e.g. 6mo, 1y, 5y"),
+    benchmark: str = Query(settings.PORTFOLIO_BENCHMARK, description="Benchmark ticker for beta"),
+    correlation: bool = Query(True, description="Include the holdings correlation matrix"),
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager),
+    portfolio: str = PORTFOLIO_QUERY
+):
+    """Get volatility, beta, VaR, max drawdown and correlations for the holdings"""
+    try:
+        analytics = await portfolio_manager.get_portfolio_analytics(period, benchmark, correlation, portfolio)
+        return FastJSONResponse(analytics)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An internal error occurred while computing analytics: {str(e)}")
+
+@router.get("/history")
+async def get_portfolio_history(
+    start: Optional[str] = Query(None, description="First day (YYYY-MM-DD); defaults to one year before end"),
+    end: Optional[str] = Query(None, description="Last day (YYYY-MM-DD); defaults to today"),
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager),
+    portfolio: str = PORTFOLIO_QUERY
+):
+    """Get the daily value, cost and PnL series of a portfolio"""
+    try:
+        return FastJSONResponse(await portfolio_manager.get_portfolio_history(start, end, portfolio))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An internal error occurred while building portfolio history: {str(e)}")
+
+@router.post("/import")
+async def import_portfolio(
+    request: Request,
+    format: Optional[str] = Query(None, description="'csv' or 'ndjson'; defaults from Content-Type"),
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager),
+    portfolio: str = PORTFOLIO_QUERY
+):
+    """Bulk-import lots from a streamed CSV (ticker,shares,price,purchased_at header) or NDJSON body"""
+    try:
+        fmt = resolve_format(format, request.headers.get("content-type"))
+        return await portfolio_manager.import_lots(request.stream(), fmt, portfolio)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An internal error occurred while importing: {str(e)}")
+
+@router.get("/export")
+async def export_portfolio(
+    format: str = Query("csv", description="'csv' or 'ndjson'"),
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager),
+    portfolio: str = PORTFOLIO_QUERY
+):
+    """Stream every lot of a portfolio as CSV or NDJSON"""
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    return StreamingResponse(
+        portfolio_manager.export_lots(format, portfolio),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{portfolio}.{format}"'}
+    )
+
+@router.delete("/lots/{lot_id}")
+async def remove_lot_from_portfolio(
+    lot_id: int,
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager),
+    portfolio: str = PORTFOLIO_QUERY
+):
+    """Remove a single lot from a portfolio"""
+    try:
+        removed = await portfolio_manager.remove_lot(lot_id, portfolio)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"Lot {lot_id} not found in {portfolio}")
+    return {"message": f"Removed lot {lot_id} from {portfolio}", "success": True}
+
+@router.get("/{ticker}/lots")
+async def get_stock_lots(
+    ticker: str,
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager),
+    portfolio: str = PORTFOLIO_QUERY
+):
+    """Get the individual lots held for a ticker"""
+    try:
+        return {"lots": await portfolio_manager.get_lots(ticker, portfolio)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.delete("/{ticker}")
-async def remove_stock_from_portfolio(ticker: str):
-    """Remove stock from portfolio"""
+async def remove_stock_from_portfolio(
+    ticker: str,
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager),
+    portfolio: str = PORTFOLIO_QUERY
+):
+    """Remove stock (all of its lots) from portfolio"""
     try:
-        # This would need to be implemented in your portfolio manager
-        return {"message": f"Removed {ticker} from portfolio", "success": True}
+        removed = await portfolio_manager.remove_stock(ticker, portfolio)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"{ticker.upper()} is not in {portfolio}")
+    return {"message": f"Removed {ticker.upper()} from portfolio", "success": True, "lots_removed": removed}
 
 @router.get("/holdings")
-async def get_portfolio_holdings():
+async def get_portfolio_holdings(
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager),
+    portfolio: str = PORTFOLIO_QUERY
+):
     """Get detailed portfolio holdings"""
     try:
-        summary = await portfolio_manager_instance.get_portfolio_summary()
-        return {"holdings": summary.holdings}
+        return FastJSONResponse(await portfolio_manager.get_holdings(portfolio))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Legacy endpoint for backward compatibility
 @router.get("/")
-async def get_portfolio_view():
+async def get_portfolio_view(
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager),
+    portfolio: str = PORTFOLIO_QUERY
+):
     """Legacy endpoint for portfolio summary"""
-    return await get_portfolio_summary()
+    return await get_portfolio_summary(portfolio_manager, portfolio)
@@ -1,45 +1,170 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
+from typing import Any, Dict, List, Literal, Optional
 import asyncio
 import json
 import plotly.graph_objs as go
-import yfinance as yf
 import pandas as pd
 
 from services.yahoo_finance_service import YahooFinanceService
 from services.polygon_service import PolygonService
 from services.sec_service import SECService
-from models.stock_models import StockInfoResponse, StockDetails, SECFiling, StockQuote, StockInfo, ChartData
-from core.http_client import HttpClient
+from services.indicators import parse_indicators
+from services.bar_store import SUPPORTED_PERIODS, Interval
+from models.stock_models import StockInfoResponse, StockDetails, SECFiling, StockQuote, StockInfo, ChartData, BatchQuoteResponse
+from core.quote_hub import QuoteHub
+from core.quote_resolver import QuoteResolver
+from core.responses import FastJSONResponse
+from core.dependencies import get_yahoo_service, get_polygon_service, get_sec_service, get_quote_hub, get_quote_resolver
 from config import settings
 
 router = APIRouter(
     prefix="/stocks",
-    tags=["stocks"]
+    tags=["stocks"],
+    default_response_class=FastJSONResponse
 )
 
-# Initialize services
-http_client = HttpClient()
-yahoo_service = YahooFinanceService(http_client)
-polygon_service = PolygonService(http_client)
-sec_service = SECService(http_client)
+def _parse_tickers(tickers: str) -> List[str]:
+    symbols = []
+    for ticker in tickers.split(","):
+        symbol = ticker.strip().upper()
+        if symbol and symbol not in symbols:
+            symbols.append(symbol)
+    return symbols
+
+def _check_period(period: str):
+    if period not in SUPPORTED_PERIODS:
+        raise HTTPException(status_code=400, detail=f"Unsupported period {period!r}; use one of {', '.join(SUPPORTED_PERIODS)}")
+
+def _build_plotly_chart(ticker: str, payload: Dict[str, List]) -> Dict[str, Any]:
+    """Build a Plotly candlestick figure dict from a columnar chart payload"""
+    fig = go.Figure(data=[go.Candlestick(
+        x=pd.to_datetime(payload['t'], unit='s'),
+        open=payload['o'],
+        high=payload['h'],
+        low=payload['l'],
+        close=payload['c']
+    )])
+    fig.update_layout(title=f"{ticker.upper()} Stock Chart")
+    return json.loads(fig.to_json())
+
+@router.get("/quotes", response_model=BatchQuoteResponse)
+async def get_stock_quotes(
+    tickers: str = Query(..., description="Comma-separated tickers"),
+    yahoo_service: YahooFinanceService = Depends(get_yahoo_service)
+):
+    """Get quotes for many tickers in as few upstream requests as possible"""
+    symbols = _parse_tickers(tickers)
+    if not symbols:
+        raise HTTPException(status_code=400, detail="No tickers provided")
+    if len(symbols) > settings.BATCH_QUOTE_MAX_TICKERS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BATCH_QUOTE_MAX_TICKERS} tickers per request")
+
+    try:
+        quotes = await yahoo_service.get_stock_quotes(symbols)
+        return FastJSONResponse({
+            "quotes": {symbol: quote for symbol, quote in quotes.items() if quote},
+            "missing": [symbol for symbol, quote in quotes.items() if not quote]
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/ciks")
+async def get_ciks(
+    tickers: str = Query(..., description="Comma-separated tickers"),
+    sec_service: SECService = Depends(get_sec_service)
+):
+    """Get SEC CIKs for many tickers at once"""
+    symbols = _parse_tickers(tickers)
+    if not symbols:
+        raise HTTPException(status_code=400, detail="No tickers provided")
+
+    try:
+        return {"ciks": await sec_service.get_ciks_from_tickers(symbols)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/companies/search")
+async def search_companies(
+    q: str = Query(..., min_length=2, description="Part of a company name"),
+    limit: int = Query(10, ge=1, le=100),
+    sec_service: SECService = Depends(get_sec_service)
+):
+    """Search SEC registrants by company name"""
+    try:
+        return {"results": await sec_service.search_companies(q, limit)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/companies/{cik}")
+async def get_company(cik: str, sec_service: SECService = Depends(get_sec_service)):
+    """Get the company name and tickers registered under a CIK"""
+    if not cik.isdigit():
+        raise HTTPException(status_code=400, detail="CIK must be numeric")
+    try:
+        company = await sec_service.get_company(cik)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if company is None:
+        raise HTTPException(status_code=404, detail=f"No company found for CIK {cik}")
+    return company
+
+@router.get("/indicators")
+async def get_batch_indicators(
+    tickers: str = Query(..., description="Comma-separated tickers"),
+    names: str = Query(..., description="Comma-separated indicators, e.g. rsi14,ema20,sma50,bb20,macd,vwap"),
+    period: str = Query("1y", description="Chart period"),
+    interval: Interval = Query("1d", description="Bar interval"),
+    yahoo_service: YahooFinanceService = Depends(get_yahoo_service)
+):
+    """Get the same technical indicators for many tickers"""
+    symbols = _parse_tickers(tickers)
+    if not symbols:
+        raise HTTPException(status_code=400, detail="No tickers provided")
+    if len(symbols) > settings.INDICATOR_BATCH_MAX_TICKERS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.INDICATOR_BATCH_MAX_TICKERS} tickers per request")
+
+    try:
+        indicators = parse_indicators(names)
+        results = await asyncio.gather(
+            *(yahoo_service.get_indicators(symbol, indicators, period, interval) for symbol in symbols),
+            return_exceptions=True
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    for symbol, result in zip(symbols, results):
+        if isinstance(result, ValueError):
+            raise HTTPException(status_code=400, detail=str(result))
+        if isinstance(result, Exception):
+            print(f"Indicator error for {symbol}: {result}")
+    return FastJSONResponse({
+        "period": period,
+        "interval": interval,
+        "results": {symbol: result for symbol, result in zip(symbols, results) if isinstance(result, dict)},
+        "missing": [symbol for symbol, result in zip(symbols, results) if not isinstance(result, dict)]
+    })
 
 @router.get("/{ticker}/info", response_model=StockInfoResponse)
-async def get_full_stock_info(ticker: str):
-    """Get comprehensive stock information with chart data"""
+async def get_full_stock_info(
+    ticker: str,
+    plotly: bool = Query(False, description="Also include a Plotly candlestick figure in chart_json"),
+    yahoo_service: YahooFinanceService = Depends(get_yahoo_service),
+    polygon_service: PolygonService = Depends(get_polygon_service),
+    sec_service: SECService = Depends(get_sec_service)
+):
+    """Get comprehensive stock information with a compact columnar chart"""
     try:
         # Concurrently fetch all data
         yf_info_task = yahoo_service.get_stock_info(ticker)
         polygon_details_task = polygon_service.get_ticker_details(ticker)
         sec_filings_task = sec_service.get_stock_sec_filings(ticker, count=3)
         
-        # Chart data using yfinance in executor
-        chart_json_task = yahoo_service._run_in_executor(
-            lambda t: yf.Ticker(t).history(period="1y"), ticker
-        )
+        # Cached compact chart built from the local bar store
+        chart_task = yahoo_service.get_chart_payload(ticker, "1y")
 
-        yf_info, polygon_details, sec_data, chart_history_df = await asyncio.gather(
-            yf_info_task, polygon_details_task, sec_filings_task, chart_json_task
+        yf_info, polygon_details, sec_data, chart_payload = await asyncio.gather(
+            yf_info_task, polygon_details_task, sec_filings_task, chart_task
         )
 
         if not yf_info and not polygon_details:
@@ -84,24 +209,17 @@ async def get_full_stock_info(ticker: str):
                         accessionNumber=filing.get("accessionNumber")
                     ))
 
-        # Chart (Plotly to JSON)
+        # Plotly figure only on request, built off the event loop
         plotly_chart_json = None
-        if isinstance(chart_history_df, pd.DataFrame) and not chart_history_df.empty:
-            fig = go.Figure(data=[go.Candlestick(
-                x=chart_history_df.index,
-                open=chart_history_df['Open'],
-                high=chart_history_df['High'],
-                low=chart_history_df['Low'],
-                close=chart_history_df['Close']
-            )])
-            fig.update_layout(title=f"{ticker.upper()} Stock Chart")
-            plotly_chart_json = json.loads(fig.to_json())
+        if plotly and chart_payload:
+            plotly_chart_json = await yahoo_service.executor.run(_build_plotly_chart, ticker, chart_payload)
 
         return StockInfoResponse(
             general_information=general_info,
             market_data=market_data,
             financial_metrics=financial_metrics,
             recent_sec_filings=filings_models,
+            chart=chart_payload,
             chart_json=plotly_chart_json
         )
         
@@ -109,53 +227,186 @@ async def get_full_stock_info(ticker: str):
         raise HTTPException(status_code=500, detail=f"Error fetching stock info: {str(e)}")
 
 @router.get("/{ticker}/quote", response_model=StockQuote)
-async def get_stock_quote(ticker: str):
-    """Get stock quote with fallback sources"""
+async def get_stock_quote(
+    ticker: str,
+    quote_resolver: QuoteResolver = Depends(get_quote_resolver)
+):
+    """Get stock quote from the healthiest provider, hedging to the next one when it is slow"""
     try:
-        # Try Yahoo Finance first
-        quote = await yahoo_service.get_stock_quote(ticker)
+        quote = await quote_resolver.get_quote(ticker)
         if quote:
-            return quote
-        
-        # Fallback to Polygon
-        quote = await polygon_service.get_stock_quote(ticker)
-        if quote:
-            return quote
-            
+            return FastJSONResponse(quote)
+
         raise HTTPException(status_code=404, detail=f"Quote not found for {ticker}")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{ticker}/chart")
-async def get_chart_data(ticker: str, period: str = Query("1mo", description="Chart period")):
-    """Get chart data for stock"""
+async def get_chart_data(
+    request: Request,
+    ticker: str,
+    period: str = Query("1mo", description="Chart period"),
+    since: Optional[int] = Query(None, description="Cursor from a previous response; only bars at or after it are returned"),
+    format: Literal["rows", "columnar"] = Query("rows", description="'rows' (list of bars) or 'columnar' ({t, o, h, l, c, v} arrays)"),
+    yahoo_service: YahooFinanceService = Depends(get_yahoo_service)
+):
+    """Get chart data for stock.
+
+    Responses carry an ETag for the whole series, so an unchanged series costs
+    a 304. With `since`, only new or amended bars are returned for the client
+    to merge into what it already has.
+    """
+    _check_period(period)
     try:
-        # First try Yahoo Finance
-        data = await yahoo_service.get_chart_data(ticker, period)
-        if not data:  # Fallback to direct yfinance if empty
-            history = yf.Ticker(ticker).history(period=period)
-            if not history.empty:
-                data = history.reset_index().to_dict("records")
-        
+        # First try Yahoo Finance via the local bar store
+        bars = await yahoo_service.get_bars(ticker, period)
+        if len(bars):
+            # Full and delta bodies are different representations, so the cursor is part of the tag
+            delta = f"-since{since}" if since is not None else ""
+            etag = f'W/"{ticker.upper()}-{period}-{format}{delta}-{bars.version()}"'
+            if request.headers.get("if-none-match") == etag:
+                return Response(status_code=304, headers={"ETag": etag})
+
+            cursor = int(bars["t"][-1])
+            if since is not None:
+                bars = bars.since(since)
+
+            if format == "columnar":
+                content = yahoo_service.chart_columns_from_bars(bars)
+            else:
+                content = {"data": yahoo_service.chart_rows_from_bars(bars)}
+            content["cursor"] = cursor
+            content["delta"] = since is not None
+            return FastJSONResponse(content, headers={"ETag": etag})
+
+        # Fallback to yfinance (batched and off the event loop) if the store has nothing
+        data = await yahoo_service.get_history_records(ticker, period)
         if not data:
             raise HTTPException(status_code=404, detail="No chart data available")
-            
+
         return {"data": data}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
+@router.get("/{ticker}/indicators")
+async def get_indicators(
+    ticker: str,
+    names: str = Query(..., description="Comma-separated indicators, e.g. rsi14,ema20,sma50,bb20,macd,vwap"),
+    period: str = Query("1y", description="Chart period"),
+    interval: Interval = Query("1d", description="Bar interval"),
+    yahoo_service: YahooFinanceService = Depends(get_yahoo_service)
+):
+    """Get technical indicators computed server-side over the stored bars.
+
+    Values are arrays aligned with `t`; multi-line indicators (bb, macd)
+    return an object of arrays. Bars before an indicator has enough history
+    are null.
+    """
+    try:
+        result = await yahoo_service.get_indicators(ticker, parse_indicators(names), period, interval)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if result is None:
+        raise HTTPException(status_code=404, detail="No chart data available")
+    return FastJSONResponse({"ticker": ticker.upper(), "period": period, "interval": interval, **result})
+
 @router.get("/{ticker}/sec")
-async def get_sec_filings(ticker: str, count: int = Query(5, description="Number of filings to return")):
+async def get_sec_filings(
+    ticker: str,
+    count: int = Query(5, description="Number of filings to return"),
+    form_types: Optional[str] = Query(None, description="Comma-separated form types, e.g. 10-K,8-K"),
+    sec_service: SECService = Depends(get_sec_service)
+):
     """Get SEC filings for ticker"""
     try:
-        filings = await sec_service.get_stock_sec_filings(ticker, count=count)
+        forms = [form.strip().upper() for form in form_types.split(",") if form.strip()] if form_types else None
+        filings = await sec_service.get_stock_sec_filings(ticker, form_types=forms, count=count)
         return {"filings": filings}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.websocket("/stream")
+async def stream_quotes(websocket: WebSocket, quote_hub: QuoteHub = Depends(get_quote_hub)):
+    """Stream quote updates. Clients send {"action": "subscribe" | "unsubscribe", "tickers": [...]}"""
+    await websocket.accept()
+    subscriber = quote_hub.connect()
+
+    async def send_updates():
+        while True:
+            message = await subscriber.queue.get()
+            await websocket.send_json(message)
+
+    send_task = asyncio.create_task(send_updates())
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+                action = message.get("action")
+                tickers = [str(t) for t in message.get("tickers", [])]
+            except (ValueError, AttributeError, TypeError):
+                await websocket.send_json({"type": "error", "message": "Invalid message"})
+                continue
+
+            if action == "subscribe":
+                for symbol in _parse_tickers(",".join(tickers)):
+                    if len(subscriber.symbols) >= settings.STREAM_MAX_TICKERS_PER_CLIENT:
+                        await websocket.send_json({"type": "error", "message": "Subscription limit reached"})
+                        break
+                    quote_hub.subscribe(subscriber, symbol)
+            elif action == "unsubscribe":
+                for symbol in _parse_tickers(",".join(tickers)):
+                    quote_hub.unsubscribe(subscriber, symbol)
+            else:
+                await websocket.send_json({"type": "error", "message": f"Unknown action: {action}"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        send_task.cancel()
+        quote_hub.disconnect(subscriber)
+
+@router.get("/stream/sse")
+async def stream_quotes_sse(
+    request: Request,
+    tickers: str = Query(..., description="Comma-separated tickers"),
+    quote_hub: QuoteHub = Depends(get_quote_hub)
+):
+    """Server-sent events fallback for clients that cannot use the WebSocket stream"""
+    symbols = _parse_tickers(tickers)[:settings.STREAM_MAX_TICKERS_PER_CLIENT]
+    if not symbols:
+        raise HTTPException(status_code=400, detail="No tickers provided")
+
+    async def event_stream():
+        subscriber = quote_hub.connect()
+        for symbol in symbols:
+            quote_hub.subscribe(subscriber, symbol)
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), timeout=15)
+                    yield f"data: {json.dumps(message)}\n\n"
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+        finally:
+            quote_hub.disconnect(subscriber)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Legacy endpoints for backward compatibility
 @router.get("/{ticker}")
-async def get_stock_info(ticker: str):
+async def get_stock_info(ticker: str, yahoo_service: YahooFinanceService = Depends(get_yahoo_service)):
     """Legacy endpoint for stock info"""
     try:
         info = await yahoo_service.get_stock_info(ticker)
@@ -0,0 +1,254 @@
+import asyncio
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Literal, Optional, Tuple, get_args
+import numpy as np
+from config import settings
+
+COLUMNS = ("t", "o", "h", "l", "c", "v")
+DTYPES = {"t": np.int64, "o": np.float64, "h": np.float64, "l": np.float64, "c": np.float64, "v": np.int64}
+
+# Short periods cover a window of calendar days and are then trimmed to the
+# last N sessions, matching Yahoo's range=1d/5d across weekends and holidays
+PERIOD_DAYS = {
+    "1d": 7, "5d": 12, "1mo": 31, "3mo": 92, "6mo": 183,
+    "1y": 366, "2y": 731, "5y": 1827, "10y": 3653
+}
+PERIOD_SESSIONS = {"1d": 1, "5d": 5}
+SUPPORTED_PERIODS = tuple(PERIOD_DAYS) + ("ytd", "max")
+
+# Bar sizes both providers serve; the interval also names a store directory
+Interval = Literal["1h", "1d", "1wk", "1mo"]
+SUPPORTED_INTERVALS = get_args(Interval)
+TICKER_PATTERN = re.compile(r"^[A-Z0-9^][A-Z0-9.^=-]{0,19}$")
+
+# fetch(ticker, interval, start_ts, end_ts) -> column dict or None
+BarFetcher = Callable[[str, str, int, int], Awaitable[Optional[Dict[str, np.ndarray]]]]
+
+
+def period_start(period: str, now: Optional[float] = None) -> int:
+    """Epoch seconds at which a Yahoo-style period (1mo, 1y, ytd, max...) begins"""
+    now = time.time() if now is None else now
+    if period == "max":
+        return 0
+    if period == "ytd":
+        return int(datetime(datetime.fromtimestamp(now).year, 1, 1).timestamp())
+    if period not in PERIOD_DAYS:
+        raise ValueError(f"Unsupported period: {period}")
+    return int((datetime.fromtimestamp(now) - timedelta(days=PERIOD_DAYS[period])).timestamp())
+
+
+def window_start(series: "BarSeries", period: str, interval: str = "1d") -> int:
+    """Index of the first bar inside a period within a series covering it"""
+    index = series.index_of(period_start(period))
+    if interval == "1d" and period in PERIOD_SESSIONS:
+        index = max(index, len(series) - PERIOD_SESSIONS[period])
+    return index
+
+
+class BarSeries:
+    """Parallel OHLCV arrays sorted by timestamp"""
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.columns["t"])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    @classmethod
+    def empty(cls) -> "BarSeries":
+        return cls({name: np.empty(0, dtype=DTYPES[name]) for name in COLUMNS})
+
+    def since(self, start_ts: int) -> "BarSeries":
+        """Slice bars at or after start_ts without copying"""
+        return self.from_index(self.index_of(start_ts))
+
+    def version(self) -> str:
+        """Cheap fingerprint of the series; only the head (backfill) and tail (refresh) ever change"""
+        if not len(self):
+            return "empty"
+        last = tuple(float(self.columns[name][-1]) for name in COLUMNS)
+        return f"{len(self)}-{int(self.columns['t'][0])}-{hash(last) & 0xffffffff:08x}"
+
+    def index_of(self, start_ts: int) -> int:
+        return int(np.searchsorted(self.columns["t"], start_ts, side="left"))
+
+    def from_index(self, index: int) -> "BarSeries":
+        return BarSeries({name: values[index:] for name, values in self.columns.items()})
+
+    def merge(self, update: Dict[str, np.ndarray]) -> "BarSeries":
+        """Return a new series with update's bars added; update wins on equal timestamps"""
+        if len(update["t"]) == 0:
+            return self
+        keep = ~np.isin(self.columns["t"], update["t"])
+        merged = {
+            name: np.concatenate([np.asarray(self.columns[name])[keep], update[name].astype(DTYPES[name])])
+            for name in COLUMNS
+        }
+        order = np.argsort(merged["t"], kind="stable")
+        return BarSeries({name: values[order] for name, values in merged.items()})
+
+
+class BarStore:
+    """On-disk OHLCV history per ticker/interval that only fetches what it is missing.
+
+    Each series is stored as one .npy file per column and memory-mapped on
+    read. A request for any period is served by slicing local arrays; the
+    provider is only asked for older history not yet covered (once) and for
+    the tail since the last stored bar (at most every refresh_ttl seconds,
+    BAR_REFRESH_TTL by default). After a failed fetch the series is served as
+    stored for BAR_FETCH_RETRY_INTERVAL seconds before the provider is retried.
+    """
+
+    def __init__(self, fetch: BarFetcher, directory: str = settings.BAR_STORE_DIR, refresh_ttl: Optional[int] = None):
+        self.fetch = fetch
+        self.directory = directory
+        self.refresh_ttl = refresh_ttl
+        self._series: "OrderedDict[Tuple[str, str], Tuple[BarSeries, Dict[str, Any]]]" = OrderedDict()
+        # One lock per series with its number of holders and waiters, dropped when the last one leaves
+        self._locks: Dict[Tuple[str, str], List[Any]] = {}
+        self._failed_at: Dict[Tuple[str, str], float] = {}
+        self.local_hits = 0
+        self.tail_fetches = 0
+        self.backfills = 0
+        self.failed_fetches = 0
+
+    async def get_bars(self, ticker: str, period: str = "1mo", interval: str = "1d", refresh: bool = True) -> BarSeries:
+        series = await self.get_series(ticker, period_start(period), interval, refresh)
+        return series.from_index(window_start(series, period, interval))
+
+    async def get_series(self, ticker: str, start_ts: int, interval: str = "1d", refresh: bool = True) -> BarSeries:
+        """Get the whole stored series for a ticker/interval, covering at least start_ts onwards.
+
+        With refresh=False a stale tail is served as stored; missing history is
+        still fetched.
+        """
+        key = (ticker.upper(), interval)
+        # Both parts name directories, so never let a request pick an arbitrary path
+        if interval not in SUPPORTED_INTERVALS or not TICKER_PATTERN.match(key[0]):
+            raise ValueError(f"Unsupported bar series: {ticker} {interval}")
+
+        async with self._locked(key):
+            series, meta = await self._load(key)
+            changed = False
+            now = int(time.time())
+            can_fetch = now - self._failed_at.get(key, 0) >= settings.BAR_FETCH_RETRY_INTERVAL
+
+            covered_from = meta.get("covered_from")
+            if can_fetch and (covered_from is None or start_ts < covered_from):
+                # Backfill history older than anything stored so far
+                end_ts = covered_from if covered_from is not None else now
+                update = await self.fetch(key[0], interval, start_ts, end_ts)
+                if update is not None:
+                    self.backfills += 1
+                    series = series.merge(update)
+                    meta["covered_from"] = start_ts
+                    if covered_from is None:
+                        meta["refreshed_at"] = now
+                    changed = True
+                    self._failed_at.pop(key, None)
+                else:
+                    self._failed(key, now)
+                    can_fetch = False
+
+            ttl = settings.BAR_REFRESH_TTL if self.refresh_ttl is None else self.refresh_ttl
+            stale = now - meta.get("refreshed_at", 0) > ttl
+            if refresh and stale and can_fetch and meta.get("covered_from") is not None:
+                # Refetch from the last stored bar so it can be amended, plus any new bars
+                last_ts = int(series["t"][-1]) if len(series) else meta["covered_from"]
+                update = await self.fetch(key[0], interval, last_ts, now)
+                if update is not None:
+                    self.tail_fetches += 1
+                    series = series.merge(update)
+                    meta["refreshed_at"] = now
+                    changed = True
+                    self._failed_at.pop(key, None)
+                else:
+                    self._failed(key, now)
+            elif not changed:
+                self.local_hits += 1
+
+            if changed:
+                series = await asyncio.to_thread(self._write, key, series, meta)
+            self._remember(key, series, meta)
+
+        return series
+
+    @asynccontextmanager
+    async def _locked(self, key: Tuple[str, str]) -> AsyncIterator[None]:
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+
+    def _failed(self, key: Tuple[str, str], now: float):
+        """Remember a failed fetch so the provider is not retried on every call"""
+        self.failed_fetches += 1
+        self._failed_at[key] = now
+
+    async def _load(self, key: Tuple[str, str]) -> Tuple[BarSeries, Dict[str, Any]]:
+        cached = self._series.get(key)
+        if cached is not None:
+            self._series.move_to_end(key)
+            return cached[0], dict(cached[1])
+        return await asyncio.to_thread(self._read, key)
+
+    def _remember(self, key: Tuple[str, str], series: BarSeries, meta: Dict[str, Any]):
+        self._series[key] = (series, meta)
+        self._series.move_to_end(key)
+        while len(self._series) > settings.BAR_STORE_MAX_LOADED:
+            self._series.popitem(last=False)
+
+    def _path(self, key: Tuple[str, str]) -> str:
+        ticker, interval = key
+        return os.path.join(self.directory, interval, ticker)
+
+    def _read(self, key: Tuple[str, str]) -> Tuple[BarSeries, Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(os.path.join(path, "meta.json"), "r") as f:
+                meta = json.load(f)
+            columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in COLUMNS}
+            return BarSeries(columns), meta
+        except (OSError, ValueError):
+            return BarSeries.empty(), {}
+
+    def _write(self, key: Tuple[str, str], series: BarSeries, meta: Dict[str, Any]) -> BarSeries:
+        """Persist all columns atomically and return the memory-mapped result"""
+        path = self._path(key)
+        os.makedirs(path, exist_ok=True)
+        for name in COLUMNS:
+            tmp_path = os.path.join(path, f"{name}.tmp.npy")
+            np.save(tmp_path, np.ascontiguousarray(series[name], dtype=DTYPES[name]))
+            os.replace(tmp_path, os.path.join(path, f"{name}.npy"))
+
+        tmp_path = os.path.join(path, "meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(path, "meta.json"))
+
+        return BarSeries({name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in COLUMNS})
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded_series": len(self._series),
+            "local_hits": self.local_hits,
+            "tail_fetches": self.tail_fetches,
+            "backfills": self.backfills,
+            "failed_fetches": self.failed_fetches
+        }
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+from core.http_client import HttpClient
+from config import settings
+
+
+class CikIndex:
+    """Ticker -> CIK index built from SEC's company_tickers.json.
+
+    The index is loaded once into dicts, persisted to disk so restarts do not
+    need a download, and refreshed in the background with conditional GETs.
+    """
+
+    SOURCE_URL = "https://www.sec.gov/files/company_tickers.json"
+
+    def __init__(self, http_client: HttpClient, path: str = settings.SEC_TICKER_INDEX_PATH):
+        self.http_client = http_client
+        self.path = path
+        self.by_ticker: Dict[str, str] = {}
+        self.by_cik: Dict[str, List[str]] = {}
+        self.titles: Dict[str, str] = {}
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.fetched_at = 0.0
+        self._loaded = False
+        self._failed_at: Optional[float] = None
+        self._load_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _retry_pending(self) -> bool:
+        """A failed initial download is not retried until SEC_TICKER_INDEX_RETRY_INTERVAL has passed"""
+        return self._failed_at is not None and time.monotonic() - self._failed_at < settings.SEC_TICKER_INDEX_RETRY_INTERVAL
+
+    async def ensure_loaded(self):
+        """Load the index from disk, or download it if there is no usable local copy"""
+        if self._loaded or self._retry_pending():
+            return
+
+        async with self._load_lock:
+            if self._loaded or self._retry_pending():
+                return
+
+            companies = await asyncio.to_thread(self._read_file)
+            if companies:
+                self._build(companies)
+            else:
+                await self.refresh()
+                if not self._loaded:
+                    # Lookups find nothing until the retry interval passes instead of each re-downloading
+                    self._failed_at = time.monotonic()
+
+    async def refresh(self) -> bool:
+        """Revalidate against SEC; only rebuilds and persists when the file changed"""
+        headers = {"User-Agent": settings.SEC_USER_AGENT}
+        status, data, validators = await self.http_client.make_conditional_request(
+            self.SOURCE_URL, headers=headers, etag=self.etag, last_modified=self.last_modified
+        )
+
+        if status == 304:
+            self.fetched_at = time.time()
+            return False
+        if not data:
+            return False
+
+        companies = [
+            [item["ticker"].upper(), str(item["cik_str"]).zfill(10), item.get("title", "")]
+            for item in data.values()
+            if item.get("ticker") and item.get("cik_str") is not None
+        ]
+        self.etag = validators.get("etag")
+        self.last_modified = validators.get("last_modified")
+        self.fetched_at = time.time()
+        self._build(companies)
+        await asyncio.to_thread(self._write_file, companies)
+        return True
+
+    def start_background_refresh(self):
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        try:
+            await self.ensure_loaded()
+        except Exception as e:
+            print(f"Error loading SEC ticker index: {e}")
+
+        while True:
+            # Failed refreshes leave fetched_at untouched, so they are retried after a minute
+            delay = max(60.0, self.fetched_at + settings.SEC_TICKER_INDEX_REFRESH - time.time())
+            await asyncio.sleep(delay)
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Error refreshing SEC ticker index: {e}")
+
+    async def close(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+
+    def _build(self, companies: List[List[str]]):
+        by_ticker = {}
+        by_cik: Dict[str, List[str]] = {}
+        titles = {}
+        for ticker, cik, title in companies:
+            # company_tickers.json is ordered by relevance; keep the first mapping
+            by_ticker.setdefault(ticker, cik)
+            by_cik.setdefault(cik, []).append(ticker)
+            titles.setdefault(cik, title)
+
+        self.by_ticker, self.by_cik, self.titles = by_ticker, by_cik, titles
+        self._loaded = True
+        self._failed_at = None
+
+    def _read_file(self) -> Optional[List[List[str]]]:
+        try:
+            with open(self.path, "r") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        self.etag = stored.get("etag")
+        self.last_modified = stored.get("last_modified")
+        self.fetched_at = stored.get("fetched_at", 0.0)
+        return stored.get("companies")
+
+    def _write_file(self, companies: List[List[str]]):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "etag": self.etag,
+                "last_modified": self.last_modified,
+                "fetched_at": self.fetched_at,
+                "companies": companies
+            }, f)
+        os.replace(tmp_path, self.path)
+
+    async def get_cik(self, ticker: str) -> Optional[str]:
+        await self.ensure_loaded()
+        return self.by_ticker.get(ticker.upper())
+
+    async def get_ciks(self, tickers: List[str]) -> Dict[str, Optional[str]]:
+        await self.ensure_loaded()
+        return {ticker.upper(): self.by_ticker.get(ticker.upper()) for ticker in tickers}
+
+    async def get_tickers(self, cik: str) -> List[str]:
+        await self.ensure_loaded()
+        return list(self.by_cik.get(str(cik).zfill(10), []))
+
+    async def get_title(self, cik: str) -> Optional[str]:
+        await self.ensure_loaded()
+        return self.titles.get(str(cik).zfill(10))
+
+    async def search_titles(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Case-insensitive substring search over company names"""
+        await self.ensure_loaded()
+        query = query.lower()
+        results = []
+        for cik, title in self.titles.items():
+            if query in title.lower():
+                results.append({"cik": cik, "title": title, "tickers": self.by_cik.get(cik, [])})
+                if len(results) >= limit:
+                    break
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tickers": len(self.by_ticker),
+            "companies": len(self.titles),
+            "fetched_at": self.fetched_at,
+            "etag": self.etag,
+            "load_failed": self._failed_at is not None
+        }
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import os
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+from config import settings
+
+FundamentalsFetcher = Callable[[str], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class FundamentalsStore:
+    """Slow-changing company fundamentals with stale-while-revalidate and on-disk persistence.
+
+    Entries are served as long as they exist: once past their expiry the
+    stale value is returned immediately and a single background task per
+    symbol refetches it. Only symbols never seen before wait for upstream.
+    Each entry is kept in a JSON file so a restart starts warm, and expiry
+    times carry jitter so entries written together do not expire together.
+    """
+
+    def __init__(self, fetch: FundamentalsFetcher, directory: str = settings.FUNDAMENTALS_DIR):
+        self.fetch = fetch
+        self.directory = directory
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.disk_loads = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    async def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(symbol)
+        if entry is None:
+            # Concurrent callers for a symbol not in memory share one disk read / fetch
+            task = self._loading.get(symbol)
+            if task is None:
+                task = self._loading[symbol] = asyncio.create_task(self._load(symbol))
+            else:
+                self.coalesced += 1
+            return await asyncio.shield(task)
+
+        self._entries.move_to_end(symbol)
+        return self._serve(symbol, entry)
+
+    def _serve(self, symbol: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        if time.time() < entry["expires_at"]:
+            self.fresh_hits += 1
+        else:
+            self.stale_hits += 1
+            self._refresh_task(symbol)
+        return entry["data"]
+
+    async def _load(self, symbol: str) -> Optional[Dict[str, Any]]:
+        try:
+            entry = await asyncio.to_thread(self._read_file, symbol)
+            if entry is not None:
+                self.disk_loads += 1
+                self._remember(symbol, entry)
+                return self._serve(symbol, entry)
+
+            # Nothing to serve yet, so this caller has to wait for upstream
+            self.misses += 1
+            return await self._refresh_task(symbol)
+        finally:
+            self._loading.pop(symbol, None)
+
+    def _refresh_task(self, symbol: str) -> asyncio.Task:
+        task = self._refreshing.get(symbol)
+        if task is None:
+            task = self._refreshing[symbol] = asyncio.create_task(self._refresh(symbol))
+        return task
+
+    async def _refresh(self, symbol: str) -> Optional[Dict[str, Any]]:
+        try:
+            data = await self.fetch(symbol)
+            now = time.time()
+            if data is None:
+                self.refresh_failures += 1
+                entry = self._entries.get(symbol)
+                if entry is not None:
+                    # Keep serving the stale value, but do not refetch on every request
+                    entry["expires_at"] = now + settings.FUNDAMENTALS_RETRY_INTERVAL
+                    return entry["data"]
+                return None
+
+            self.refreshes += 1
+            ttl = settings.FUNDAMENTALS_TTL * (1 + random.uniform(0, settings.FUNDAMENTALS_TTL_JITTER))
+            entry = {"fetched_at": now, "expires_at": now + ttl, "data": data}
+            self._remember(symbol, entry)
+            await asyncio.to_thread(self._write_file, symbol, entry)
+            return data
+        except Exception as e:
+            print(f"Fundamentals refresh error for {symbol}: {e}")
+            return None
+        finally:
+            self._refreshing.pop(symbol, None)
+
+    def _remember(self, symbol: str, entry: Dict[str, Any]):
+        self._entries[symbol] = entry
+        self._entries.move_to_end(symbol)
+        while len(self._entries) > settings.FUNDAMENTALS_MAX_LOADED:
+            self._entries.popitem(last=False)
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.directory, f"{symbol}.json")
+
+    def _read_file(self, symbol: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(symbol), "r") as f:
+                entry = json.load(f)
+            return entry if isinstance(entry.get("data"), dict) and "expires_at" in entry else None
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _write_file(self, symbol: str, entry: Dict[str, Any]):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(symbol)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.fresh_hits + self.stale_hits + self.misses + self.coalesced
+        return {
+            "loaded": len(self._entries),
+            "fresh_hits": self.fresh_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "disk_loads": self.disk_loads,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "refreshing": len(self._refreshing),
+            "hit_ratio": (self.fresh_hits + self.stale_hits + self.coalesced) / lookups if lookups else 0.0
+        }
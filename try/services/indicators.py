@@ -0,0 +1,376 @@
+import math
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from services.bar_store import BarSeries
+from config import settings
+
+# Internal state of one indicator: full-length float arrays aligned with the bar series
+State = Dict[str, np.ndarray]
+
+# Calendar seconds spanned by one bar, used to fetch warm-up history before a window
+# (an hourly series has seven bars per US session)
+WARMUP_SECONDS_PER_BAR = {"1h": 86400 * 7 / 5 / 7, "1d": 86400 * 7 / 5, "1wk": 7 * 86400, "1mo": 31 * 86400}
+
+
+def ewm(values: np.ndarray, alpha: float, initial: Optional[float] = None) -> np.ndarray:
+    """y[i] = alpha * x[i] + (1 - alpha) * y[i - 1], seeded with x[0] unless initial is given.
+
+    Evaluated in closed form block by block (a scaled cumulative sum), with
+    blocks short enough that decay ** -block stays far from overflowing.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.empty(len(values))
+    if not len(values):
+        return out
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        out[:] = values
+        return out
+
+    block = max(1, min(len(values), int(100 / -math.log10(decay))))
+    offsets = np.arange(block)
+    growth = decay ** -offsets
+    powers = decay ** (offsets + 1)
+    previous = values[0] if initial is None else initial
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        size = len(chunk)
+        # y[j] = decay^(j+1) * previous + alpha * decay^j * sum_{k<=j} decay^-k * x[k]
+        accumulated = np.cumsum(chunk * growth[:size])
+        out[start:start + size] = powers[:size] * previous + alpha * (powers[:size] / decay) * accumulated
+        previous = out[start + size - 1]
+    return out
+
+
+def _mask_warmup(window: np.ndarray, first_valid: int, lo: int) -> np.ndarray:
+    """Set entries of a window starting at bar lo to NaN before bar first_valid (in place)"""
+    if first_valid > lo:
+        window[:first_valid - lo] = np.nan
+    return window
+
+
+class Indicator:
+    """An indicator computed in bulk over a bar series and extended bar by bar.
+
+    `compute` fills the internal state arrays for a whole series with NumPy;
+    `extend` recomputes entries from `start` onwards in O(1) per bar using
+    the entries before it; `window` derives the published outputs for bars
+    from index `lo`.
+    """
+
+    name = ""
+    lookback = 0
+
+    def compute(self, close: np.ndarray, bars: BarSeries) -> State:
+        raise NotImplementedError
+
+    def extend(self, state: State, bars: BarSeries, start: int):
+        raise NotImplementedError
+
+    def window(self, state: State, lo: int) -> Any:
+        raise NotImplementedError
+
+
+class EMA(Indicator):
+    def __init__(self, window: int):
+        self.name = f"ema{window}"
+        self.size = window
+        self.alpha = 2.0 / (window + 1)
+        self.lookback = 4 * window
+
+    def compute(self, close, bars):
+        return {"ema": ewm(close, self.alpha)}
+
+    def extend(self, state, bars, start):
+        ema, close, alpha = state["ema"], bars["c"], self.alpha
+        for i in range(start, len(ema)):
+            ema[i] = close[i] if i == 0 else alpha * close[i] + (1 - alpha) * ema[i - 1]
+
+    def window(self, state, lo):
+        return _mask_warmup(state["ema"][lo:].copy(), self.size - 1, lo)
+
+
+class RSI(Indicator):
+    """Wilder's RSI from smoothed average gains and losses"""
+
+    def __init__(self, window: int):
+        self.name = f"rsi{window}"
+        self.size = window
+        self.alpha = 1.0 / window
+        self.lookback = 10 * window
+
+    def compute(self, close, bars):
+        change = np.diff(close, prepend=close[:1])
+        return {
+            "gain": ewm(np.maximum(change, 0.0), self.alpha, initial=0.0),
+            "loss": ewm(np.maximum(-change, 0.0), self.alpha, initial=0.0)
+        }
+
+    def extend(self, state, bars, start):
+        gain, loss, close, alpha = state["gain"], state["loss"], bars["c"], self.alpha
+        for i in range(start, len(gain)):
+            if i == 0:
+                gain[i] = loss[i] = 0.0
+                continue
+            change = float(close[i]) - float(close[i - 1])
+            gain[i] = alpha * max(change, 0.0) + (1 - alpha) * gain[i - 1]
+            loss[i] = alpha * max(-change, 0.0) + (1 - alpha) * loss[i - 1]
+
+    def window(self, state, lo):
+        gain, loss = state["gain"][lo:], state["loss"][lo:]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = np.where(loss > 0, 100.0 - 100.0 / (1.0 + gain / loss), 100.0)
+        rsi[(gain == 0) & (loss == 0)] = 50.0
+        return _mask_warmup(rsi, self.size, lo)
+
+
+class SMA(Indicator):
+    def __init__(self, window: int):
+        self.name = f"sma{window}"
+        self.size = window
+        self.lookback = window
+
+    def compute(self, close, bars):
+        return {"sum": np.cumsum(close)}
+
+    def extend(self, state, bars, start):
+        total, close = state["sum"], bars["c"]
+        for i in range(start, len(total)):
+            total[i] = (total[i - 1] if i else 0.0) + close[i]
+
+    def _rolling(self, cumulative: np.ndarray, lo: int) -> np.ndarray:
+        """Rolling window sums for bars from lo onwards, NaN until a full window exists"""
+        index = np.arange(lo, len(cumulative))
+        previous = np.where(index >= self.size, cumulative[np.maximum(index - self.size, 0)], 0.0)
+        sums = cumulative[lo:] - previous
+        sums[index < self.size - 1] = np.nan
+        return sums
+
+    def window(self, state, lo):
+        return self._rolling(state["sum"], lo) / self.size
+
+
+class Bollinger(SMA):
+    """Bollinger bands: SMA +/- 2 population standard deviations"""
+
+    def __init__(self, window: int, width: float = 2.0):
+        super().__init__(window)
+        self.name = f"bb{window}"
+        self.width = width
+
+    def compute(self, close, bars):
+        return {"sum": np.cumsum(close), "squares": np.cumsum(close * close)}
+
+    def extend(self, state, bars, start):
+        super().extend(state, bars, start)
+        squares, close = state["squares"], bars["c"]
+        for i in range(start, len(squares)):
+            squares[i] = (squares[i - 1] if i else 0.0) + float(close[i]) ** 2
+
+    def window(self, state, lo):
+        middle = self._rolling(state["sum"], lo) / self.size
+        variance = self._rolling(state["squares"], lo) / self.size - middle * middle
+        deviation = np.sqrt(np.maximum(variance, 0.0))
+        return {
+            "upper": middle + self.width * deviation,
+            "middle": middle,
+            "lower": middle - self.width * deviation
+        }
+
+
+class MACD(Indicator):
+    name = "macd"
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.alphas = (2.0 / (fast + 1), 2.0 / (slow + 1), 2.0 / (signal + 1))
+        self.first_macd = slow - 1
+        self.first_signal = slow + signal - 2
+        self.lookback = 4 * slow + signal
+
+    def compute(self, close, bars):
+        fast_alpha, slow_alpha, signal_alpha = self.alphas
+        fast, slow = ewm(close, fast_alpha), ewm(close, slow_alpha)
+        return {"fast": fast, "slow": slow, "signal": ewm(fast - slow, signal_alpha)}
+
+    def extend(self, state, bars, start):
+        fast, slow, signal, close = state["fast"], state["slow"], state["signal"], bars["c"]
+        fast_alpha, slow_alpha, signal_alpha = self.alphas
+        for i in range(start, len(fast)):
+            if i == 0:
+                fast[i] = slow[i] = close[i]
+                signal[i] = 0.0
+                continue
+            fast[i] = fast_alpha * close[i] + (1 - fast_alpha) * fast[i - 1]
+            slow[i] = slow_alpha * close[i] + (1 - slow_alpha) * slow[i - 1]
+            signal[i] = signal_alpha * (fast[i] - slow[i]) + (1 - signal_alpha) * signal[i - 1]
+
+    def window(self, state, lo):
+        macd = _mask_warmup(state["fast"][lo:] - state["slow"][lo:], self.first_macd, lo)
+        signal = _mask_warmup(state["signal"][lo:].copy(), self.first_signal, lo)
+        return {"macd": macd, "signal": signal, "histogram": macd - signal}
+
+
+class VWAP(Indicator):
+    """Volume-weighted average typical price anchored at the start of the window"""
+
+    name = "vwap"
+
+    def compute(self, close, bars):
+        volume = np.asarray(bars["v"], dtype=np.float64)
+        typical = (np.asarray(bars["h"]) + np.asarray(bars["l"]) + close) / 3.0
+        return {"value": np.cumsum(typical * volume), "volume": np.cumsum(volume)}
+
+    def extend(self, state, bars, start):
+        value, volume = state["value"], state["volume"]
+        for i in range(start, len(value)):
+            bar_volume = float(bars["v"][i])
+            typical = (float(bars["h"][i]) + float(bars["l"][i]) + float(bars["c"][i])) / 3.0
+            value[i] = (value[i - 1] if i else 0.0) + typical * bar_volume
+            volume[i] = (volume[i - 1] if i else 0.0) + bar_volume
+
+    def window(self, state, lo):
+        value, volume = state["value"], state["volume"]
+        base_value = value[lo - 1] if lo else 0.0
+        base_volume = volume[lo - 1] if lo else 0.0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (value[lo:] - base_value) / (volume[lo:] - base_volume)
+
+
+_WINDOWED = {"sma": (SMA, 20), "ema": (EMA, 20), "rsi": (RSI, 14), "bb": (Bollinger, 20)}
+_FIXED = {"macd": MACD, "vwap": VWAP}
+_NAME_PATTERN = re.compile(r"^([a-z]+)(\d*)$")
+
+
+def parse_indicators(names: str) -> List[Indicator]:
+    """Parse a list like "rsi14,ema20,macd" into indicators; raises ValueError on unknown names"""
+    indicators: Dict[str, Indicator] = {}
+    for raw in names.split(","):
+        name = raw.strip().lower()
+        if not name:
+            continue
+        match = _NAME_PATTERN.match(name)
+        kind, digits = match.groups() if match else (name, "")
+        if kind in _WINDOWED:
+            cls, default = _WINDOWED[kind]
+            window = int(digits) if digits else default
+            if not 1 < window <= settings.INDICATOR_MAX_WINDOW:
+                raise ValueError(f"Window for {name} must be between 2 and {settings.INDICATOR_MAX_WINDOW}")
+            indicator = cls(window)
+        elif kind in _FIXED and not digits:
+            indicator = _FIXED[kind]()
+        else:
+            raise ValueError(f"Unknown indicator: {name}")
+        indicators.setdefault(indicator.name, indicator)
+
+    if not indicators:
+        raise ValueError("No indicators requested")
+    return list(indicators.values())
+
+
+def warmup_seconds(indicators: List[Indicator], interval: str) -> int:
+    """Extra history to load before a window so recursive indicators have converged"""
+    lookback = max(indicator.lookback for indicator in indicators)
+    return int(lookback * WARMUP_SECONDS_PER_BAR.get(interval, 0)) + (7 * 86400 if lookback else 0)
+
+
+class _SeriesIndicators:
+    """Indicator state for one ticker/interval and the series it was computed over"""
+
+    def __init__(self):
+        self.version = None
+        self.length = 0
+        self.first_ts = None
+        self.committed_ts = None
+        self.states: Dict[str, State] = {}
+
+    def can_extend(self, bars: BarSeries) -> bool:
+        """True when only the last known bar and newer ones differ from what was computed"""
+        length = self.length
+        return (
+            length >= 2
+            and len(bars) >= length
+            and len(bars) - length < settings.INDICATOR_INCREMENTAL_MAX_BARS
+            and int(bars["t"][0]) == self.first_ts
+            and int(bars["t"][length - 2]) == self.committed_ts
+        )
+
+
+class IndicatorEngine:
+    """Technical indicators over stored bar series, updated incrementally as bars arrive.
+
+    State is kept per ticker/interval for the whole stored series. When the
+    bar store refreshes the tail, only the last known bar (which may have
+    been amended) and new bars are recomputed; a backfill or a large gap
+    triggers a vectorized recompute instead. Evaluations run on executor
+    threads and are serialized by a lock around the shared state.
+    """
+
+    def __init__(self, max_series: int = settings.BAR_STORE_MAX_LOADED):
+        self.max_series = max_series
+        self._lock = threading.Lock()
+        self._series: "OrderedDict[Tuple[str, str], _SeriesIndicators]" = OrderedDict()
+        self.full_computes = 0
+        self.incremental_updates = 0
+        self.reused = 0
+
+    def evaluate(self, key: Tuple[str, str], bars: BarSeries, indicators: List[Indicator], lo: int) -> Dict[str, Any]:
+        """Indicator values for bars from index lo, as arrays aligned with the returned timestamps"""
+        with self._lock:
+            entry = self._sync(key, bars)
+            close = None
+            for indicator in indicators:
+                if indicator.name in entry.states:
+                    self.reused += 1
+                    continue
+                if close is None:
+                    close = np.asarray(bars["c"], dtype=np.float64)
+                entry.states[indicator.name] = indicator.compute(close, bars)
+                self.full_computes += 1
+
+            return {
+                "t": bars["t"][lo:],
+                "indicators": {indicator.name: indicator.window(entry.states[indicator.name], lo) for indicator in indicators}
+            }
+
+    def _sync(self, key: Tuple[str, str], bars: BarSeries) -> _SeriesIndicators:
+        entry = self._series.get(key)
+        version = bars.version()
+        if entry is None:
+            entry = _SeriesIndicators()
+        elif entry.version != version:
+            if entry.can_extend(bars):
+                start = entry.length - 1
+                for name, state in entry.states.items():
+                    for field, values in state.items():
+                        state[field] = np.concatenate([values[:start], np.empty(len(bars) - start)])
+                    self._indicator_for(name).extend(state, bars, start)
+                self.incremental_updates += 1
+            else:
+                entry.states.clear()
+
+        if entry.version != version:
+            entry.version = version
+            entry.length = len(bars)
+            entry.first_ts = int(bars["t"][0])
+            entry.committed_ts = int(bars["t"][-2]) if len(bars) >= 2 else None
+
+        self._series[key] = entry
+        self._series.move_to_end(key)
+        while len(self._series) > self.max_series:
+            self._series.popitem(last=False)
+        return entry
+
+    @staticmethod
+    def _indicator_for(name: str) -> Indicator:
+        return parse_indicators(name)[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded_series": len(self._series),
+            "full_computes": self.full_computes,
+            "incremental_updates": self.incremental_updates,
+            "reused": self.reused
+        }
@@ -1,13 +1,23 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional, Dict, Any
+import numpy as np
 from core.http_client import HttpClient
+from services.bar_store import BarStore, BarSeries
 from models.stock_models import StockQuote
 from config import settings
 
 class PolygonService:
+    # BarStore interval -> (multiplier, timespan) of the aggregates endpoint
+    AGGREGATE_SPANS = {"1d": (1, "day"), "1wk": (1, "week"), "1mo": (1, "month"), "1h": (1, "hour")}
+
     def __init__(self, http_client: HttpClient):
         self.http_client = http_client
         self.base_url = "https://api.polygon.io"
+        self.bar_store = BarStore(
+            self._fetch_bars,
+            directory=settings.POLYGON_BAR_STORE_DIR,
+            refresh_ttl=settings.POLYGON_BAR_REFRESH_TTL
+        )
 
     async def get_stock_quote(self, ticker: str) -> Optional[StockQuote]:
         """Get stock quote from Polygon.io"""
@@ -37,22 +47,46 @@ class PolygonService:
             return None
 
     async def get_daily_stock_price(self, ticker: str, date: datetime) -> Optional[float]:
-        """Get historical stock price for specific date"""
+        """Get historical stock price for specific date from the locally stored daily range"""
         try:
-            date_str = date.strftime('%Y-%m-%d')
-            url = f"{self.base_url}/v2/aggs/ticker/{ticker.upper()}/range/1/day/{date_str}/{date_str}"
-            params = {"adjusted": "true", "apiKey": settings.POLYGON_API_KEY}
-            
-            data = await self.http_client.make_request(url, params=params)
-            
-            if data and data.get("results") and len(data["results"]) > 0:
-                return data["results"][0].get("c")  # Closing price
-                
+            day_ts = int(datetime(date.year, date.month, date.day, tzinfo=timezone.utc).timestamp())
+            bars = await self.get_daily_bars(ticker, day_ts)
+            index = bars.index_of(day_ts)
+            if index < len(bars) and int(bars["t"][index]) // 86400 == day_ts // 86400:
+                return float(bars["c"][index])
         except Exception as e:
-            print(f"Polygon price error for {ticker} on {date_str}: {e}")
-            
+            print(f"Polygon price error for {ticker} on {date:%Y-%m-%d}: {e}")
+
         return None
 
+    async def get_daily_bars(self, ticker: str, start_ts: int) -> BarSeries:
+        """Get daily bars from start_ts to now; only uncovered ranges are requested from Polygon"""
+        series = await self.bar_store.get_series(ticker, start_ts, "1d")
+        return series.since(start_ts)
+
+    async def _fetch_bars(self, ticker: str, interval: str, start_ts: int, end_ts: int) -> Optional[Dict[str, np.ndarray]]:
+        """Fetch a whole range of aggregates in one request as column arrays"""
+        multiplier, timespan = self.AGGREGATE_SPANS[interval]
+        start = datetime.fromtimestamp(start_ts, timezone.utc).strftime("%Y-%m-%d")
+        end = datetime.fromtimestamp(end_ts, timezone.utc).strftime("%Y-%m-%d")
+        try:
+            url = f"{self.base_url}/v2/aggs/ticker/{ticker.upper()}/range/{multiplier}/{timespan}/{start}/{end}"
+            params = {"adjusted": "true", "sort": "asc", "limit": 50000, "apiKey": settings.POLYGON_API_KEY}
+            data = await self.http_client.make_request(url, params=params)
+
+            if not data or data.get("status") not in ("OK", "DELAYED"):
+                return None
+
+            results = data.get("results") or []
+            columns = {"t": np.array([bar["t"] // 1000 for bar in results], dtype=np.int64)}
+            for name in ("o", "h", "l", "c"):
+                columns[name] = np.array([bar.get(name, 0.0) for bar in results], dtype=np.float64)
+            columns["v"] = np.array([bar.get("v", 0) for bar in results], dtype=np.float64).astype(np.int64)
+            return columns
+        except Exception as e:
+            print(f"Polygon aggregates error for {ticker}: {e}")
+            return None
+
     async def get_ticker_details(self, ticker: str) -> Optional[Dict[str, Any]]:
         """Get ticker details from Polygon.io"""
         try:
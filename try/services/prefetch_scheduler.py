@@ -0,0 +1,200 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import pytz
+from core.http_client import HttpClient
+from services.yahoo_finance_service import YahooFinanceService
+from portfolio.portfolio_manager import PortfolioManager
+from config import settings
+
+EASTERN = pytz.timezone("America/New_York")
+YAHOO_HOSTS = ("query1.finance.yahoo.com", "query2.finance.yahoo.com")
+
+
+def market_session(now: Optional[datetime] = None) -> str:
+    """'regular', 'extended' (pre/post market) or 'closed' for US equities; holidays are not modelled"""
+    local = (now or datetime.now(pytz.utc)).astimezone(EASTERN)
+    if local.weekday() >= 5:
+        return "closed"
+    minutes = local.hour * 60 + local.minute
+    if 9 * 60 + 30 <= minutes < 16 * 60:
+        return "regular"
+    if 4 * 60 <= minutes < 20 * 60:
+        return "extended"
+    return "closed"
+
+
+class JobStats:
+    """Run, skip and lag counters for one kind of prefetch job"""
+
+    def __init__(self):
+        self.runs = 0
+        self.errors = 0
+        self.skipped: Dict[str, int] = {}
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.last_cycle_seconds = 0.0
+        self.last_cycle_at: Optional[float] = None
+
+    def record_lag(self, lag: float):
+        self.total_lag += lag
+        if lag > self.max_lag:
+            self.max_lag = lag
+
+    def skip(self, reason: str):
+        self.skipped[reason] = self.skipped.get(reason, 0) + 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        scheduled = self.runs + self.errors + sum(self.skipped.values())
+        return {
+            "runs": self.runs,
+            "errors": self.errors,
+            "skipped": dict(self.skipped),
+            "avg_lag_ms": self.total_lag / scheduled * 1000 if scheduled else 0.0,
+            "max_lag_ms": self.max_lag * 1000,
+            "last_cycle_seconds": self.last_cycle_seconds,
+            "last_cycle_at": self.last_cycle_at
+        }
+
+
+class PrefetchScheduler:
+    """Keeps caches warm for held and watchlisted tickers.
+
+    A warm cycle loads fundamentals and daily bars for every symbol at
+    startup and then every PREFETCH_WARM_INTERVAL; a quote cycle refreshes
+    quotes and portfolio prices on a cadence that follows the US market
+    session. Jobs in a cycle are spaced evenly so prefetching never uses
+    more than PREFETCH_RATE_FRACTION of Yahoo's rate budget, and are skipped
+    while user requests are queued on that budget or its circuit is open.
+    """
+
+    def __init__(self, http_client: HttpClient, yahoo_service: YahooFinanceService, portfolio_manager: PortfolioManager):
+        self.http_client = http_client
+        self.yahoo_service = yahoo_service
+        self.portfolio_manager = portfolio_manager
+        self.jobs = {"warm": JobStats(), "quotes": JobStats()}
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._warm_loop()), asyncio.create_task(self._quote_loop())]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def symbols(self) -> List[str]:
+        watchlist = [symbol.upper() for symbol in settings.PREFETCH_WATCHLIST]
+        # The analytics benchmark is read without refreshing, like held tickers
+        benchmark = [settings.PORTFOLIO_BENCHMARK.upper()] if settings.PORTFOLIO_BENCHMARK else []
+        return list(dict.fromkeys(self.portfolio_manager.store.held_tickers() + watchlist + benchmark))
+
+    @staticmethod
+    def quote_interval(session: str) -> float:
+        return {
+            "regular": settings.PREFETCH_QUOTE_INTERVAL_REGULAR,
+            "extended": settings.PREFETCH_QUOTE_INTERVAL_EXTENDED,
+            "closed": settings.PREFETCH_QUOTE_INTERVAL_CLOSED
+        }[session]
+
+    def _skip_reason(self) -> Optional[str]:
+        """Why a job should not run right now, or None if upstream has room for it"""
+        for host in YAHOO_HOSTS:
+            breaker = self.http_client.circuit_breakers.breakers.get(host)
+            if breaker is not None and breaker.state != "closed":
+                return "circuit_open"
+        bucket = self.http_client.rate_limiter.for_host(YAHOO_HOSTS[0])
+        if bucket is not None and bucket.waiting > 0:
+            return "rate_budget"
+        return None
+
+    def _min_spacing(self, requests_per_job: int) -> float:
+        bucket = self.http_client.rate_limiter.for_host(YAHOO_HOSTS[0])
+        if bucket is None:
+            return 0.0
+        return requests_per_job / (bucket.base_rate * settings.PREFETCH_RATE_FRACTION)
+
+    async def _run_paced(self, kind: str, jobs: List[Callable[[], Awaitable[Any]]], period: float, requests_per_job: int):
+        """Run jobs one at a time, spread evenly over `period` but no faster than the rate share allows"""
+        stats = self.jobs[kind]
+        if not jobs:
+            return
+        spacing = max(period / len(jobs), self._min_spacing(requests_per_job))
+        started = time.monotonic()
+
+        for i, job in enumerate(jobs):
+            due = started + i * spacing
+            delay = due - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            lag = time.monotonic() - due
+            stats.record_lag(lag)
+
+            reason = "late" if period > 0 and lag > period else self._skip_reason()
+            if reason is not None:
+                stats.skip(reason)
+                continue
+            try:
+                await job()
+                stats.runs += 1
+            except Exception as e:
+                stats.errors += 1
+                print(f"Prefetch {kind} job error: {e}")
+
+        stats.last_cycle_seconds = time.monotonic() - started
+        stats.last_cycle_at = time.time()
+
+    async def _warm_symbol(self, symbol: str):
+        await asyncio.gather(
+            self.yahoo_service.fundamentals.get(symbol),
+            self.yahoo_service.get_bars(symbol, settings.PREFETCH_BAR_PERIOD)
+        )
+
+    async def _warm_loop(self):
+        while True:
+            cycle_started = time.monotonic()
+            jobs = [lambda symbol=symbol: self._warm_symbol(symbol) for symbol in self.symbols()]
+            # The first pass runs as fast as the rate share allows; later ones spread over the interval
+            period = 0.0 if self.jobs["warm"].last_cycle_at is None else settings.PREFETCH_WARM_INTERVAL
+            await self._run_paced("warm", jobs, period, requests_per_job=2)
+            await asyncio.sleep(max(settings.PREFETCH_WARM_INTERVAL - (time.monotonic() - cycle_started), 0.0))
+
+    async def _refresh_quotes(self, symbols: List[str], ttl: float):
+        quotes = await self.yahoo_service.get_stock_quotes(symbols, ttl=ttl, refresh=True)
+        for symbol, quote in quotes.items():
+            if quote:
+                self.portfolio_manager.store.set_price(symbol, quote.price)
+
+    async def _quote_loop(self):
+        while True:
+            session = market_session()
+            interval = self.quote_interval(session)
+            if interval <= 0:
+                await asyncio.sleep(settings.PREFETCH_SESSION_CHECK_INTERVAL)
+                continue
+
+            cycle_started = time.monotonic()
+            # Warmed quotes stay cached until this batch's next refresh lands, with QUOTE_CACHE_TTL as slack
+            # for pacing lag, so quote endpoints and streams read them instead of missing between cycles
+            ttl = interval + settings.QUOTE_CACHE_TTL
+            symbols = self.symbols()
+            size = settings.YAHOO_BATCH_QUOTE_SIZE
+            jobs = [
+                lambda batch=symbols[i:i + size]: self._refresh_quotes(batch, ttl)
+                for i in range(0, len(symbols), size)
+            ]
+            await self._run_paced("quotes", jobs, interval, requests_per_job=1)
+            await asyncio.sleep(max(interval - (time.monotonic() - cycle_started), 0.0))
+
+    def stats(self) -> Dict[str, Any]:
+        session = market_session()
+        return {
+            "running": any(not task.done() for task in self._tasks),
+            "session": session,
+            "quote_interval": self.quote_interval(session),
+            "symbols": len(self.symbols()),
+            "jobs": {kind: stats.to_dict() for kind, stats in self.jobs.items()}
+        }
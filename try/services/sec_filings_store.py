@@ -0,0 +1,262 @@
+import asyncio
+import bisect
+import heapq
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+from core.http_client import HttpClient
+from config import settings
+
+
+class Filing(NamedTuple):
+    filing_date: str
+    accession_number: str
+    form: str
+    report_date: str
+    primary_document: str
+
+
+class CompanyFilings:
+    """All known filings for one CIK, indexed by form type and sorted by filing date"""
+
+    def __init__(self, cik: str):
+        self.cik = cik
+        self.accessions: Dict[str, Filing] = {}
+        self.by_form: Dict[str, List[Filing]] = {}
+        # Paginated history files from filings.files, in SEC's (newest first) order
+        self.archives: List[Dict[str, Any]] = []
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.fetched_at = 0.0
+
+    def add(self, filing: Filing) -> bool:
+        if filing.accession_number in self.accessions:
+            return False
+        self.accessions[filing.accession_number] = filing
+        bisect.insort(self.by_form.setdefault(filing.form, []), filing)
+        return True
+
+    def add_columns(self, columns: Dict[str, List[str]]) -> int:
+        """Append filings from SEC's columnar submissions format, skipping known accessions"""
+        accession_numbers = columns.get("accessionNumber", [])
+        forms = columns.get("form", [])
+        filing_dates = columns.get("filingDate", [])
+        report_dates = columns.get("reportDate", [])
+        primary_documents = columns.get("primaryDocument", [])
+
+        added = 0
+        for i, accession_number in enumerate(accession_numbers):
+            if accession_number in self.accessions:
+                continue
+            added += self.add(Filing(
+                filing_date=filing_dates[i],
+                accession_number=accession_number,
+                form=forms[i],
+                report_date=report_dates[i] if i < len(report_dates) and report_dates[i] else "N/A",
+                primary_document=primary_documents[i] if i < len(primary_documents) else ""
+            ))
+        return added
+
+    def iter_newest(self, form_types: Optional[List[str]]) -> Iterator[Filing]:
+        """Iterate filings of the given forms (all forms when None), newest first"""
+        forms = self.by_form.keys() if form_types is None else form_types
+        lists = [reversed(self.by_form[form]) for form in forms if form in self.by_form]
+        return heapq.merge(*lists, reverse=True)
+
+    def pending_archives(self) -> List[Dict[str, Any]]:
+        return [archive for archive in self.archives if not archive.get("loaded")]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "cik": self.cik,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "fetched_at": self.fetched_at,
+            "archives": self.archives,
+            "filings": [list(filing) for filing in self.accessions.values()]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CompanyFilings":
+        company = cls(data["cik"])
+        company.etag = data.get("etag")
+        company.last_modified = data.get("last_modified")
+        company.fetched_at = data.get("fetched_at", 0.0)
+        company.archives = data.get("archives", [])
+        for row in data.get("filings", []):
+            company.add(Filing(*row))
+        return company
+
+
+class SECFilingsStore:
+    """On-disk per-CIK filings store refreshed incrementally from data.sec.gov.
+
+    The submissions document is revalidated at most every SEC_FILINGS_TTL
+    seconds and only unseen accession numbers are appended. Older history in
+    the paginated filings.files archives is fetched lazily, only when a query
+    needs more filings than are already stored.
+    """
+
+    BASE_URL = "https://data.sec.gov/submissions"
+
+    def __init__(self, http_client: HttpClient, directory: str = settings.SEC_FILINGS_DIR):
+        self.http_client = http_client
+        self.directory = directory
+        self._companies: "OrderedDict[str, CompanyFilings]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def get_filings(
+        self,
+        cik: str,
+        form_types: Optional[List[str]] = None,
+        count: int = 5,
+        include_history: bool = True
+    ) -> List[Filing]:
+        """Get the newest `count` filings of the given forms for a CIK"""
+        company = await self._get_company(cik)
+        if company is None:
+            return []
+
+        results = self._take(company, form_types, count)
+        if len(results) < count and include_history and company.pending_archives():
+            async with self._lock(cik):
+                for archive in company.pending_archives():
+                    if not await self._load_archive(company, archive):
+                        break
+                    results = self._take(company, form_types, count)
+                    if len(results) >= count:
+                        break
+                await self._save(company)
+
+        return results
+
+    @staticmethod
+    def _take(company: CompanyFilings, form_types: Optional[List[str]], count: int) -> List[Filing]:
+        results = []
+        for filing in company.iter_newest(form_types):
+            results.append(filing)
+            if len(results) >= count:
+                break
+        return results
+
+    def _lock(self, cik: str) -> asyncio.Lock:
+        lock = self._locks.get(cik)
+        if lock is None:
+            lock = self._locks[cik] = asyncio.Lock()
+        return lock
+
+    async def _get_company(self, cik: str) -> Optional[CompanyFilings]:
+        async with self._lock(cik):
+            company = self._companies.get(cik)
+            if company is None:
+                company = await asyncio.to_thread(self._read_file, cik)
+                if company is not None:
+                    self._remember(company)
+
+            if company is None or time.time() - company.fetched_at > settings.SEC_FILINGS_TTL:
+                company = await self._refresh(cik, company)
+
+            if company is not None:
+                self._companies.move_to_end(cik)
+            return company
+
+    async def _refresh(self, cik: str, company: Optional[CompanyFilings]) -> Optional[CompanyFilings]:
+        """Revalidate the submissions document and append any new accession numbers"""
+        headers = {"User-Agent": settings.SEC_USER_AGENT}
+        status, data, validators = await self.http_client.make_conditional_request(
+            f"{self.BASE_URL}/CIK{cik}.json",
+            headers=headers,
+            etag=company.etag if company else None,
+            last_modified=company.last_modified if company else None
+        )
+
+        if status == 304 and company is not None:
+            # Nothing changed; only the revalidation time is persisted, not the whole filings file
+            company.fetched_at = time.time()
+            await asyncio.to_thread(self._write_meta, company)
+            return company
+        if not data or "filings" not in data or "recent" not in data["filings"]:
+            # Serve what we already have when SEC is unreachable
+            return company
+
+        if company is None:
+            company = CompanyFilings(cik)
+            self._remember(company)
+
+        company.add_columns(data["filings"]["recent"])
+        known_archives = {archive["name"]: archive for archive in company.archives}
+        company.archives = [
+            {**file_info, "loaded": known_archives.get(file_info["name"], {}).get("loaded", False)}
+            for file_info in data["filings"].get("files", [])
+        ]
+        company.etag = validators.get("etag")
+        company.last_modified = validators.get("last_modified")
+        company.fetched_at = time.time()
+        await self._save(company)
+        return company
+
+    async def _load_archive(self, company: CompanyFilings, archive: Dict[str, Any]) -> bool:
+        headers = {"User-Agent": settings.SEC_USER_AGENT}
+        data = await self.http_client.make_request(f"{self.BASE_URL}/{archive['name']}", headers=headers)
+        if not data:
+            return False
+
+        company.add_columns(data)
+        archive["loaded"] = True
+        return True
+
+    def _remember(self, company: CompanyFilings):
+        self._companies[company.cik] = company
+        self._companies.move_to_end(company.cik)
+        while len(self._companies) > settings.SEC_FILINGS_MAX_LOADED:
+            self._companies.popitem(last=False)
+
+    def _path(self, cik: str) -> str:
+        return os.path.join(self.directory, f"CIK{cik}.json")
+
+    def _meta_path(self, cik: str) -> str:
+        return os.path.join(self.directory, f"CIK{cik}.meta.json")
+
+    def _read_file(self, cik: str) -> Optional[CompanyFilings]:
+        try:
+            with open(self._path(cik), "r") as f:
+                company = CompanyFilings.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+        try:
+            with open(self._meta_path(cik), "r") as f:
+                meta = json.load(f)
+            # The sidecar only applies to the validators it was revalidated with
+            if meta.get("etag") == company.etag and meta.get("last_modified") == company.last_modified:
+                company.fetched_at = max(company.fetched_at, meta.get("fetched_at", 0.0))
+        except (OSError, ValueError, AttributeError):
+            pass
+        return company
+
+    def _write_meta(self, company: CompanyFilings):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._meta_path(company.cik)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"etag": company.etag, "last_modified": company.last_modified, "fetched_at": company.fetched_at}, f)
+        os.replace(tmp_path, path)
+
+    async def _save(self, company: CompanyFilings):
+        await asyncio.to_thread(self._write_file, company.cik, company.to_dict())
+
+    def _write_file(self, cik: str, data: Dict[str, Any]):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(cik)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded_companies": len(self._companies),
+            "loaded_filings": sum(len(c.accessions) for c in self._companies.values())
+        }
@@ -1,29 +1,44 @@
 from typing import List, Dict, Any, Optional
 from core.http_client import HttpClient
+from services.cik_index import CikIndex
+from services.sec_filings_store import SECFilingsStore
 from config import settings
 
 class SECService:
     def __init__(self, http_client: HttpClient):
         self.http_client = http_client
+        self.ticker_index = CikIndex(http_client)
+        self.filings_store = SECFilingsStore(http_client)
 
     async def get_cik_from_ticker(self, ticker: str) -> Optional[str]:
         """Get CIK from ticker symbol"""
         try:
-            url = "https://www.sec.gov/files/company_tickers.json"
-            headers = {"User-Agent": settings.SEC_USER_AGENT}
-            
-            data = await self.http_client.make_request(url, headers=headers)
-            
-            if data:
-                for key, item_info in data.items():
-                    if item_info.get("ticker") == ticker.upper():
-                        return str(item_info.get("cik_str")).zfill(10)
-                        
+            return await self.ticker_index.get_cik(ticker)
         except Exception as e:
             print(f"Error fetching CIK for {ticker}: {e}")
             
         return None
 
+    async def get_ciks_from_tickers(self, tickers: List[str]) -> Dict[str, Optional[str]]:
+        """Get CIKs for many ticker symbols in one lookup"""
+        try:
+            return await self.ticker_index.get_ciks(tickers)
+        except Exception as e:
+            print(f"Error fetching CIKs for {len(tickers)} tickers: {e}")
+            
+        return {ticker.upper(): None for ticker in tickers}
+
+    async def get_company(self, cik: str) -> Optional[Dict[str, Any]]:
+        """Company name and tickers for a CIK"""
+        title = await self.ticker_index.get_title(cik)
+        if title is None:
+            return None
+        return {"cik": str(cik).zfill(10), "title": title, "tickers": await self.ticker_index.get_tickers(cik)}
+
+    async def search_companies(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Companies whose name contains the query"""
+        return await self.ticker_index.search_titles(query, limit)
+
     async def get_sec_filings_by_cik(
         self, 
         cik: str, 
@@ -38,37 +53,17 @@ class SECService:
             form_types = ["10-K", "10-Q"]
 
         try:
-            url = f"https://data.sec.gov/submissions/CIK{cik}.json"
-            headers = {"User-Agent": settings.SEC_USER_AGENT}
-            
-            data = await self.http_client.make_request(url, headers=headers)
-            
-            if not data or "filings" not in data or "recent" not in data["filings"]:
-                return []
-
-            filings = data["filings"]["recent"]
-            results = []
-            
-            accession_numbers = filings.get("accessionNumber", [])
-            forms = filings.get("form", [])
-            filing_dates = filings.get("filingDate", [])
-            report_dates = filings.get("reportDate", [])
-            primary_documents = filings.get("primaryDocument", [])
-
-            for i in range(len(accession_numbers)):
-                if forms[i] in form_types:
-                    filing_url = f"https://www.sec.gov/Archives/edgar/data/{cik}/{accession_numbers[i].replace('-', '')}/{primary_documents[i]}"
-                    results.append({
-                        "formType": forms[i],
-                        "filedDate": filing_dates[i],
-                        "reportDate": report_dates[i] if i < len(report_dates) else "N/A",
-                        "url": filing_url,
-                        "accessionNumber": accession_numbers[i]
-                    })
-                    if len(results) >= count:
-                        break
-                        
-            return results
+            filings = await self.filings_store.get_filings(cik, form_types, count)
+            return [
+                {
+                    "formType": filing.form,
+                    "filedDate": filing.filing_date,
+                    "reportDate": filing.report_date,
+                    "url": f"https://www.sec.gov/Archives/edgar/data/{cik}/{filing.accession_number.replace('-', '')}/{filing.primary_document}",
+                    "accessionNumber": filing.accession_number
+                }
+                for filing in filings
+            ]
             
         except Exception as e:
             print(f"Error fetching SEC filings for CIK {cik}: {e}")
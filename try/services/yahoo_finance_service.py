@@ -1,24 +1,46 @@
 import asyncio
-import yfinance as yf
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
+import numpy as np
 import pandas as pd
 import pytz
-from concurrent.futures import ThreadPoolExecutor
 from core.http_client import HttpClient
+from core.cache import TTLCache
+from core.executor import BoundedExecutor
+from services.yfinance_batcher import YFinanceBatcher
+from services.fundamentals_store import FundamentalsStore
+from services.bar_store import BarStore, BarSeries, period_start, window_start
+from services.indicators import Indicator, IndicatorEngine, warmup_seconds
+from config import settings
 from models.stock_models import StockQuote, StockInfo, ChartData
 
 class YahooFinanceService:
-    def __init__(self, http_client: HttpClient):
+    def __init__(self, http_client: HttpClient, executor: Optional[BoundedExecutor] = None):
         self.http_client = http_client
-        self.thread_pool = ThreadPoolExecutor(max_workers=5)
-
-    async def _run_in_executor(self, func, *args):
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(self.thread_pool, func, *args)
+        # Shared with the rest of the app for any yfinance/pandas/plotly work
+        self.executor = executor or BoundedExecutor()
+        self.yf_batcher = YFinanceBatcher(self.executor)
+        self.quote_cache = TTLCache(
+            ttl=settings.QUOTE_CACHE_TTL,
+            max_size=settings.QUOTE_CACHE_MAX_SIZE,
+            name="yahoo_quotes"
+        )
+        self.bar_store = BarStore(self._fetch_bars)
+        self.chart_payload_cache = TTLCache(
+            ttl=settings.CHART_PAYLOAD_CACHE_TTL,
+            max_size=settings.CHART_PAYLOAD_CACHE_MAX_SIZE,
+            name="chart_payloads"
+        )
+        self.indicator_engine = IndicatorEngine()
+        self.fundamentals = FundamentalsStore(self._fetch_fundamentals)
 
     async def get_stock_quote(self, ticker: str) -> Optional[StockQuote]:
-        """Get stock quote from Yahoo Finance API"""
+        """Get stock quote, served from the shared quote cache when fresh"""
+        symbol = ticker.upper()
+        return await self.quote_cache.get_or_load(symbol, lambda: self.fetch_stock_quote(symbol))
+
+    async def fetch_stock_quote(self, ticker: str) -> Optional[StockQuote]:
+        """Get stock quote from Yahoo Finance API, bypassing the cache"""
         try:
             url = f"https://query1.finance.yahoo.com/v8/finance/chart/{ticker}"
             data = await self.http_client.make_request(url)
@@ -46,82 +68,214 @@ class YahooFinanceService:
             print(f"Yahoo Finance quote error for {ticker}: {e}")
             return None
 
+    async def get_stock_quotes(self, tickers: List[str], ttl: Optional[float] = None, refresh: bool = False) -> Dict[str, Optional[StockQuote]]:
+        """Get quotes for many symbols, batching cache misses into chunked upstream requests.
+
+        Symbols the batch endpoint does not return fall back to the single-symbol
+        quote path, so one bad symbol or failed chunk only degrades those symbols.
+        `ttl` overrides the cache lifetime of the batch-fetched quotes; `refresh`
+        fetches every symbol even when its cached quote is still fresh.
+        """
+        symbols = list(dict.fromkeys(t.upper() for t in tickers if t))
+        quotes, missing = ({}, symbols) if refresh else self.quote_cache.get_many(symbols)
+
+        chunk_size = settings.YAHOO_BATCH_QUOTE_SIZE
+        chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+        for batch in await asyncio.gather(*[self._fetch_quote_batch(chunk) for chunk in chunks]):
+            for symbol, quote in batch.items():
+                self.quote_cache.set(symbol, quote, ttl)
+                quotes[symbol] = quote
+
+        unresolved = [symbol for symbol in missing if symbol not in quotes]
+        if unresolved:
+            fallback = await asyncio.gather(*[self.get_stock_quote(symbol) for symbol in unresolved])
+            quotes.update(zip(unresolved, fallback))
+
+        return {symbol: quotes.get(symbol) for symbol in symbols}
+
+    async def _fetch_quote_batch(self, symbols: List[str]) -> Dict[str, StockQuote]:
+        """Get quotes for up to YAHOO_BATCH_QUOTE_SIZE symbols in a single request"""
+        try:
+            url = "https://query1.finance.yahoo.com/v7/finance/quote"
+            data = await self.http_client.make_request(url, params={"symbols": ",".join(symbols)})
+
+            if not data or not data.get("quoteResponse", {}).get("result"):
+                return {}
+
+            quotes = {}
+            for item in data["quoteResponse"]["result"]:
+                symbol = item.get("symbol", "").upper()
+                current_price = item.get("regularMarketPrice")
+                if not symbol or current_price is None:
+                    continue
+
+                previous_close = item.get("regularMarketPreviousClose", 0)
+                change = current_price - previous_close
+                change_percent = (change / previous_close * 100) if previous_close else 0
+
+                quotes[symbol] = StockQuote(
+                    symbol=symbol,
+                    price=current_price,
+                    change=change,
+                    changePercent=change_percent,
+                    volume=item.get("regularMarketVolume", 0),
+                    previousClose=previous_close
+                )
+            return quotes
+        except Exception as e:
+            print(f"Yahoo Finance batch quote error for {len(symbols)} symbols: {e}")
+            return {}
+
     async def get_stock_info(self, ticker: str) -> Optional[StockInfo]:
-        """Get comprehensive stock information"""
+        """Get comprehensive stock information.
+
+        Price fields come from the quote cache (seconds TTL); fundamentals
+        come from the fundamentals store (hours TTL, stale-while-revalidate).
+        """
+        symbol = ticker.upper()
+        quote, fundamentals = await asyncio.gather(self.get_stock_quote(symbol), self.fundamentals.get(symbol))
+        if not quote or not fundamentals:
+            return None
+        return StockInfo(**quote.model_dump(), **fundamentals)
+
+    async def _fetch_fundamentals(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """Get the slow-changing StockInfo fields from Yahoo's quoteSummary"""
         try:
-            # Fetch both quote and summary data
-            quote_url = f"https://query1.finance.yahoo.com/v8/finance/chart/{ticker}"
-            summary_url = f"https://query2.finance.yahoo.com/v10/finance/quoteSummary/{ticker}?modules=summaryDetail,defaultKeyStatistics,assetProfile"
-            
-            quote_data, summary_data = await asyncio.gather(
-                self.http_client.make_request(quote_url),
-                self.http_client.make_request(summary_url)
-            )
-            
-            if not quote_data or not summary_data:
+            summary_url = f"https://query2.finance.yahoo.com/v10/finance/quoteSummary/{ticker}?modules=price,summaryDetail,defaultKeyStatistics,assetProfile"
+            summary_data = await self.http_client.make_request(summary_url)
+
+            if not summary_data or not summary_data.get("quoteSummary", {}).get("result"):
                 return None
-                
-            result = quote_data["chart"]["result"][0]
-            meta = result["meta"]
+
             summary = summary_data["quoteSummary"]["result"][0]
-            
+            price = summary.get("price", {})
             summary_detail = summary.get("summaryDetail", {})
             key_stats = summary.get("defaultKeyStatistics", {})
             profile = summary.get("assetProfile", {})
-            
-            current_price = meta.get("regularMarketPrice", 0)
-            previous_close = meta.get("previousClose", 0)
-            change = current_price - previous_close
-            change_percent = (change / previous_close * 100) if previous_close else 0
-            
-            return StockInfo(
-                symbol=ticker.upper(),
-                name=meta.get("longName", ticker.upper()),
-                price=current_price,
-                change=change,
-                changePercent=change_percent,
-                volume=meta.get("regularMarketVolume", 0),
-                previousClose=previous_close,
-                marketCap=summary_detail.get("marketCap", {}).get("raw", 0),
-                peRatio=summary_detail.get("trailingPE", {}).get("raw", 0),
-                eps=key_stats.get("trailingEps", {}).get("raw", 0),
-                high52w=summary_detail.get("fiftyTwoWeekHigh", {}).get("raw", 0),
-                low52w=summary_detail.get("fiftyTwoWeekLow", {}).get("raw", 0),
-                dividendYield=summary_detail.get("dividendYield", {}).get("raw", 0) * 100,
-                beta=key_stats.get("beta", {}).get("raw", 0),
-                sector=profile.get("sector", "N/A"),
-                industry=profile.get("industry", "N/A")
-            )
+
+            return {
+                "name": price.get("longName") or price.get("shortName") or ticker.upper(),
+                "marketCap": summary_detail.get("marketCap", {}).get("raw", 0),
+                "peRatio": summary_detail.get("trailingPE", {}).get("raw", 0),
+                "eps": key_stats.get("trailingEps", {}).get("raw", 0),
+                "high52w": summary_detail.get("fiftyTwoWeekHigh", {}).get("raw", 0),
+                "low52w": summary_detail.get("fiftyTwoWeekLow", {}).get("raw", 0),
+                "dividendYield": summary_detail.get("dividendYield", {}).get("raw", 0) * 100,
+                "beta": key_stats.get("beta", {}).get("raw", 0),
+                "sector": profile.get("sector", "N/A"),
+                "industry": profile.get("industry", "N/A")
+            }
         except Exception as e:
-            print(f"Yahoo Finance info error for {ticker}: {e}")
+            print(f"Yahoo Finance fundamentals error for {ticker}: {e}")
             return None
 
-    async def get_chart_data(self, ticker: str, period: str = "1mo") -> List[ChartData]:
-        """Get chart data from Yahoo Finance"""
+    async def get_history_records(self, ticker: str, period: str = "1mo") -> List[Dict[str, Any]]:
+        """Daily history straight from yfinance as records, batched with concurrent requests"""
+        history = await self.yf_batcher.history(ticker, period)
+        if history is None or history.empty:
+            return []
+        return await self.executor.run(lambda: history.reset_index().to_dict("records"))
+
+    async def get_bars(self, ticker: str, period: str = "1mo", interval: str = "1d", refresh: bool = True) -> BarSeries:
+        """Get OHLCV bars from the local bar store, fetching only missing history"""
+        return await self.bar_store.get_bars(ticker, period, interval, refresh)
+
+    async def _fetch_bars(self, ticker: str, interval: str, start_ts: int, end_ts: int) -> Optional[Dict[str, np.ndarray]]:
+        """Fetch OHLCV bars for [start_ts, end_ts] from Yahoo as column arrays"""
         try:
-            url = f"https://query1.finance.yahoo.com/v8/finance/chart/{ticker}?range={period}&interval=1d"
-            data = await self.http_client.make_request(url)
-            
+            url = f"https://query1.finance.yahoo.com/v8/finance/chart/{ticker}"
+            params = {"period1": start_ts, "period2": end_ts, "interval": interval}
+            data = await self.http_client.make_request(url, params=params)
+
             if not data or not data.get("chart", {}).get("result"):
-                return []
-                
+                return None
+
             result = data["chart"]["result"][0]
-            timestamps = result.get("timestamp", [])
+            timestamps = result.get("timestamp") or []
             quotes = result.get("indicators", {}).get("quote", [{}])[0]
-            
-            chart_data = []
-            for i, timestamp in enumerate(timestamps):
-                if i < len(quotes.get("close", [])) and quotes["close"][i]:
-                    chart_data.append(ChartData(
-                        date=datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d"),
-                        open=quotes.get("open", [])[i] or 0,
-                        high=quotes.get("high", [])[i] or 0,
-                        low=quotes.get("low", [])[i] or 0,
-                        close=quotes.get("close", [])[i] or 0,
-                        volume=quotes.get("volume", [])[i] or 0
-                    ))
-            
-            return chart_data
+            count = len(timestamps)
+
+            # None values become NaN; rows without a close are dropped
+            columns = {"t": np.asarray(timestamps, dtype=np.int64)}
+            for name, field in (("o", "open"), ("h", "high"), ("l", "low"), ("c", "close"), ("v", "volume")):
+                values = quotes.get(field) or []
+                columns[name] = np.asarray(values[:count] + [None] * (count - len(values)), dtype=np.float64)
+
+            valid = ~np.isnan(columns["c"]) & (columns["c"] != 0)
+            for name in ("o", "h", "l", "v"):
+                columns[name] = np.nan_to_num(columns[name])
+            columns["v"] = columns["v"].astype(np.int64)
+            return {name: values[valid] for name, values in columns.items()}
+        except Exception as e:
+            print(f"Yahoo Finance bars error for {ticker}: {e}")
+            return None
+
+    async def get_chart_payload(self, ticker: str, period: str = "1y") -> Optional[Dict[str, List]]:
+        """Get a compact columnar chart ({"t", "o", "h", "l", "c", "v"} arrays).
+
+        Payloads are cached per ticker/period and rebuilt only when the
+        underlying bar series changes.
+        """
+        bars = await self.get_bars(ticker, period)
+        if not len(bars):
+            return None
+
+        key = (ticker.upper(), period)
+        version = bars.version()
+        cached = self.chart_payload_cache.lookup(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        payload = {name: bars[name].tolist() for name in ("t", "o", "h", "l", "c", "v")}
+        self.chart_payload_cache.set(key, (version, payload))
+        return payload
+
+    async def get_indicators(
+        self,
+        ticker: str,
+        indicators: List[Indicator],
+        period: str = "1y",
+        interval: str = "1d"
+    ) -> Optional[Dict[str, Any]]:
+        """Get indicator values over a period, warmed up on the stored history before it"""
+        start_ts = period_start(period) - warmup_seconds(indicators, interval)
+        series = await self.bar_store.get_series(ticker, start_ts, interval)
+        if not len(series):
+            return None
+        # Batch requests evaluate up to INDICATOR_BATCH_MAX_TICKERS series, so keep the math off the event loop
+        return await self.executor.run(
+            self.indicator_engine.evaluate,
+            (ticker.upper(), interval), series, indicators, window_start(series, period, interval)
+        )
+
+    async def get_chart_data(self, ticker: str, period: str = "1mo") -> List[ChartData]:
+        """Get chart data from the local bar store"""
+        try:
+            return [ChartData(**row) for row in self.chart_rows_from_bars(await self.get_bars(ticker, period))]
         except Exception as e:
             print(f"Yahoo Finance chart error for {ticker}: {e}")
             return []
+
+    @staticmethod
+    def chart_columns_from_bars(bars: BarSeries) -> Dict[str, List]:
+        """Columnar chart arrays converted in bulk rather than per bar"""
+        return {
+            "t": bars["t"].tolist(),
+            "date": bars["t"].astype("datetime64[s]").astype("datetime64[D]").astype(str).tolist(),
+            "o": bars["o"].tolist(),
+            "h": bars["h"].tolist(),
+            "l": bars["l"].tolist(),
+            "c": bars["c"].tolist(),
+            "v": bars["v"].tolist()
+        }
+
+    @classmethod
+    def chart_rows_from_bars(cls, bars: BarSeries) -> List[Dict[str, Any]]:
+        """Row-shaped chart data (the ChartData fields) as plain dicts"""
+        columns = cls.chart_columns_from_bars(bars)
+        return [
+            {"date": date, "timestamp": t, "open": o, "high": h, "low": l, "close": c, "volume": v}
+            for t, date, o, h, l, c, v in zip(
+                columns["t"], columns["date"], columns["o"], columns["h"], columns["l"], columns["c"], columns["v"]
+            )
+        ]
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+import pandas as pd
+import yfinance as yf
+from core.executor import BoundedExecutor
+from config import settings
+
+# yf.download collects results in module-level state, so downloads must not overlap
+_download_lock = threading.Lock()
+
+
+def _download(tickers: List[str], period: str, interval: str) -> Dict[str, pd.DataFrame]:
+    """One yf.download call for many tickers, split into a frame per ticker (runs in a worker thread)"""
+    with _download_lock:
+        data = yf.download(
+            tickers,
+            period=period,
+            interval=interval,
+            group_by="ticker",
+            threads=False,
+            progress=False
+        )
+
+    if data is None or data.empty:
+        return {}
+    if not isinstance(data.columns, pd.MultiIndex):
+        return {tickers[0]: data.dropna(how="all")}
+
+    frames = {}
+    available = set(data.columns.get_level_values(0))
+    for ticker in tickers:
+        if ticker in available:
+            frame = data[ticker].dropna(how="all")
+            if not frame.empty:
+                frames[ticker] = frame
+    return frames
+
+
+class YFinanceBatcher:
+    """Coalesces concurrent yfinance history requests into batched yf.download calls.
+
+    Requests for the same period and interval that arrive within
+    YF_BATCH_WINDOW seconds (or until YF_BATCH_MAX_TICKERS tickers are
+    waiting) share one download, which runs on the shared blocking executor.
+    """
+
+    def __init__(self, executor: BoundedExecutor):
+        self.executor = executor
+        self._pending: Dict[Tuple[str, str], Dict[str, List[asyncio.Future]]] = {}
+        self._timers: Dict[Tuple[str, str], asyncio.TimerHandle] = {}
+        # The loop only keeps weak references to tasks; hold in-flight downloads until they finish
+        self._tasks: Set[asyncio.Task] = set()
+        self.requests = 0
+        self.downloads = 0
+        self.tickers_downloaded = 0
+
+    async def history(self, ticker: str, period: str, interval: str = "1d") -> Optional[pd.DataFrame]:
+        """OHLCV history for one ticker, or None if Yahoo returned nothing"""
+        self.requests += 1
+        key = (period, interval)
+        future = asyncio.get_running_loop().create_future()
+        waiting = self._pending.setdefault(key, {})
+        waiting.setdefault(ticker.upper(), []).append(future)
+
+        if len(waiting) >= settings.YF_BATCH_MAX_TICKERS:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = asyncio.get_running_loop().call_later(settings.YF_BATCH_WINDOW, self._flush, key)
+        return await future
+
+    def _flush(self, key: Tuple[str, str]):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        waiting = self._pending.pop(key, None)
+        if waiting:
+            task = asyncio.create_task(self._download(key, waiting))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _download(self, key: Tuple[str, str], waiting: Dict[str, List[asyncio.Future]]):
+        tickers = list(waiting)
+        self.downloads += 1
+        self.tickers_downloaded += len(tickers)
+        try:
+            frames = await self.executor.run(_download, tickers, *key)
+        except Exception as e:
+            print(f"yfinance batch download error for {len(tickers)} tickers: {e}")
+            for futures in waiting.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for ticker, futures in waiting.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(frames.get(ticker))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "downloads": self.downloads,
+            "tickers_per_download": self.tickers_downloaded / self.downloads if self.downloads else 0.0,
+            "waiting": sum(len(waiting) for waiting in self._pending.values())
+        }
@@ -1,3 +1,5 @@
+import quoteStream from "./quoteStream.js"
+
 // d3 is loaded via script tag in HTML
 // Check if d3 is available globally
 if (typeof d3 === "undefined") {
@@ -11,6 +13,8 @@ class StockChart {
     this.chartType = "candlestick"
     this.timeframe = "1mo"
     this.data = this.processData(initialData)
+    this.cursor = this.getLatestTimestamp()
+    this.etag = null
     this.margin = { top: 20, right: 60, bottom: 30, left: 60 }
     this.initChart()
 
@@ -28,6 +32,9 @@ class StockChart {
             if (this.updateInterval) {
               clearInterval(this.updateInterval)
             }
+            if (this.unsubscribeQuotes) {
+              this.unsubscribeQuotes()
+            }
             observer.disconnect()
           }
         })
@@ -50,6 +57,7 @@ class StockChart {
           date,
           dateValue: +date,
           day: date.getDay(),
+          timestamp: item.timestamp,
           open: Number(item.Open || item.open),
           high: Number(item.High || item.high),
           low: Number(item.Low || item.low),
@@ -147,26 +155,41 @@ class StockChart {
     // Timeframe selector
     document.getElementById(`${this.containerId}-timeframe`).addEventListener("change", async (e) => {
       this.timeframe = e.target.value
-      await this.updateData()
+      this.cursor = null
+      this.etag = null
+      await this.updateData({ full: true })
     })
   }
 
-  // Fixed data updating function
-  async updateData() {
+  // Fetches only bars at or after the cursor and merges them into the current
+  // series; an unchanged series costs a 304 with no body
+  async updateData({ full = false } = {}) {
     try {
+      const params = new URLSearchParams({ period: this.timeframe, format: "columnar" })
+      const headers = {}
+      if (!full && this.cursor) {
+        params.set("since", this.cursor)
+        if (this.etag) headers["If-None-Match"] = this.etag
+      }
+
       console.log(`Updating chart data for ${this.ticker} with period ${this.timeframe}`)
-      const response = await fetch(`/api/chart/${this.ticker}?period=${this.timeframe}`)
+      const response = await fetch(`/api/chart/${this.ticker}?${params}`, { headers })
+      if (response.status === 304) {
+        return
+      }
       if (!response.ok) {
         throw new Error(`API returned ${response.status}: ${response.statusText}`)
       }
       const result = await response.json()
-      const newData = result.data || result
+      const newData = result.t ? this.fromColumns(result) : result.data || result
 
-      if (!newData || newData.length === 0) {
+      if (!result.delta && (!newData || newData.length === 0)) {
         throw new Error("No data received from API")
       }
 
-      this.data = this.processData(newData)
+      this.data = result.delta ? this.mergeData(this.processData(newData)) : this.processData(newData)
+      this.cursor = result.cursor || this.getLatestTimestamp()
+      this.etag = response.headers.get("ETag")
       this.renderChart()
       this.updateStats()
     } catch (error) {
@@ -183,31 +206,40 @@ class StockChart {
     }
   }
 
+  fromColumns(columns) {
+    return columns.t.map((timestamp, i) => ({
+      date: columns.date[i],
+      timestamp,
+      open: columns.o[i],
+      high: columns.h[i],
+      low: columns.l[i],
+      close: columns.c[i],
+      volume: columns.v[i],
+    }))
+  }
+
+  mergeData(delta) {
+    if (delta.length === 0) return this.data
+
+    // Delta bars replace any existing bar at or after the first delta bar
+    const firstDelta = delta[0].dateValue
+    return this.data.filter((d) => d.dateValue < firstDelta).concat(delta)
+  }
+
+  getLatestTimestamp() {
+    if (!this.data || this.data.length === 0) return null
+    return this.data[this.data.length - 1].timestamp || null
+  }
+
   startRealtimeUpdates() {
-    // Update every 2 seconds for more responsive real-time data
+    // Live prices are pushed over the shared quote stream and applied to the latest bar
+    this.unsubscribeQuotes = quoteStream.subscribe(this.ticker, (quote) => this.applyQuote(quote))
+
+    // New daily bars appear rarely; poll for deltas occasionally to pick them up
     this.updateInterval = setInterval(async () => {
       console.log(`Auto-updating chart data for ${this.ticker}`)
-
-      // Add visual indicator that chart is updating
-      const container = document.getElementById(this.containerId)
-      if (container) {
-        const title = container.querySelector(".chart-title")
-        if (title) {
-          const originalText = title.textContent
-          title.textContent = `${originalText} (Updating...)`
-
-          // Update the data
-          await this.updateData()
-
-          // Remove updating indicator
-          setTimeout(() => {
-            if (title) {
-              title.textContent = originalText
-            }
-          }, 500)
-        }
-      }
-    }, 2000) // 2 seconds for more frequent updates
+      await this.updateData()
+    }, 60000)
 
     // Store the interval ID in the container element for cleanup
     const container = document.getElementById(this.containerId)
@@ -216,6 +248,23 @@ class StockChart {
     }
   }
 
+  applyQuote(quote) {
+    if (!this.data || this.data.length === 0) return
+
+    const latest = this.data[this.data.length - 1]
+    if (latest.close === quote.price) return
+
+    latest.close = quote.price
+    latest.high = Math.max(latest.high, quote.price)
+    latest.low = Math.min(latest.low, quote.price)
+    if (quote.volume) {
+      latest.volume = quote.volume
+    }
+
+    this.renderChart()
+    this.updateStats()
+  }
+
   updateStats() {
     const container = document.getElementById(this.containerId)
     if (!container) return
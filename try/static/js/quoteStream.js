@@ -0,0 +1,149 @@
+// Shared live quote stream for all terminal windows.
+// One WebSocket per page is multiplexed across every subscribed ticker; if the
+// WebSocket cannot be established we fall back to server-sent events.
+
+class QuoteStream {
+  constructor() {
+    this.handlers = new Map() // ticker -> Set of callbacks
+    this.latest = new Map() // ticker -> last quote received
+    this.socket = null
+    this.socketOpen = false
+    this.useSSE = false
+    this.eventSources = new Map() // ticker -> EventSource (SSE fallback only)
+    this.reconnectDelay = 1000
+  }
+
+  subscribe(ticker, callback) {
+    ticker = ticker.toUpperCase()
+    let callbacks = this.handlers.get(ticker)
+    if (!callbacks) {
+      callbacks = new Set()
+      this.handlers.set(ticker, callbacks)
+      this.startTicker(ticker)
+    }
+    callbacks.add(callback)
+
+    // Replay the last known quote so new windows render immediately
+    if (this.latest.has(ticker)) {
+      callback(this.latest.get(ticker))
+    }
+
+    return () => this.unsubscribe(ticker, callback)
+  }
+
+  unsubscribe(ticker, callback) {
+    const callbacks = this.handlers.get(ticker)
+    if (!callbacks) return
+
+    callbacks.delete(callback)
+    if (callbacks.size === 0) {
+      this.handlers.delete(ticker)
+      this.latest.delete(ticker)
+      this.stopTicker(ticker)
+    }
+  }
+
+  startTicker(ticker) {
+    if (this.useSSE) {
+      this.openEventSource(ticker)
+    } else if (this.socketOpen) {
+      this.send({ action: "subscribe", tickers: [ticker] })
+    } else {
+      this.connect()
+    }
+  }
+
+  stopTicker(ticker) {
+    if (this.useSSE) {
+      const source = this.eventSources.get(ticker)
+      if (source) {
+        source.close()
+        this.eventSources.delete(ticker)
+      }
+    } else if (this.socketOpen) {
+      this.send({ action: "unsubscribe", tickers: [ticker] })
+    }
+  }
+
+  connect() {
+    if (this.socket) return
+    if (typeof WebSocket === "undefined") {
+      this.fallbackToSSE()
+      return
+    }
+
+    const protocol = location.protocol === "https:" ? "wss" : "ws"
+    const socket = new WebSocket(`${protocol}://${location.host}/stocks/stream`)
+    let opened = false
+    this.socket = socket
+
+    socket.addEventListener("open", () => {
+      opened = true
+      this.socketOpen = true
+      this.reconnectDelay = 1000
+      if (this.handlers.size > 0) {
+        this.send({ action: "subscribe", tickers: [...this.handlers.keys()] })
+      }
+    })
+
+    socket.addEventListener("message", (event) => {
+      const message = JSON.parse(event.data)
+      if (message.type === "quote") {
+        this.dispatch(message.data)
+      } else if (message.type === "error") {
+        console.error("Quote stream error:", message.message)
+      }
+    })
+
+    socket.addEventListener("close", () => {
+      this.socket = null
+      this.socketOpen = false
+
+      if (!opened) {
+        // WebSocket unavailable (proxy, server config) - use SSE instead
+        this.fallbackToSSE()
+      } else if (this.handlers.size > 0) {
+        setTimeout(() => this.connect(), this.reconnectDelay)
+        this.reconnectDelay = Math.min(this.reconnectDelay * 2, 30000)
+      }
+    })
+  }
+
+  fallbackToSSE() {
+    console.warn("WebSocket quote stream unavailable, falling back to SSE")
+    this.useSSE = true
+    this.handlers.forEach((_, ticker) => this.openEventSource(ticker))
+  }
+
+  openEventSource(ticker) {
+    if (this.eventSources.has(ticker)) return
+
+    const source = new EventSource(`/stocks/stream/sse?tickers=${encodeURIComponent(ticker)}`)
+    source.onmessage = (event) => {
+      const message = JSON.parse(event.data)
+      if (message.type === "quote") {
+        this.dispatch(message.data)
+      }
+    }
+    this.eventSources.set(ticker, source)
+  }
+
+  send(message) {
+    if (this.socket && this.socketOpen) {
+      this.socket.send(JSON.stringify(message))
+    }
+  }
+
+  dispatch(quote) {
+    const ticker = quote.symbol
+    this.latest.set(ticker, quote)
+    const callbacks = this.handlers.get(ticker)
+    if (callbacks) {
+      callbacks.forEach((callback) => callback(quote))
+    }
+  }
+}
+
+const quoteStream = new QuoteStream()
+
+export default quoteStream
@@ -1,4 +1,5 @@
 import StockChart from "./chartModule.js"
+import quoteStream from "./quoteStream.js"
 
 document.addEventListener("DOMContentLoaded", () => {
   const input = document.getElementById("input")
@@ -440,6 +441,9 @@ EXAMPLES:
       if (window.dataset.intervalId) {
         clearInterval(Number(window.dataset.intervalId))
       }
+      if (window.cleanup) {
+        window.cleanup()
+      }
       window.remove()
       windows = windows.filter((w) => w !== window)
       updateWindowCount()
@@ -510,13 +514,29 @@ EXAMPLES:
         <div class="live-price-display" id="live-price-${ticker}">
           <div class="loading">Loading...</div>
         </div>
-        <div class="live-price-status">Updates every second</div>
+        <div class="live-price-status">Live - updates on every price change</div>
       </div>
     `
   }
 
   function startLivePriceUpdates(content, ticker, window) {
-    const updatePrice = async () => {
+    const renderPrice = (quote) => {
+      const priceDisplay = content.querySelector(`#live-price-${ticker}`)
+      if (priceDisplay) {
+        const changeClass = quote.change >= 0 ? "positive" : "negative"
+        const arrow = quote.change >= 0 ? "▲" : "▼"
+
+        priceDisplay.innerHTML = `
+          <div class="live-price ${changeClass}">
+            $${quote.price.toFixed(2)} 
+            <span class="live-change">${arrow} ${Math.abs(quote.changePercent).toFixed(2)}%</span>
+          </div>
+        `
+      }
+    }
+
+    // Initial snapshot so errors (unknown ticker, API down) are reported immediately
+    const fetchInitialPrice = async () => {
       try {
         console.log(`Fetching live price for ${ticker}`)
         const response = await fetch(`/api/quote/${ticker}`)
@@ -533,20 +553,7 @@ EXAMPLES:
           }
         }
 
-        const quote = await response.json()
-
-        const priceDisplay = content.querySelector(`#live-price-${ticker}`)
-        if (priceDisplay) {
-          const changeClass = quote.change >= 0 ? "positive" : "negative"
-          const arrow = quote.change >= 0 ? "▲" : "▼"
-
-          priceDisplay.innerHTML = `
-          <div class="live-price ${changeClass}">
-            $${quote.price.toFixed(2)} 
-            <span class="live-change">${arrow} ${Math.abs(quote.changePercent).toFixed(2)}%</span>
-          </div>
-        `
-        }
+        renderPrice(await response.json())
       } catch (error) {
         console.error("Error updating live price:", error)
 
@@ -561,12 +568,10 @@ EXAMPLES:
       }
     }
 
-    // Initial update
-    updatePrice()
+    fetchInitialPrice()
 
-    // Set up interval for updates every 5 seconds (reduced frequency due to API issues)
-    const intervalId = setInterval(updatePrice, 5000)
-    window.dataset.intervalId = intervalId
+    // Subsequent updates are pushed by the server only when the price changes
+    window.cleanup = quoteStream.subscribe(ticker, renderPrice)
   }
 
   function createNotification(message) {
@@ -961,6 +966,9 @@ EXAMPLES:
       if (window.dataset.intervalId) {
         clearInterval(Number(window.dataset.intervalId))
       }
+      if (window.cleanup) {
+        window.cleanup()
+      }
       window.remove()
     })
     windows = []
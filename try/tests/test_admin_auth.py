@@ -0,0 +1,52 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from core.admin_auth import admin_token_valid
+from core.dependencies import require_admin
+from core.profiler import Profiler, ProfilingMiddleware
+from routers import admin_router
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    profiler = Profiler()
+
+    @app.get("/admin/ping", dependencies=[Depends(require_admin)])
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/open")
+    async def open_route():
+        return {"ok": True}
+
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+    return TestClient(app)
+
+
+def test_denied_while_token_unset(monkeypatch, client):
+    monkeypatch.setattr("config.settings.ADMIN_TOKEN", "")
+    assert not admin_token_valid(None)
+    assert not admin_token_valid("")
+    assert client.get("/admin/ping").status_code == 404
+    assert "x-trace-id" not in client.get("/open?profile=1").headers
+
+
+def test_token_required_once_set(monkeypatch, client):
+    monkeypatch.setattr("config.settings.ADMIN_TOKEN", "secret")
+    assert client.get("/admin/ping").status_code == 403
+    assert client.get("/admin/ping", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get("/admin/ping", headers={"X-Admin-Token": "secret"}).status_code == 200
+
+    assert "x-trace-id" not in client.get("/open?profile=1").headers
+    profiled = client.get("/open?profile=1", headers={"X-Admin-Token": "secret"})
+    assert "x-trace-id" in profiled.headers
+    assert "app;dur=" in profiled.headers["server-timing"]
+
+
+def test_only_profiling_endpoints_are_gated():
+    gated = {
+        route.path for route in admin_router.router.routes
+        if any(dependency.dependency is require_admin for dependency in route.dependencies)
+    }
+    assert gated == {"/admin/slow-requests", "/admin/traces/{trace_id}"}
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from portfolio.analytics import DAY, TRADING_DAYS, ReturnMatrix, align_closes, risk_metrics
+from services.bar_store import BarSeries
+
+
+def closes(days, values) -> BarSeries:
+    count = len(days)
+    values = np.asarray(values, dtype=np.float64)
+    return BarSeries({
+        "t": np.asarray(days, dtype=np.int64) * DAY,
+        "o": values,
+        "h": values,
+        "l": values,
+        "c": values,
+        "v": np.zeros(count, dtype=np.int64)
+    })
+
+
+def test_align_closes_forward_fills_and_leaves_leading_gaps():
+    days, prices = align_closes({
+        "A": closes([1, 2, 4], [10, 11, 13]),
+        "B": closes([2, 3, 4], [20, 21, 22])
+    })
+    assert days.tolist() == [1, 2, 3, 4]
+    np.testing.assert_array_equal(prices[:, 0], [10, 11, 11, 13])
+    assert np.isnan(prices[0, 1])
+    np.testing.assert_array_equal(prices[1:, 1], [20, 21, 22])
+
+
+def test_risk_metrics_against_direct_computation():
+    rng = np.random.default_rng(7)
+    days = np.arange(1, 201)
+    a = 100 * np.cumprod(1 + rng.normal(0, 0.01, len(days)))
+    b = 50 * np.cumprod(1 + rng.normal(0, 0.02, len(days)))
+    matrix = ReturnMatrix.from_bars({"A": closes(days, a), "B": closes(days, b), "BENCH": closes(days, a)})
+    weights = np.array([0.25, 0.75])
+
+    result = risk_metrics(matrix, weights, 1000.0, benchmark="BENCH")
+
+    returns_a, returns_b = a[1:] / a[:-1] - 1, b[1:] / b[:-1] - 1
+    portfolio = 0.25 * returns_a + 0.75 * returns_b
+    assert result["observations"] == len(days) - 1
+    assert result["portfolio"]["volatility"] == pytest.approx(portfolio.std(ddof=1) * np.sqrt(TRADING_DAYS))
+    assert result["holdings"][0]["volatility"] == pytest.approx(returns_a.std(ddof=1) * np.sqrt(TRADING_DAYS))
+    assert result["holdings"][0]["beta"] == pytest.approx(1.0)
+    assert result["portfolio"]["beta"] == pytest.approx(np.cov(portfolio, returns_a)[0, 1] / returns_a.var(ddof=1))
+
+    var95 = result["portfolio"]["value_at_risk"]["95"]
+    assert var95["historical_percent"] == pytest.approx(-np.percentile(portfolio, 5) * 100)
+    assert var95["historical"] == pytest.approx(var95["historical_percent"] * 10)
+
+    correlation = result["correlation"]["matrix"]
+    assert correlation[0, 0] == pytest.approx(1.0)
+    assert correlation[0, 1] == pytest.approx(np.corrcoef(returns_a, returns_b)[0, 1])
+
+
+def test_max_drawdown():
+    days = np.arange(1, 6)
+    matrix = ReturnMatrix.from_bars({"A": closes(days, [100, 120, 60, 90, 130])})
+    result = risk_metrics(matrix, np.array([1.0]), 130.0, include_correlation=False)
+    assert result["holdings"][0]["max_drawdown"] == pytest.approx(0.5)
+    assert result["portfolio"]["max_drawdown"] == pytest.approx(0.5)
+    assert "correlation" not in result
@@ -0,0 +1,121 @@
+import asyncio
+import numpy as np
+from services.bar_store import BarSeries, BarStore
+
+DAY = 86400
+
+
+class Fetcher:
+    """Daily bars for any range, or None while failing, recording each call"""
+
+    def __init__(self):
+        self.calls = []
+        self.failing = False
+
+    async def __call__(self, ticker, interval, start_ts, end_ts):
+        self.calls.append((start_ts, end_ts))
+        if self.failing:
+            return None
+        days = np.arange(start_ts // DAY, end_ts // DAY + 1, dtype=np.int64)
+        close = days.astype(np.float64)
+        return {"t": days * DAY, "o": close, "h": close, "l": close, "c": close, "v": np.zeros(len(days), dtype=np.int64)}
+
+
+def expire(store: BarStore, key=("AAA", "1d")):
+    series, meta = store._series[key]
+    meta["refreshed_at"] -= 10 ** 6
+
+
+def test_serves_stored_series_and_refreshes_only_the_tail(tmp_path):
+    fetch = Fetcher()
+    store = BarStore(fetch, str(tmp_path), refresh_ttl=3600)
+
+    async def run():
+        first = await store.get_series("aaa", 0)
+        await store.get_series("AAA", 0)
+        expire(store)
+        await store.get_series("AAA", 0)
+        return first
+
+    first = asyncio.run(run())
+    assert len(first) > 0
+    assert len(fetch.calls) == 2
+    assert fetch.calls[1][0] == int(first["t"][-1])
+    assert store.stats()["local_hits"] == 1
+
+
+def test_refresh_false_skips_stale_tails(tmp_path):
+    fetch = Fetcher()
+    store = BarStore(fetch, str(tmp_path))
+
+    async def run():
+        await store.get_series("AAA", 0)
+        expire(store)
+        await store.get_series("AAA", 0, refresh=False)
+
+    asyncio.run(run())
+    assert len(fetch.calls) == 1
+
+
+def test_failed_fetch_backs_off(tmp_path, monkeypatch):
+    monkeypatch.setattr("config.settings.BAR_FETCH_RETRY_INTERVAL", 300)
+    fetch = Fetcher()
+    fetch.failing = True
+    store = BarStore(fetch, str(tmp_path))
+
+    async def run():
+        for _ in range(3):
+            assert len(await store.get_series("AAA", 0)) == 0
+        store._failed_at[("AAA", "1d")] -= 301
+        fetch.failing = False
+        return await store.get_series("AAA", 0)
+
+    series = asyncio.run(run())
+    assert len(fetch.calls) == 2
+    assert len(series) > 0
+    assert store.stats()["failed_fetches"] == 1
+
+
+def test_concurrent_calls_share_one_fetch_and_release_their_locks(tmp_path):
+    fetch = Fetcher()
+    store = BarStore(fetch, str(tmp_path))
+
+    async def run():
+        await asyncio.gather(*[store.get_series(ticker, 0) for ticker in ("AAA", "aaa", "AAA", "BBB")])
+
+    asyncio.run(run())
+    assert len(fetch.calls) == 2
+    assert store.stats()["local_hits"] == 2
+    assert store._locks == {}
+
+
+def test_series_persist_across_restarts_and_backfill_only_older_history(tmp_path):
+    fetch = Fetcher()
+
+    async def first_run():
+        store = BarStore(fetch, str(tmp_path), refresh_ttl=3600)
+        return await store.get_series("AAA", 100 * DAY)
+
+    async def restart():
+        store = BarStore(fetch, str(tmp_path), refresh_ttl=3600)
+        stored = await store.get_series("AAA", 100 * DAY)
+        older = await store.get_series("AAA", 50 * DAY)
+        return stored, older
+
+    first = asyncio.run(first_run())
+    stored, older = asyncio.run(restart())
+    np.testing.assert_array_equal(stored["c"], first["c"])
+    assert len(fetch.calls) == 2
+    assert fetch.calls[1] == (50 * DAY, 100 * DAY)
+    assert int(older["t"][0]) == 50 * DAY
+    assert len(older) == len(first) + 50
+
+
+def test_merge_prefers_updated_bars_and_keeps_order():
+    fetch = Fetcher()
+    series = BarSeries(asyncio.run(fetch("AAA", "1d", 0, 2 * DAY)))
+    update = asyncio.run(fetch("AAA", "1d", 2 * DAY, 3 * DAY))
+    update["c"][:] = 9.0
+    merged = series.merge(update)
+    assert list(merged["t"]) == [0, DAY, 2 * DAY, 3 * DAY]
+    assert list(merged["c"]) == [0.0, 1.0, 9.0, 9.0]
@@ -0,0 +1,71 @@
+import asyncio
+from core.cache import TTLCache
+
+
+def test_concurrent_misses_share_one_load():
+    cache = TTLCache(ttl=60, max_size=10)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"price": 1.0}
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_load("AAPL", loader) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert calls == 1
+    assert all(result == {"price": 1.0} for result in results)
+    assert cache.misses == 1
+    assert cache.coalesced == 4
+
+
+def test_none_is_not_cached():
+    cache = TTLCache(ttl=60, max_size=10)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        return None
+
+    async def run():
+        await cache.get_or_load("AAPL", loader)
+        await cache.get_or_load("AAPL", loader)
+
+    asyncio.run(run())
+    assert calls == 2
+
+
+def test_cancelled_waiter_does_not_cancel_shared_load():
+    cache = TTLCache(ttl=60, max_size=10)
+
+    async def loader():
+        await asyncio.sleep(0.02)
+        return "value"
+
+    async def run():
+        first = asyncio.ensure_future(cache.get_or_load("key", loader))
+        second = asyncio.ensure_future(cache.get_or_load("key", loader))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "value"
+    assert cache.get("key") == "value"
+
+
+def test_lru_eviction_and_expiry():
+    cache = TTLCache(ttl=60, max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.evictions == 1
+
+    cache.set("d", 4, ttl=-1)
+    assert cache.get("d") is None
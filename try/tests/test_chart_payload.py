@@ -0,0 +1,53 @@
+import asyncio
+import numpy as np
+from routers.stock_router import _build_plotly_chart
+from services.bar_store import BarStore
+from services.yahoo_finance_service import YahooFinanceService
+
+DAY = 86400
+
+
+class Bars:
+    """Daily bars for any range; `bump` shifts every close to simulate an amended tail"""
+
+    def __init__(self):
+        self.bump = 0.0
+
+    async def __call__(self, ticker, interval, start_ts, end_ts):
+        days = np.arange(start_ts // DAY, end_ts // DAY + 1, dtype=np.int64)
+        close = 100.0 + days % 7 + self.bump
+        return {"t": days * DAY, "o": close, "h": close, "l": close, "c": close, "v": np.ones(len(days), dtype=np.int64)}
+
+
+def service_with(fetch, directory) -> YahooFinanceService:
+    service = YahooFinanceService(http_client=None)
+    service.bar_store = BarStore(fetch, str(directory), refresh_ttl=0)
+    return service
+
+
+def test_payload_is_reused_until_the_series_changes(tmp_path):
+    fetch = Bars()
+    service = service_with(fetch, tmp_path)
+
+    async def run():
+        first = await service.get_chart_payload("AAA", "1mo")
+        again = await service.get_chart_payload("aaa", "1mo")
+        fetch.bump = 0.5
+        service.bar_store._series[("AAA", "1d")][1]["refreshed_at"] -= 10
+        updated = await service.get_chart_payload("AAA", "1mo")
+        return first, again, updated
+
+    first, again, updated = asyncio.run(run())
+    assert set(first) == {"t", "o", "h", "l", "c", "v"}
+    assert again is first
+    assert updated is not first
+    assert updated["t"] == first["t"]
+    assert updated["c"][-1] == first["c"][-1] + 0.5
+    assert service.chart_payload_cache.stats()["size"] == 1
+
+
+def test_plotly_figure_is_built_from_the_compact_payload():
+    payload = {"t": [0, DAY], "o": [1.0, 2.0], "h": [1.0, 2.0], "l": [1.0, 2.0], "c": [1.0, 2.0], "v": [1, 1]}
+    figure = _build_plotly_chart("aaa", payload)
+    assert figure["data"][0]["type"] == "candlestick"
+    assert figure["layout"]["title"]["text"] == "AAA Stock Chart"
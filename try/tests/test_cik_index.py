@@ -0,0 +1,71 @@
+import asyncio
+from services.cik_index import CikIndex
+
+COMPANIES = {
+    "0": {"cik_str": 320193, "ticker": "AAPL", "title": "Apple Inc."},
+    "1": {"cik_str": 1652044, "ticker": "GOOGL", "title": "Alphabet Inc."},
+    "2": {"cik_str": 1652044, "ticker": "GOOG", "title": "Alphabet Inc."}
+}
+
+
+class SecClient:
+    """Conditional GETs for company_tickers.json: 304 when the ETag matches, None while failing"""
+
+    def __init__(self):
+        self.requests = []
+        self.failing = False
+
+    async def make_conditional_request(self, url, headers=None, etag=None, last_modified=None):
+        self.requests.append(etag)
+        if self.failing:
+            return 503, None, {}
+        if etag == '"v1"':
+            return 304, None, {}
+        return 200, COMPANIES, {"etag": '"v1"', "last_modified": None}
+
+
+def test_downloads_once_then_loads_from_disk_and_revalidates(tmp_path):
+    path = str(tmp_path / "company_tickers.json")
+    client = SecClient()
+
+    async def first_run():
+        index = CikIndex(client, path)
+        ciks = await index.get_ciks(["aapl", "GOOG", "MSFT"])
+        tickers = await index.get_tickers("1652044")
+        return ciks, tickers, await index.search_titles("alpha")
+
+    ciks, tickers, found = asyncio.run(first_run())
+    assert ciks == {"AAPL": "0000320193", "GOOG": "0001652044", "MSFT": None}
+    assert tickers == ["GOOGL", "GOOG"]
+    assert found == [{"cik": "0001652044", "title": "Alphabet Inc.", "tickers": ["GOOGL", "GOOG"]}]
+
+    async def restart():
+        index = CikIndex(client, path)
+        cik = await index.get_cik("AAPL")
+        changed = await index.refresh()
+        return index, cik, changed
+
+    index, cik, changed = asyncio.run(restart())
+    assert cik == "0000320193"
+    assert not changed
+    # One download, then the restart read the file and revalidated with its stored ETag
+    assert client.requests == [None, '"v1"']
+    assert index.stats()["etag"] == '"v1"'
+
+
+def test_failed_download_is_not_retried_until_the_interval(tmp_path, monkeypatch):
+    monkeypatch.setattr("config.settings.SEC_TICKER_INDEX_RETRY_INTERVAL", 300)
+    client = SecClient()
+    client.failing = True
+    index = CikIndex(client, str(tmp_path / "company_tickers.json"))
+
+    async def run():
+        for _ in range(3):
+            assert await index.get_cik("AAPL") is None
+        assert index.stats()["load_failed"]
+        index._failed_at -= 301
+        client.failing = False
+        return await index.get_cik("AAPL")
+
+    assert asyncio.run(run()) == "0000320193"
+    assert len(client.requests) == 2
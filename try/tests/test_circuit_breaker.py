@@ -0,0 +1,76 @@
+import pytest
+from core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+
+
+@pytest.fixture(autouse=True)
+def breaker_settings(monkeypatch):
+    monkeypatch.setattr("config.settings.CIRCUIT_WINDOW", 60.0)
+    monkeypatch.setattr("config.settings.CIRCUIT_MIN_REQUESTS", 4)
+    monkeypatch.setattr("config.settings.CIRCUIT_ERROR_THRESHOLD", 0.5)
+    monkeypatch.setattr("config.settings.CIRCUIT_OPEN_SECONDS", 30.0)
+    monkeypatch.setattr("config.settings.CIRCUIT_HALF_OPEN_PROBES", 2)
+
+
+def record(breaker: CircuitBreaker, *outcomes: bool):
+    for success in outcomes:
+        breaker.on_result(success, breaker.before_request())
+
+
+def open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker("host")
+    record(breaker, True, False, True, False)
+    assert breaker.state == OPEN
+    return breaker
+
+
+def elapse_open_period(breaker: CircuitBreaker):
+    breaker.opened_at -= 31.0
+
+
+def test_stays_closed_below_minimum_requests():
+    breaker = CircuitBreaker("host")
+    record(breaker, False, False, False)
+    assert breaker.state == CLOSED
+
+
+def test_opens_at_error_threshold_and_rejects():
+    breaker = open_breaker()
+    with pytest.raises(CircuitOpen):
+        breaker.before_request()
+    assert breaker.rejected == 1
+    assert breaker.opened == 1
+
+
+def test_half_open_limits_probes_and_closes_after_successes():
+    breaker = open_breaker()
+    elapse_open_period(breaker)
+
+    first, second = breaker.before_request(), breaker.before_request()
+    assert breaker.state == HALF_OPEN
+    assert first and second
+    with pytest.raises(CircuitOpen):
+        breaker.before_request()
+
+    breaker.on_result(True, first)
+    assert breaker.state == HALF_OPEN
+    breaker.on_result(True, second)
+    assert breaker.state == CLOSED
+    assert breaker.error_rate() == 0.0
+
+
+def test_failed_probe_reopens():
+    breaker = open_breaker()
+    elapse_open_period(breaker)
+    probe = breaker.before_request()
+    breaker.on_result(False, probe)
+    assert breaker.state == OPEN
+    assert breaker.opened == 2
+
+
+def test_abandoned_probe_frees_its_slot():
+    breaker = open_breaker()
+    elapse_open_period(breaker)
+    probes = [breaker.before_request(), breaker.before_request()]
+    breaker.on_abandoned(probes[0])
+    assert breaker.before_request()
+    assert [transition["to"] for transition in breaker.transitions] == [OPEN, HALF_OPEN]
@@ -0,0 +1,40 @@
+import asyncio
+import threading
+import pytest
+from core.executor import BoundedExecutor, ExecutorBusy
+
+
+def test_rejects_work_beyond_workers_plus_queue():
+    executor = BoundedExecutor(max_workers=1, max_queue=1, timeout=5)
+    release = threading.Event()
+
+    async def run():
+        running = asyncio.ensure_future(executor.run(release.wait))
+        queued = asyncio.ensure_future(executor.run(lambda: "queued"))
+        await asyncio.sleep(0.05)
+        stats = executor.stats()
+        with pytest.raises(ExecutorBusy):
+            await executor.run(lambda: "rejected")
+        release.set()
+        return stats, await running, await queued
+
+    stats, running, queued = asyncio.run(run())
+    assert stats["running"] == 1 and stats["queue_depth"] == 1
+    assert running is True and queued == "queued"
+    assert executor.rejected == 1 and executor.completed == 2
+
+
+def test_timeout_frees_the_caller_not_the_worker():
+    executor = BoundedExecutor(max_workers=1, max_queue=0, timeout=0.05)
+    release = threading.Event()
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(release.wait)
+        pending = executor.pending
+        release.set()
+        return pending, await executor.run(lambda x: x * 2, 21, timeout=1)
+
+    pending, result = asyncio.run(run())
+    assert pending == 0 and result == 42
+    assert executor.timeouts == 1
@@ -0,0 +1,75 @@
+import asyncio
+from services.fundamentals_store import FundamentalsStore
+
+
+class Fundamentals:
+    """Returns a numbered payload per fetch, or None while failing"""
+
+    def __init__(self):
+        self.calls = 0
+        self.failing = False
+
+    async def __call__(self, symbol):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return None if self.failing else {"symbol": symbol, "version": self.calls}
+
+
+def expire(store: FundamentalsStore, symbol="AAA"):
+    store._entries[symbol]["expires_at"] = 0
+
+
+def test_concurrent_misses_share_one_fetch_and_persist(tmp_path):
+    fetch = Fundamentals()
+    store = FundamentalsStore(fetch, str(tmp_path))
+
+    async def run():
+        return await asyncio.gather(*[store.get("AAA") for _ in range(3)])
+
+    results = asyncio.run(run())
+    assert fetch.calls == 1
+    assert all(result == {"symbol": "AAA", "version": 1} for result in results)
+    assert store.stats()["misses"] == 1 and store.stats()["coalesced"] == 2
+
+    restarted = FundamentalsStore(fetch, str(tmp_path))
+    assert asyncio.run(restarted.get("AAA")) == {"symbol": "AAA", "version": 1}
+    assert fetch.calls == 1 and restarted.stats()["disk_loads"] == 1
+
+
+def test_stale_entries_are_served_while_revalidating(tmp_path):
+    fetch = Fundamentals()
+    store = FundamentalsStore(fetch, str(tmp_path))
+
+    async def run():
+        await store.get("AAA")
+        expire(store)
+        stale = await store.get("AAA")
+        again = await store.get("AAA")
+        await asyncio.sleep(0.05)
+        return stale, again, await store.get("AAA")
+
+    stale, again, fresh = asyncio.run(run())
+    assert stale["version"] == 1 and again["version"] == 1
+    assert fresh["version"] == 2
+    # Two stale reads started a single background refresh
+    assert fetch.calls == 2
+    assert store.stats()["stale_hits"] == 2
+
+
+def test_failed_refresh_keeps_serving_and_backs_off(tmp_path, monkeypatch):
+    monkeypatch.setattr("config.settings.FUNDAMENTALS_RETRY_INTERVAL", 300)
+    fetch = Fundamentals()
+    store = FundamentalsStore(fetch, str(tmp_path))
+
+    async def run():
+        await store.get("AAA")
+        fetch.failing = True
+        expire(store)
+        await store.get("AAA")
+        await asyncio.sleep(0.05)
+        return await store.get("AAA")
+
+    assert asyncio.run(run())["version"] == 1
+    assert fetch.calls == 2
+    assert store.stats()["refresh_failures"] == 1
+    assert store.stats()["fresh_hits"] == 1
@@ -0,0 +1,44 @@
+import asyncio
+import httpx
+from core.http_client import HttpClient
+
+
+def test_hosts_get_their_own_pools_and_others_share_the_default(monkeypatch):
+    monkeypatch.setattr("config.settings.UPSTREAM_OVERRIDE_URL", "")
+    http_client = HttpClient()
+    client = http_client.client
+
+    yahoo = client._transport_for_url(httpx.URL("https://query1.finance.yahoo.com/v8/finance/chart/AAPL"))
+    sec = client._transport_for_url(httpx.URL("https://www.sec.gov/files/company_tickers.json"))
+    other = client._transport_for_url(httpx.URL("https://example.com/"))
+    assert yahoo is http_client.transports["query1.finance.yahoo.com"]
+    assert sec is http_client.transports["www.sec.gov"]
+    assert other is http_client.default_transport
+    assert sec._pool._max_connections == 5
+
+    assert set(http_client.pool_stats()) == {*http_client.transports, "default"}
+    asyncio.run(http_client.close())
+
+
+def test_conditional_request_sends_validators_and_handles_304():
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, json={"ok": True}, headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+
+    http_client = HttpClient()
+    http_client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    async def run():
+        first = await http_client.make_conditional_request("https://data.sec.gov/submissions/CIK1.json")
+        second = await http_client.make_conditional_request("https://data.sec.gov/submissions/CIK1.json", etag=first[2]["etag"])
+        await http_client.close()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == (200, {"ok": True}, {"etag": '"v1"', "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+    assert second == (304, None, {"etag": '"v1"'})
+    assert seen == [None, '"v1"']
@@ -0,0 +1,75 @@
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+from services.bar_store import SUPPORTED_INTERVALS, BarSeries, BarStore
+from services.indicators import IndicatorEngine, ewm, parse_indicators, warmup_seconds
+
+
+def make_bars(count: int, seed: int = 1) -> BarSeries:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, count))
+    return BarSeries({
+        "t": 1_600_000_000 + np.arange(count, dtype=np.int64) * 86400,
+        "o": close,
+        "h": close + 1.0,
+        "l": close - 1.0,
+        "c": close,
+        "v": rng.integers(1_000, 10_000, count)
+    })
+
+
+@pytest.mark.parametrize("alpha", [0.5, 2 / 21, 1 / 200])
+def test_ewm_matches_pandas(alpha):
+    values = make_bars(3000)["c"]
+    expected = pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    np.testing.assert_allclose(ewm(values, alpha), expected, rtol=1e-9)
+
+
+def test_ewm_with_initial_value():
+    values = np.array([1.0, 2.0, 3.0])
+    np.testing.assert_allclose(ewm(values, 0.5, initial=0.0), [0.5, 1.25, 2.125])
+    assert len(ewm(np.empty(0), 0.5)) == 0
+
+
+def test_parse_indicators():
+    names = [indicator.name for indicator in parse_indicators("RSI, ema50,sma,macd,rsi14")]
+    assert names == ["rsi14", "ema50", "sma20", "macd"]
+
+    for bad in ("", "foo", "macd12", "sma1", "rsi100000"):
+        with pytest.raises(ValueError):
+            parse_indicators(bad)
+
+
+def test_every_supported_interval_gets_warmup():
+    indicators = parse_indicators("ema20")
+    for interval in SUPPORTED_INTERVALS:
+        assert warmup_seconds(indicators, interval) > 7 * 86400
+
+
+def test_incremental_update_matches_full_compute():
+    bars = make_bars(300)
+    indicators = parse_indicators("rsi14,ema20,sma20,bb20,macd,vwap")
+    engine = IndicatorEngine()
+    # The stored series first ends 10 bars earlier, then the tail refresh appends them
+    engine.evaluate(("T", "1d"), BarSeries({name: values[:290] for name, values in bars.columns.items()}), indicators, 0)
+    incremental = engine.evaluate(("T", "1d"), bars, indicators, 250)
+    full = IndicatorEngine().evaluate(("T", "1d"), bars, indicators, 250)
+
+    assert engine.incremental_updates == 1
+    for name, values in full["indicators"].items():
+        if isinstance(values, dict):
+            for line, line_values in values.items():
+                np.testing.assert_allclose(incremental["indicators"][name][line], line_values, rtol=1e-9)
+        else:
+            np.testing.assert_allclose(incremental["indicators"][name], values, rtol=1e-9)
+
+
+@pytest.mark.parametrize("ticker,interval", [("../ETC", "1d"), ("AAPL", "../../x"), ("AAPL", "5m"), ("A/B", "1d")])
+def test_bar_store_rejects_unsafe_keys(tmp_path, ticker, interval):
+    async def fetch(*args):
+        raise AssertionError("must not fetch")
+
+    with pytest.raises(ValueError):
+        asyncio.run(BarStore(fetch, str(tmp_path)).get_series(ticker, 0, interval))
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,49 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from core.metrics import Counter, Histogram, MetricsMiddleware, RequestMetrics, render_samples
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency", ("host",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, ("a",))
+
+    assert histogram.render() == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{host="a",le="0.1"} 2',
+        'latency_seconds_bucket{host="a",le="1.0"} 3',
+        'latency_seconds_bucket{host="a",le="+Inf"} 4',
+        'latency_seconds_sum{host="a"} 3.65',
+        'latency_seconds_count{host="a"} 4'
+    ]
+
+
+def test_counters_and_samples_escape_labels_and_skip_missing_values():
+    counter = Counter("retries_total", "Retries", ("host",))
+    counter.inc(('say "hi"\n',))
+    counter.inc(('say "hi"\n',), 2)
+    assert counter.render()[2] == 'retries_total{host="say \\"hi\\"\\n"} 3'
+
+    lines = render_samples("queue_depth", "gauge", "Depth", [({"provider": "yahoo"}, 2), ({"provider": "sec"}, None), ({}, 1)])
+    assert lines[2:] == ['queue_depth{provider="yahoo"} 2.0', "queue_depth 1.0"]
+
+
+def test_middleware_labels_by_route_template():
+    app = FastAPI()
+    metrics = RequestMetrics()
+
+    @app.get("/stocks/{ticker}/quote")
+    async def quote(ticker: str):
+        return {"ticker": ticker}
+
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+    client = TestClient(app)
+    client.get("/stocks/AAPL/quote")
+    client.get("/stocks/MSFT/quote")
+    client.get("/nope")
+
+    rendered = "\n".join(metrics.latency.render())
+    assert 'http_request_duration_seconds_count{method="GET",route="/stocks/{ticker}/quote",status="200"} 2' in rendered
+    assert 'http_request_duration_seconds_count{method="GET",route="unmatched",status="404"} 1' in rendered
+    assert metrics.in_flight == 0
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from portfolio.analytics import DAY
+from portfolio.nav import epoch_day, replay_nav
+from services.bar_store import BarSeries
+
+START = epoch_day("2024-03-04")
+
+
+def closes(values, first_day: int = START) -> BarSeries:
+    values = np.asarray(values, dtype=np.float64)
+    return BarSeries({
+        "t": (first_day + np.arange(len(values), dtype=np.int64)) * DAY,
+        "o": values,
+        "h": values,
+        "l": values,
+        "c": values,
+        "v": np.zeros(len(values), dtype=np.int64)
+    })
+
+
+def day(offset: int) -> str:
+    return str(np.datetime64(START + offset, "D"))
+
+
+def test_replay_nav_values_cost_and_pnl():
+    series = {"A": closes([10, 11, 12, 13, 14]), "B": closes([50, 50, 40, 40, 45])}
+    flows = [
+        ("A", "2024-01-02", 10, 90.0),  # bought before the window: held from its first day
+        ("B", day(2), 2, 80.0),
+        ("C", day(1), 1, 5.0)  # no closes: ignored
+    ]
+    history = replay_nav(series, flows, START, START + 4)
+
+    assert list(history["dates"]) == [day(i) for i in range(5)]
+    np.testing.assert_allclose(history["value"], [100, 110, 200, 210, 230])
+    np.testing.assert_allclose(history["cost"], [90, 90, 170, 170, 170])
+    np.testing.assert_allclose(history["pnl"], [10, 20, 30, 40, 60])
+    np.testing.assert_allclose(history["daily_pnl"], [0, 10, 10, 10, 20])
+
+    # Day 2's inflow is not a return: (200 - 110 - 80) / 110
+    daily = np.array([0, 0.1, 10 / 110, 10 / 200, 20 / 210])
+    np.testing.assert_allclose(history["cumulative_return"], np.cumprod(1 + daily) - 1)
+
+
+def test_daily_pnl_starts_at_zero_inside_a_later_window():
+    series = {"A": closes([10, 20, 30])}
+    history = replay_nav(series, [("A", day(0), 1, 10.0)], START + 1, START + 2)
+    assert history["pnl"][0] == pytest.approx(10.0)
+    assert history["daily_pnl"][0] == 0.0
+    assert history["daily_pnl"][1] == pytest.approx(10.0)
+
+
+def test_empty_window():
+    history = replay_nav({"A": closes([10, 11])}, [("A", day(0), 1, 10.0)], START + 10, START + 20)
+    assert history["value"] == [] and history["daily_pnl"] == []
@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+from portfolio.portfolio_io import iter_lines, iter_records, parse_lot, resolve_format
+from portfolio.portfolio_store import Lot
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+def records(fmt: str, *chunks: bytes):
+    async def collect():
+        return [record async for record in iter_records(iter_lines(stream(*chunks)), fmt)]
+    return asyncio.run(collect())
+
+
+def test_lines_split_across_chunks_with_bom_and_crlf():
+    async def collect():
+        return [line async for line in iter_lines(stream(b"\xef\xbb\xbfticker,sha", b"res\r\nAAA,1", b"\r\nBBB,2"))]
+    assert asyncio.run(collect()) == ["ticker,shares", "AAA,1", "BBB,2"]
+
+
+def test_csv_rows_report_errors_by_line():
+    rows = records("csv", b"Symbol,Shares,Purchase_Price,Date\n", b"aapl,10,150.5,2024-01-02\n\nMSFT,1\n", b"TSLA,3,200,\n")
+    assert rows[0] == (2, {"ticker": "aapl", "shares": "10", "price": "150.5", "purchased_at": "2024-01-02"}, None)
+    assert rows[1] == (4, None, "Expected 4 columns, got 2")
+    assert rows[2][0] == 5 and rows[2][2] is None
+
+
+def test_csv_header_missing_columns_raises():
+    with pytest.raises(ValueError, match="price"):
+        records("csv", b"ticker,shares\nAAPL,1\n")
+
+
+def test_invalid_utf8_rejects_only_that_row():
+    rows = records("csv", b"ticker,shares,price\nAAA,1,2\n", b"B\xff\xfeB,1,2\nCCC,3,4\n")
+    assert [(line, error) for line, _, error in rows] == [(2, None), (3, "Invalid UTF-8 text"), (4, None)]
+
+    rows = records("ndjson", b'{"ticker": "\xe9"}\n{"ticker": "AAA"}\n')
+    assert [(line, error) for line, _, error in rows] == [(1, "Invalid UTF-8 text"), (2, None)]
+
+    with pytest.raises(ValueError, match="UTF-8"):
+        records("csv", b"tick\xffer,shares,price\nAAA,1,2\n")
+
+
+def test_ndjson_errors():
+    rows = records("ndjson", b'{"ticker": "AAA", "shares": 1, "price": 2}\n[1]\n{bad\n')
+    assert rows[0][2] is None
+    assert rows[1] == (2, None, "Expected a JSON object")
+    assert rows[2][2].startswith("Invalid JSON")
+
+
+def test_parse_lot_normalizes_and_validates():
+    assert parse_lot({"Symbol": " msft ", "shares": "5.0", "avg_cost": "10", "date": "2024-02-03T10:00:00"}, "2024-06-01") == Lot("MSFT", 5, 10.0, "2024-02-03")
+    assert parse_lot({"ticker": "BRK.B", "shares": 1, "price": 0}, "2024-06-01").purchased_at == "2024-06-01"
+
+    for record, message in [
+        ({"ticker": "../x", "shares": 1, "price": 1}, "Invalid ticker"),
+        ({"ticker": "AAA", "shares": 1.5, "price": 1}, "whole number"),
+        ({"ticker": "AAA", "shares": 0, "price": 1}, "whole number"),
+        ({"ticker": "AAA", "shares": 1, "price": "nan"}, "non-negative"),
+        ({"ticker": "AAA", "shares": 1, "price": 1, "purchased_at": "02/03/2024"}, "Invalid date")
+    ]:
+        with pytest.raises(ValueError, match=message):
+            parse_lot(record, "2024-06-01")
+
+
+def test_resolve_format():
+    assert resolve_format(None, "application/x-ndjson") == "ndjson"
+    assert resolve_format(None, None) == "csv"
+    with pytest.raises(ValueError):
+        resolve_format("xml", None)
@@ -0,0 +1,99 @@
+import asyncio
+import pytest
+from portfolio.portfolio_store import Lot, PortfolioStore
+
+
+def test_batched_writes_update_positions_and_persist(tmp_path):
+    path = str(tmp_path / "portfolio.db")
+
+    async def write():
+        store = PortfolioStore(path)
+        await store.open()
+        await asyncio.gather(
+            store.add_lots("test", [Lot("AAA", 10, 5.0, "2024-01-02")]),
+            store.add_lots("test", [Lot("AAA", 10, 7.0, "2024-02-01"), Lot("BBB", 1, 100.0, "2024-03-01")])
+        )
+        position = store.get_positions("test")["AAA"]
+        await store.close()
+        return position
+
+    position = asyncio.run(write())
+    assert position.shares == 20
+    assert position.avg_cost == pytest.approx(6.0)
+
+    async def reopen():
+        store = PortfolioStore(path)
+        await store.open()
+        positions = store.get_positions("test")
+        lots = await store.get_lots("test", "AAA")
+        await store.close()
+        return positions, lots
+
+    positions, lots = asyncio.run(reopen())
+    assert set(positions) == {"AAA", "BBB"}
+    assert positions["AAA"].first_purchase == "2024-01-02"
+    assert len(lots) == 2
+
+
+def test_close_returns_when_the_writer_has_died(tmp_path):
+    async def run():
+        store = PortfolioStore(str(tmp_path / "portfolio.db"))
+        await store.open()
+        await store.get_portfolio_id("test", create=True)
+        store._writer_task.cancel()
+        await asyncio.sleep(0)
+        queued = asyncio.ensure_future(store.add_lots("test", [Lot("AAA", 1, 1.0, "2024-01-02")]))
+        await asyncio.sleep(0.01)
+        await asyncio.wait_for(store.close(), timeout=2)
+        with pytest.raises(RuntimeError, match="closed"):
+            await queued
+
+    asyncio.run(run())
+
+
+def test_removals_update_positions_holders_and_disk(tmp_path):
+    path = str(tmp_path / "portfolio.db")
+
+    async def write():
+        store = PortfolioStore(path)
+        await store.open()
+        await store.add_lots("test", [Lot("AAA", 10, 5.0, "2024-01-02"), Lot("AAA", 10, 7.0, "2024-02-01"), Lot("BBB", 1, 100.0, "2024-03-01")])
+        lots = await store.get_lots("test", "AAA")
+        assert await store.remove_lot("test", lots[0]["id"])
+        assert not await store.remove_lot("test", lots[0]["id"])
+        assert await store.remove_position("test", "BBB") == 1
+        assert not await store.remove_lot("missing", 1)
+        result = store.get_positions("test"), store.held_tickers()
+        await store.close()
+        return result
+
+    positions, held = asyncio.run(write())
+    assert set(positions) == {"AAA"}
+    assert "AAA" in held and "BBB" not in held
+    assert positions["AAA"].shares == 10
+    assert positions["AAA"].avg_cost == pytest.approx(7.0)
+
+    async def reopen():
+        store = PortfolioStore(path)
+        await store.open()
+        result = store.get_positions("test"), await store.get_flows("test")
+        await store.close()
+        return result
+
+    positions, flows = asyncio.run(reopen())
+    assert positions["AAA"].shares == 10
+    assert flows == [("AAA", "2024-02-01", 10, 70.0)]
+
+
+def test_lot_pages_follow_the_ticker_index(tmp_path):
+    async def run():
+        store = PortfolioStore(str(tmp_path / "portfolio.db"))
+        await store.open()
+        await store.add_lots("test", [Lot(ticker, 1, 1.0, "2024-01-02") for ticker in ("CCC", "AAA", "BBB", "AAA", "CCC")])
+        pages = [page async for page in store.iter_lot_pages("test", 2)]
+        await store.close()
+        return pages
+
+    pages = asyncio.run(run())
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [row[0] for page in pages for row in page] == ["AAA", "AAA", "BBB", "CCC", "CCC"]
@@ -0,0 +1,88 @@
+import asyncio
+import time
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+import pytz
+from services.prefetch_scheduler import PrefetchScheduler, market_session
+
+
+def eastern(*args) -> datetime:
+    return pytz.timezone("America/New_York").localize(datetime(*args))
+
+
+@pytest.mark.parametrize("moment, session", [
+    (eastern(2024, 3, 4, 9, 29), "extended"),
+    (eastern(2024, 3, 4, 9, 30), "regular"),
+    (eastern(2024, 3, 4, 15, 59), "regular"),
+    (eastern(2024, 3, 4, 16, 0), "extended"),
+    (eastern(2024, 3, 4, 20, 0), "closed"),
+    (eastern(2024, 3, 4, 3, 59), "closed"),
+    (eastern(2024, 3, 9, 12, 0), "closed")
+])
+def test_market_session(moment, session):
+    assert market_session(moment.astimezone(pytz.utc)) == session
+
+
+class Upstream:
+    """Stands in for HttpClient's breakers and Yahoo rate limit bucket"""
+
+    def __init__(self, rate=10.0):
+        self.bucket = SimpleNamespace(base_rate=rate, waiting=0)
+        self.circuit_breakers = SimpleNamespace(breakers={})
+        self.rate_limiter = SimpleNamespace(for_host=lambda host: self.bucket)
+
+
+def scheduler(http_client, yahoo_service=None, store=None) -> PrefetchScheduler:
+    portfolio_manager = SimpleNamespace(store=store)
+    return PrefetchScheduler(http_client, yahoo_service, portfolio_manager)
+
+
+def test_jobs_are_spaced_by_the_rate_share(monkeypatch):
+    monkeypatch.setattr("config.settings.PREFETCH_RATE_FRACTION", 0.5)
+    prefetch = scheduler(Upstream(rate=100.0))
+    ran = []
+
+    async def job():
+        ran.append(time.monotonic())
+
+    asyncio.run(prefetch._run_paced("quotes", [job] * 4, 0.0, requests_per_job=1))
+    gaps = [later - earlier for earlier, later in zip(ran, ran[1:])]
+    # 100 requests/s at a 50% share leaves one job every 20ms
+    assert len(ran) == 4 and min(gaps) >= 0.018
+    assert prefetch.jobs["quotes"].runs == 4
+
+
+def test_jobs_are_skipped_while_users_wait_or_the_circuit_is_open():
+    upstream = Upstream(rate=1000.0)
+    prefetch = scheduler(upstream)
+    ran = []
+
+    async def job():
+        ran.append(1)
+
+    upstream.bucket.waiting = 1
+    asyncio.run(prefetch._run_paced("warm", [job] * 2, 0.0, requests_per_job=2))
+    upstream.bucket.waiting = 0
+    upstream.circuit_breakers.breakers["query1.finance.yahoo.com"] = SimpleNamespace(state="open")
+    asyncio.run(prefetch._run_paced("warm", [job], 0.0, requests_per_job=2))
+    assert ran == []
+    assert prefetch.jobs["warm"].to_dict()["skipped"] == {"rate_budget": 2, "circuit_open": 1}
+
+
+def test_quote_refresh_bypasses_the_cache_and_updates_prices():
+    calls = []
+    prices = {}
+
+    async def get_stock_quotes(symbols, ttl=None, refresh=False):
+        calls.append((symbols, ttl, refresh))
+        return {"AAA": SimpleNamespace(price=12.5), "BBB": None}
+
+    prefetch = scheduler(
+        Upstream(),
+        yahoo_service=SimpleNamespace(get_stock_quotes=get_stock_quotes),
+        store=SimpleNamespace(set_price=prices.__setitem__)
+    )
+    asyncio.run(prefetch._refresh_quotes(["AAA", "BBB"], ttl=7.0))
+    assert calls == [(["AAA", "BBB"], 7.0, True)]
+    assert prices == {"AAA": 12.5}
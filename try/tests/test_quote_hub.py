@@ -0,0 +1,83 @@
+import asyncio
+from core.quote_hub import QuoteHub, QuoteSubscriber
+from models.stock_models import StockQuote
+
+
+def quote(symbol: str, price: float) -> StockQuote:
+    return StockQuote(symbol=symbol, price=price, change=0, changePercent=0, volume=0, previousClose=price)
+
+
+class Prices:
+    """Quote fetcher over a mutable price table, counting calls per symbol"""
+
+    def __init__(self, **prices):
+        self.prices = prices
+        self.calls = {}
+
+    async def __call__(self, symbol):
+        self.calls[symbol] = self.calls.get(symbol, 0) + 1
+        return quote(symbol, self.prices[symbol])
+
+
+def drain(subscriber: QuoteSubscriber):
+    messages = []
+    while not subscriber.queue.empty():
+        messages.append(subscriber.queue.get_nowait()["data"])
+    return [(message["symbol"], message["price"]) for message in messages]
+
+
+def test_one_loop_per_symbol_shared_by_subscribers():
+    prices = Prices(AAPL=1.0, MSFT=2.0)
+    hub = QuoteHub(prices, interval=0.01)
+
+    async def run():
+        first, second = hub.connect(), hub.connect()
+        hub.subscribe(first, "aapl")
+        hub.subscribe(second, "AAPL")
+        hub.subscribe(second, "MSFT")
+        await asyncio.sleep(0.035)
+        stats = hub.stats()
+
+        hub.disconnect(second)
+        assert hub.stats()["symbols"] == 1
+        hub.disconnect(first)
+        await asyncio.sleep(0.02)
+        polls = dict(prices.calls)
+        await asyncio.sleep(0.02)
+        return stats, first, second, polls
+
+    stats, first, second, polls = asyncio.run(run())
+    assert stats["symbols"] == 2 and stats["subscriptions"] == 3
+    # Both AAPL subscribers got the single upstream answer; an unchanged price is not republished
+    assert drain(first) == [("AAPL", 1.0)]
+    assert sorted(drain(second)) == [("AAPL", 1.0), ("MSFT", 2.0)]
+    assert hub.stats() == {"symbols": 0, "subscriptions": 0, "published": 3, "upstream_polls": sum(polls.values())}
+    assert prices.calls == polls
+
+
+def test_price_changes_publish_and_late_joiners_get_the_last_quote():
+    prices = Prices(AAPL=1.0)
+    hub = QuoteHub(prices, interval=0.01)
+
+    async def run():
+        early = hub.connect()
+        hub.subscribe(early, "AAPL")
+        await asyncio.sleep(0.005)
+        prices.prices["AAPL"] = 1.5
+        await asyncio.sleep(0.02)
+        late = hub.connect()
+        hub.subscribe(late, "AAPL")
+        await hub.close()
+        return early, late
+
+    early, late = asyncio.run(run())
+    assert drain(early) == [("AAPL", 1.0), ("AAPL", 1.5)]
+    assert drain(late) == [("AAPL", 1.5)]
+
+
+def test_slow_subscriber_drops_its_oldest_updates():
+    subscriber = QuoteSubscriber(queue_size=2)
+    for price in (1.0, 2.0, 3.0):
+        subscriber.push({"type": "quote", "data": quote("AAPL", price).model_dump()})
+    assert drain(subscriber) == [("AAPL", 2.0), ("AAPL", 3.0)]
+    assert subscriber.dropped == 1
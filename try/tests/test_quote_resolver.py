@@ -0,0 +1,101 @@
+import asyncio
+import pytest
+from core.cache import TTLCache
+from core.quote_resolver import QuoteResolver
+from models.stock_models import StockQuote
+
+
+def quote(symbol: str, previous_close: float = 1.0) -> StockQuote:
+    return StockQuote(symbol=symbol, price=1.0, change=0, changePercent=0, volume=0, previousClose=previous_close)
+
+
+class Provider:
+    """Answers after `delay` seconds (None to fail), recording calls and cancellations"""
+
+    def __init__(self, delay: float, previous_close: float = 1.0, fails: bool = False):
+        self.delay = delay
+        self.previous_close = previous_close
+        self.fails = fails
+        self.calls = 0
+        self.cancelled = 0
+
+    async def __call__(self, symbol):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return None if self.fails else quote(symbol, self.previous_close)
+
+
+@pytest.fixture(autouse=True)
+def hedge_settings(monkeypatch):
+    monkeypatch.setattr("config.settings.QUOTE_HEDGE_DEFAULT_DELAY", 0.02)
+    monkeypatch.setattr("config.settings.QUOTE_RESOLVE_TIMEOUT", 1.0)
+
+
+def resolver(providers, fallbacks=None) -> QuoteResolver:
+    return QuoteResolver(providers, TTLCache(ttl=60, max_size=10, name="quotes"), fallbacks=fallbacks)
+
+
+def test_slow_primary_is_hedged_and_the_loser_cancelled():
+    slow, fast = Provider(0.5), Provider(0.01)
+    quotes = resolver({"slow": slow, "fast": fast})
+
+    result = asyncio.run(quotes.get_quote("aapl"))
+    assert result.symbol == "AAPL"
+    assert slow.cancelled == 1 and fast.calls == 1
+    stats = quotes.stats()
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+    assert stats["providers"]["slow"]["cancelled"] == 1
+    assert stats["recent"][-1]["winner"] == "fast"
+
+
+def test_cache_is_shared_and_concurrent_misses_resolve_once():
+    primary = Provider(0.01)
+    cache = TTLCache(ttl=60, max_size=10, name="quotes")
+    quotes = QuoteResolver({"primary": primary}, cache)
+
+    async def run():
+        return await asyncio.gather(*[quotes.get_quote(symbol) for symbol in ("AAPL", "aapl", "AAPL")])
+
+    results = asyncio.run(run())
+    assert primary.calls == 1
+    assert all(result is results[0] for result in results)
+    assert cache.lookup("AAPL") is results[0]
+
+
+def test_degraded_fallback_never_races_a_slow_full_quote():
+    slow, degraded = Provider(0.1), Provider(0.0, previous_close=0.0)
+    quotes = resolver({"yahoo": slow}, fallbacks={"polygon": degraded})
+
+    result = asyncio.run(quotes.get_quote("AAPL"))
+    assert result.previousClose == 1.0
+    assert degraded.calls == 0
+    assert quotes.stats()["hedged"] == 0
+
+
+def test_fallback_answers_once_every_provider_failed():
+    failing, degraded = Provider(0.0, fails=True), Provider(0.0, previous_close=0.0)
+    quotes = resolver({"yahoo": failing}, fallbacks={"polygon": degraded})
+
+    result = asyncio.run(quotes.get_quote("AAPL"))
+    assert result.previousClose == 0.0
+    stats = quotes.stats()
+    assert stats["fallbacks"] == 1
+    assert stats["providers"]["yahoo"]["errors"] == 1
+    assert stats["providers"]["polygon"]["wins"] == 1
+
+
+def test_failing_provider_drops_behind_a_healthy_one(monkeypatch):
+    monkeypatch.setattr("config.settings.QUOTE_HEALTH_MIN_SAMPLES", 3)
+    failing, healthy = Provider(0.0, fails=True), Provider(0.0)
+    quotes = resolver({"failing": failing, "healthy": healthy})
+
+    async def run():
+        for i in range(4):
+            await quotes._resolve(f"T{i}")
+
+    asyncio.run(run())
+    assert quotes.ranked() == ["healthy", "failing"]
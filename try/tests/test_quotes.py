@@ -0,0 +1,80 @@
+import asyncio
+import time
+from services.yahoo_finance_service import YahooFinanceService
+
+
+class FakeHttpClient:
+    """Answers Yahoo chart and batch quote URLs from a price table, recording each request"""
+
+    def __init__(self, prices):
+        self.prices = prices
+        self.requests = []
+
+    async def make_request(self, url, params=None):
+        self.requests.append((url, params))
+        await asyncio.sleep(0.01)
+        if "/v7/finance/quote" in url:
+            symbols = params["symbols"].split(",")
+            return {"quoteResponse": {"result": [
+                {"symbol": symbol, "regularMarketPrice": self.prices[symbol], "regularMarketPreviousClose": 100.0}
+                for symbol in symbols if symbol in self.prices
+            ]}}
+        symbol = url.rsplit("/", 1)[-1]
+        if symbol not in self.prices:
+            return None
+        return {"chart": {"result": [{"meta": {"regularMarketPrice": self.prices[symbol], "previousClose": 100.0}}]}}
+
+
+def test_concurrent_quote_misses_share_one_request():
+    http_client = FakeHttpClient({"AAPL": 110.0})
+    service = YahooFinanceService(http_client)
+
+    async def run():
+        quotes = await asyncio.gather(*[service.get_stock_quote(ticker) for ticker in ("aapl", "AAPL", "Aapl")])
+        again = await service.get_stock_quote("AAPL")
+        return quotes, again
+
+    quotes, again = asyncio.run(run())
+    assert len(http_client.requests) == 1
+    assert all(quote.price == 110.0 and quote.changePercent == 10.0 for quote in quotes)
+    assert again is quotes[0]
+    stats = service.quote_cache.stats()
+    assert stats["coalesced"] == 2 and stats["hits"] == 1
+
+
+def test_batch_quotes_fetch_only_misses_in_chunks(monkeypatch):
+    monkeypatch.setattr("config.settings.YAHOO_BATCH_QUOTE_SIZE", 2)
+    http_client = FakeHttpClient({"AAA": 101.0, "BBB": 102.0, "CCC": 103.0, "DDD": 104.0})
+    service = YahooFinanceService(http_client)
+
+    async def run():
+        await service.get_stock_quote("AAA")
+        return await service.get_stock_quotes(["aaa", "BBB", "CCC", "bbb", "DDD", "ZZZ"])
+
+    quotes = asyncio.run(run())
+    assert list(quotes) == ["AAA", "BBB", "CCC", "DDD", "ZZZ"]
+    assert [quote.price for quote in list(quotes.values())[:4]] == [101.0, 102.0, 103.0, 104.0]
+    # ZZZ is missing from the batch answer, so it falls back to the single-symbol path
+    assert quotes["ZZZ"] is None
+    batches = [params["symbols"] for url, params in http_client.requests if params]
+    assert batches == ["BBB,CCC", "DDD,ZZZ"]
+    assert http_client.requests[-1][0].endswith("/ZZZ")
+
+
+def test_batch_refresh_ignores_fresh_entries_and_sets_ttl():
+    http_client = FakeHttpClient({"AAA": 101.0})
+    service = YahooFinanceService(http_client)
+
+    async def run():
+        await service.get_stock_quotes(["AAA"])
+        http_client.prices["AAA"] = 105.0
+        cached = await service.get_stock_quotes(["AAA"])
+        refreshed = await service.get_stock_quotes(["AAA"], ttl=60, refresh=True)
+        return cached, refreshed
+
+    cached, refreshed = asyncio.run(run())
+    assert cached["AAA"].price == 101.0
+    assert refreshed["AAA"].price == 105.0
+    assert len(http_client.requests) == 2
+    expires_at, _ = service.quote_cache._entries["AAA"]
+    assert expires_at - time.monotonic() > 30
@@ -0,0 +1,68 @@
+import asyncio
+import time
+import pytest
+from core.rate_limiter import RateLimitExceeded, RateLimiter, TokenBucket, parse_retry_after
+
+
+def test_burst_is_immediate_then_paced():
+    bucket = TokenBucket("test", rate=50.0, burst=3)
+
+    async def run():
+        started = time.monotonic()
+        for _ in range(3):
+            await bucket.acquire()
+        burst = time.monotonic() - started
+        await bucket.acquire()
+        return burst, time.monotonic() - started
+
+    burst, total = asyncio.run(run())
+    assert burst < 0.01
+    assert total >= 0.015
+    assert bucket.acquired == 4
+
+
+def test_rejects_when_queue_exceeds_max_wait():
+    bucket = TokenBucket("test", rate=1.0, burst=1)
+
+    async def run():
+        await bucket.acquire()
+        with pytest.raises(RateLimitExceeded):
+            await bucket.acquire(max_wait=0.1)
+
+    asyncio.run(run())
+    assert bucket.rejected == 1
+
+
+def test_throttle_halves_rate_and_success_recovers(monkeypatch):
+    monkeypatch.setattr("config.settings.RATE_LIMIT_MIN_FRACTION", 0.1)
+    monkeypatch.setattr("config.settings.RATE_LIMIT_RECOVERY", 0.25)
+    bucket = TokenBucket("test", rate=10.0, burst=5)
+
+    bucket.on_throttled(retry_after=2.0)
+    assert bucket.rate == 5.0
+    assert bucket.tokens == 0
+    assert bucket.estimated_wait() > 1.5
+
+    bucket.on_success()
+    assert bucket.rate == 7.5
+    for _ in range(5):
+        bucket.on_success()
+    assert bucket.rate == 10.0
+
+    for _ in range(10):
+        bucket.on_throttled()
+    assert bucket.rate == pytest.approx(1.0)
+
+
+def test_hosts_share_their_provider_bucket():
+    limiter = RateLimiter({"yahoo": {"hosts": ["q1.example", "q2.example"], "rate": 5, "burst": 5}})
+    assert limiter.for_host("q1.example") is limiter.for_host("q2.example")
+    assert limiter.for_host("other.example") is None
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("2.5") == 2.5
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
@@ -0,0 +1,34 @@
+import json
+from datetime import date
+import numpy as np
+import pytest
+from core.responses import FastJSONResponse
+from models.stock_models import StockQuote
+
+CONTENT = {
+    "quote": StockQuote(symbol="AAA", price=1.5, change=0.5, changePercent=50.0, volume=10, previousClose=1.0),
+    "t": np.array([1, 2], dtype=np.int64),
+    "c": np.array([1.5, np.float64(2.25)]),
+    "day": date(2024, 1, 2),
+    1: "non-string key"
+}
+EXPECTED = {
+    "quote": {"symbol": "AAA", "price": 1.5, "change": 0.5, "changePercent": 50.0, "volume": 10, "previousClose": 1.0},
+    "t": [1, 2],
+    "c": [1.5, 2.25],
+    "day": "2024-01-02",
+    "1": "non-string key"
+}
+
+
+@pytest.mark.parametrize("orjson_available", [True, False])
+def test_renders_models_arrays_and_dates(monkeypatch, orjson_available):
+    monkeypatch.setattr("core.responses.ORJSON_AVAILABLE", orjson_available)
+    response = FastJSONResponse(CONTENT)
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == EXPECTED
+
+
+def test_unknown_objects_still_fail():
+    with pytest.raises(TypeError):
+        FastJSONResponse({"x": object()})
@@ -0,0 +1,72 @@
+import asyncio
+import os
+from services.sec_filings_store import SECFilingsStore
+
+CIK = "0000320193"
+
+
+def columns(*rows):
+    """SEC's columnar filings layout from (accession, form, filing date) rows"""
+    return {
+        "accessionNumber": [row[0] for row in rows],
+        "form": [row[1] for row in rows],
+        "filingDate": [row[2] for row in rows],
+        "reportDate": ["" for _ in rows],
+        "primaryDocument": ["doc.htm" for _ in rows]
+    }
+
+
+class SecClient:
+    """Serves one submissions document with an ETag and one history archive, recording requests"""
+
+    def __init__(self):
+        self.requests = []
+
+    async def make_conditional_request(self, url, headers=None, etag=None, last_modified=None):
+        self.requests.append(("submissions", etag))
+        if etag == '"v1"':
+            return 304, None, {}
+        return 200, {"filings": {
+            "recent": columns(("a3", "10-K", "2024-11-01"), ("a2", "8-K", "2024-08-01")),
+            "files": [{"name": "CIK0000320193-submissions-001.json"}]
+        }}, {"etag": '"v1"', "last_modified": None}
+
+    async def make_request(self, url, headers=None):
+        self.requests.append(("archive", url.rsplit("/", 1)[-1]))
+        return columns(("a1", "10-K", "2023-11-01"), ("a0", "10-K", "2022-11-01"))
+
+
+def test_history_archives_load_only_when_needed(tmp_path):
+    client = SecClient()
+    store = SECFilingsStore(client, str(tmp_path))
+
+    async def run():
+        recent = await store.get_filings(CIK, count=2)
+        annual = await store.get_filings(CIK, form_types=["10-K"], count=2)
+        return recent, annual
+
+    recent, annual = asyncio.run(run())
+    assert [filing.accession_number for filing in recent] == ["a3", "a2"]
+    assert [filing.accession_number for filing in annual] == ["a3", "a1"]
+    assert client.requests == [("submissions", None), ("archive", "CIK0000320193-submissions-001.json")]
+
+
+def test_not_modified_only_touches_the_sidecar(tmp_path, monkeypatch):
+    monkeypatch.setattr("config.settings.SEC_FILINGS_TTL", 3600)
+    client = SecClient()
+    store = SECFilingsStore(client, str(tmp_path))
+    asyncio.run(store.get_filings(CIK, include_history=False))
+
+    filings_path = tmp_path / f"CIK{CIK}.json"
+    written = os.path.getmtime(filings_path)
+    store._companies[CIK].fetched_at -= 7200
+    asyncio.run(store.get_filings(CIK, include_history=False))
+    assert client.requests[-1] == ("submissions", '"v1"')
+    assert os.path.getmtime(filings_path) == written
+    assert (tmp_path / f"CIK{CIK}.meta.json").exists()
+
+    # After a restart the sidecar's revalidation time keeps the stored filings fresh
+    restarted = SECFilingsStore(client, str(tmp_path))
+    filings = asyncio.run(restarted.get_filings(CIK, count=2, include_history=False))
+    assert len(client.requests) == 2
+    assert [filing.accession_number for filing in filings] == ["a3", "a2"]
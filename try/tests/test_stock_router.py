@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from core.dependencies import get_yahoo_service
+from routers import stock_router
+from services.bar_store import BarSeries
+from services.yahoo_finance_service import YahooFinanceService
+
+
+class StubYahooService:
+    """Serves a fixed bar series; fails loudly if a request that should be rejected reaches it"""
+
+    chart_rows_from_bars = staticmethod(YahooFinanceService.chart_rows_from_bars)
+    chart_columns_from_bars = staticmethod(YahooFinanceService.chart_columns_from_bars)
+
+    def __init__(self):
+        close = np.array([10.0, 11.0, 12.0])
+        self.bars = BarSeries({
+            "t": np.array([1_700_000_000, 1_700_086_400, 1_700_172_800], dtype=np.int64),
+            "o": close,
+            "h": close,
+            "l": close,
+            "c": close,
+            "v": np.array([100, 200, 300], dtype=np.int64)
+        })
+
+    async def get_bars(self, ticker, period="1mo", interval="1d"):
+        return self.bars
+
+    async def get_indicators(self, *args):
+        raise AssertionError("invalid request reached the service")
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(stock_router.router)
+    app.dependency_overrides[get_yahoo_service] = StubYahooService
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("interval", ["../../x", "5m", "1D"])
+def test_indicators_reject_unsupported_intervals(client, interval):
+    response = client.get("/stocks/AAPL/indicators", params={"names": "rsi14", "interval": interval})
+    assert response.status_code == 422
+
+    response = client.get("/stocks/indicators", params={"tickers": "AAPL", "names": "rsi14", "interval": interval})
+    assert response.status_code == 422
+
+
+def test_chart_rejects_unsupported_period(client):
+    response = client.get("/stocks/AAPL/chart", params={"period": "7w"})
+    assert response.status_code == 400
+    assert "Unsupported period" in response.json()["detail"]
+
+
+def test_chart_rejects_unknown_format(client):
+    assert client.get("/stocks/AAPL/chart", params={"format": "bogus"}).status_code == 422
+
+
+def test_chart_formats_and_delta(client):
+    rows = client.get("/stocks/AAPL/chart").json()
+    assert [row["close"] for row in rows["data"]] == [10.0, 11.0, 12.0]
+
+    columnar = client.get("/stocks/AAPL/chart", params={"format": "columnar", "since": 1_700_086_400}).json()
+    assert columnar["c"] == [11.0, 12.0]
+    assert columnar["cursor"] == 1_700_172_800
+    assert columnar["delta"] is True
+
+
+def test_chart_etag_depends_on_format_and_cursor(client):
+    full = client.get("/stocks/AAPL/chart")
+    delta = client.get("/stocks/AAPL/chart", params={"since": 1_700_086_400})
+    columnar = client.get("/stocks/AAPL/chart", params={"format": "columnar"})
+    assert len({full.headers["etag"], delta.headers["etag"], columnar.headers["etag"]}) == 3
+
+    revalidated = client.get("/stocks/AAPL/chart", params={"since": 1_700_086_400}, headers={"If-None-Match": delta.headers["etag"]})
+    assert revalidated.status_code == 304
+    stale = client.get("/stocks/AAPL/chart", headers={"If-None-Match": delta.headers["etag"]})
+    assert stale.status_code == 200
@@ -0,0 +1,60 @@
+import asyncio
+import httpx
+from benchmarks.stub_upstream import TICKERS_ETAG, Stub, close_on
+from core.http_client import RedirectTransport
+
+
+def stub_client(stub: Stub) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=RedirectTransport(httpx.ASGITransport(app=stub), "http://stub.local"))
+
+
+def test_redirected_requests_keep_the_real_host():
+    stub = Stub()
+    stub.configure({provider: {"latency": 0.0, "jitter": 0.0} for provider in ("yahoo", "sec")})
+
+    async def run():
+        async with stub_client(stub) as client:
+            quote = await client.get("https://query1.finance.yahoo.com/v8/finance/chart/AAB")
+            tickers = await client.get("https://www.sec.gov/files/company_tickers.json")
+            revalidated = await client.get("https://www.sec.gov/files/company_tickers.json", headers={"If-None-Match": TICKERS_ETAG})
+            return quote, tickers, revalidated
+
+    quote, tickers, revalidated = asyncio.run(run())
+    assert quote.status_code == 200
+    meta = quote.json()["chart"]["result"][0]["meta"]
+    assert meta["symbol"] == "AAB"
+    assert tickers.headers["etag"] == TICKERS_ETAG and revalidated.status_code == 304
+    assert stub.calls == {"query1.finance.yahoo.com": {"200": 1}, "www.sec.gov": {"200": 1, "304": 1}}
+
+
+def test_bars_are_deterministic_across_incremental_fetches():
+    stub = Stub()
+    stub.configure({"yahoo": {"latency": 0.0, "jitter": 0.0}})
+    day = 86400
+    url = "https://query1.finance.yahoo.com/v8/finance/chart/AAA"
+
+    async def run():
+        async with stub_client(stub) as client:
+            full = await client.get(url, params={"period1": 0, "period2": 13 * day, "interval": "1d"})
+            tail = await client.get(url, params={"period1": 7 * day, "period2": 13 * day, "interval": "1d"})
+            return full.json()["chart"]["result"][0], tail.json()["chart"]["result"][0]
+
+    full, tail = asyncio.run(run())
+    # Epoch day 0 was a Thursday, so days 2-3 and 9-10 are a weekend
+    assert [ts // day for ts in full["timestamp"]] == [0, 1, 4, 5, 6, 7, 8, 11, 12, 13]
+    closes = dict(zip(full["timestamp"], full["indicators"]["quote"][0]["close"]))
+    assert all(closes[ts] == close for ts, close in zip(tail["timestamp"], tail["indicators"]["quote"][0]["close"]))
+    assert closes[13 * day] == close_on("AAA", 13)
+
+
+def test_throttled_and_failing_providers():
+    stub = Stub()
+    stub.configure({"polygon": {"latency": 0.0, "jitter": 0.0, "throttle_rate": 1.0, "retry_after": 3}})
+
+    async def run():
+        async with stub_client(stub) as client:
+            return await client.get("https://api.polygon.io/v2/last/trade/AAA")
+
+    response = asyncio.run(run())
+    assert response.status_code == 429 and response.headers["retry-after"] == "3"
+    assert stub.calls == {"api.polygon.io": {"429": 1}}
@@ -0,0 +1,52 @@
+import asyncio
+import pandas as pd
+from core.executor import BoundedExecutor
+from services.yfinance_batcher import YFinanceBatcher
+
+
+def test_concurrent_requests_share_one_download(monkeypatch):
+    monkeypatch.setattr("config.settings.YF_BATCH_WINDOW", 0.02)
+    monkeypatch.setattr("config.settings.YF_BATCH_MAX_TICKERS", 50)
+    downloads = []
+
+    def download(tickers, period, interval):
+        downloads.append((sorted(tickers), period, interval))
+        return {ticker: pd.DataFrame({"Close": [1.0]}) for ticker in tickers if ticker != "NONE"}
+
+    monkeypatch.setattr("services.yfinance_batcher._download", download)
+    batcher = YFinanceBatcher(BoundedExecutor(max_workers=1))
+
+    async def run():
+        return await asyncio.gather(
+            batcher.history("aaa", "1y"),
+            batcher.history("BBB", "1y"),
+            batcher.history("AAA", "1y"),
+            batcher.history("NONE", "1y"),
+            batcher.history("AAA", "5d")
+        )
+
+    aaa, bbb, aaa_again, none, short = asyncio.run(run())
+    assert sorted(downloads) == [(["AAA"], "5d", "1d"), (["AAA", "BBB", "NONE"], "1y", "1d")]
+    assert aaa is aaa_again and bbb is not None and short is not None
+    assert none is None
+    assert batcher.stats()["requests"] == 5 and batcher.stats()["downloads"] == 2
+
+
+def test_full_batch_flushes_without_waiting_and_errors_reach_every_caller(monkeypatch):
+    monkeypatch.setattr("config.settings.YF_BATCH_WINDOW", 10)
+    monkeypatch.setattr("config.settings.YF_BATCH_MAX_TICKERS", 2)
+
+    def download(tickers, period, interval):
+        raise RuntimeError("yahoo down")
+
+    monkeypatch.setattr("services.yfinance_batcher._download", download)
+    batcher = YFinanceBatcher(BoundedExecutor(max_workers=1))
+
+    async def run():
+        return await asyncio.wait_for(
+            asyncio.gather(batcher.history("AAA", "1y"), batcher.history("BBB", "1y"), return_exceptions=True),
+            timeout=1
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)